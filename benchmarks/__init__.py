@@ -0,0 +1 @@
+"""This is the __init__.py file for the benchmarks."""
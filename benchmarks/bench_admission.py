@@ -0,0 +1,132 @@
+"""Benchmark of caller latencies during a burst, with and without admission control."""
+import argparse
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from lib.admission.controller import AdmissionController, Overloaded
+
+
+def _percentile(latencies: List[float], fraction: float) -> float:
+    if not latencies:
+        return 0.0
+    ordered = sorted(latencies)
+    return ordered[int(fraction * (len(ordered) - 1))]
+
+
+def simulate(
+    controller: Optional[AdmissionController],
+    capacity: int = 4,
+    service_ms: float = 20.0,
+    noisy_workers: int = 16,
+    duration_s: float = 2.0
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Send a burst from a noisy caller and steady requests from a quiet one.
+
+    The model quota is a semaphore of ``capacity`` concurrent calls of
+    ``service_ms`` each. The noisy caller sends requests back to back from
+    ``noisy_workers`` threads, and the quiet caller sends one request at a
+    time. Without a controller every request is accepted and waits for the
+    quota, as in the function app before admission control.
+
+    Returns:
+        dict: Per caller, the completed and shed requests and the p50 and
+            p99 latency of the completed requests in milliseconds
+    """
+    quota = threading.Semaphore(capacity)
+    stop = time.perf_counter() + duration_s
+    results = {caller: {"latencies": [], "shed": 0} for caller in ("noisy", "quiet")}
+    lock = threading.Lock()
+
+    def call_model():
+        with quota:
+            time.sleep(service_ms / 1000)
+
+    def worker(caller):
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            try:
+                if controller is None:
+                    call_model()
+                else:
+                    with controller.admit(caller):
+                        call_model()
+            except Overloaded:
+                with lock:
+                    results[caller]["shed"] += 1
+                # A shed caller backs off before it retries
+                time.sleep(service_ms / 1000)
+                continue
+            with lock:
+                results[caller]["latencies"].append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=worker, args=("noisy",)) for _ in range(noisy_workers)]
+    threads.append(threading.Thread(target=worker, args=("quiet",)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return {
+        caller: {
+            "completed": len(result["latencies"]),
+            "shed": result["shed"],
+            "latency_ms_p50": _percentile(result["latencies"], 0.5),
+            "latency_ms_p99": _percentile(result["latencies"], 0.99),
+        }
+        for caller, result in results.items()
+    }
+
+
+def run_benchmark(
+    capacity: int = 4,
+    service_ms: float = 20.0,
+    noisy_workers: int = 16,
+    duration_s: float = 2.0,
+    max_queue: int = 8,
+    max_wait_s: float = 0.1
+) -> List[Dict[str, Any]]:
+    """
+    Compare accepting every request with the admission controller.
+
+    Returns:
+        list: One record per mode and caller with the results of simulate(),
+            plus the shed rate and largest queue depth of the controller
+    """
+    records = []
+    for mode in ("accept_all", "admission"):
+        controller = None
+        if mode == "admission":
+            controller = AdmissionController(capacity, max_queue, max_wait_s)
+        results = simulate(controller, capacity, service_ms, noisy_workers, duration_s)
+        stats = controller.stats() if controller is not None else {}
+        for caller, result in results.items():
+            records.append({
+                "mode": mode,
+                "caller": caller,
+                **result,
+                "shed_rate": stats.get("shed_rate", 0.0),
+                "max_queue_depth": stats.get("max_queue_depth", 0),
+            })
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("bench_admission")
+    parser.add_argument("--capacity", type=int, default=4, help="concurrent model calls")
+    parser.add_argument("--service_ms", type=float, default=20.0, help="duration of a model call")
+    parser.add_argument("--noisy_workers", type=int, default=16, help="threads of the noisy caller")
+    parser.add_argument("--duration_s", type=float, default=2.0, help="length of the burst")
+    parser.add_argument("--max_queue", type=int, default=8, help="admission queue size")
+    parser.add_argument("--max_wait_s", type=float, default=0.1, help="longest queue wait")
+    args = parser.parse_args()
+
+    print(f"{'mode':<11} {'caller':<6} {'done':>6} {'shed':>6} {'p50':>10} {'p99':>10}")
+    for record in run_benchmark(
+        args.capacity, args.service_ms, args.noisy_workers, args.duration_s,
+        args.max_queue, args.max_wait_s
+    ):
+        print(f"{record['mode']:<11} {record['caller']:<6} {record['completed']:>6} "
+              f"{record['shed']:>6} {record['latency_ms_p50']:>8.1f}ms "
+              f"{record['latency_ms_p99']:>8.1f}ms")
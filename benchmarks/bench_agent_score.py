@@ -0,0 +1,133 @@
+"""Benchmark of AgentEvaluator on synthetic agent threads."""
+import argparse
+import json
+import random
+import time
+from typing import Any, Dict, List
+
+from lib.agent_eval import agent_score
+from lib.agent_eval.agent_score import AgentEvaluator
+
+
+def generate_thread(message_count: int, seed: int = 0) -> str:
+    """Generate a serialized agent thread in the flow's full_output format."""
+    rng = random.Random(seed)
+    created_at = 1739804575
+    messages = []
+    for i in range(message_count):
+        created_at += rng.randint(0, 3)
+        role = "user" if i % 2 == 0 else "assistant"
+        messages.append({
+            "id": f"msg_{i}",
+            "object": "thread.message",
+            "created_at": str(created_at),
+            "assistant_id": "asst_1" if role == "assistant" else None,
+            "thread_id": "thread_1",
+            "run_id": "run_1",
+            "role": role,
+            "content_text": "x" * rng.randint(20, 400),
+        })
+    return json.dumps([
+        {k: v for k, v in msg.items() if v is not None} for msg in messages
+    ])
+
+
+def _multi_pass_score(evaluator: AgentEvaluator, row: Dict[str, Any]) -> int:
+    """Score a row the way the evaluator did before the single-pass rewrite."""
+    messages = json.loads(row["full_output"])
+    total_score = (
+        evaluator.validate_dictionary_count(
+            messages, int(row["total_message_count"]))
+        + evaluator.validate_assistant_messages_count(
+            messages, int(row["total_assistant_message_count"]))
+        + evaluator.validate_user_messages_count(
+            messages, int(row["total_user_message_count"]))
+        + evaluator.validate_time_difference(
+            messages, int(row["time_difference"]))
+    )
+    return int((total_score / 4) * 100)
+
+
+def _time(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(
+    message_counts: List[int],
+    rows: int = 20,
+    repeat: int = 3
+) -> List[Dict[str, Any]]:
+    """
+    Time the multi-pass, single-pass and batch scoring of synthetic threads.
+
+    Returns:
+        list: One record per thread size with the best time in seconds of
+            scoring ``rows`` threads with each strategy
+    """
+    evaluator = AgentEvaluator()
+    records = []
+    for message_count in message_counts:
+        data = [
+            {
+                "full_output": generate_thread(message_count, seed),
+                "total_message_count": str(message_count),
+                "total_user_message_count": str((message_count + 1) // 2),
+                "total_assistant_message_count": str(message_count // 2),
+                "time_difference": str(message_count * 3),
+            }
+            for seed in range(rows)
+        ]
+        columns = {key: [row[key] for row in data] for key in data[0]}
+
+        fast_loads = agent_score._json_loads
+        try:
+            agent_score._json_loads = json.loads
+            single_pass_json = _time(
+                lambda: [evaluator(**row) for row in data], repeat
+            )
+        finally:
+            agent_score._json_loads = fast_loads
+
+        records.append({
+            "message_count": message_count,
+            "rows": rows,
+            "fast_json": fast_loads is not json.loads,
+            "multi_pass_s": _time(
+                lambda: [_multi_pass_score(evaluator, row) for row in data],
+                repeat
+            ),
+            "single_pass_json_s": single_pass_json,
+            "single_pass_s": _time(
+                lambda: [evaluator(**row) for row in data], repeat
+            ),
+            "batch_s": _time(lambda: evaluator.evaluate_batch(columns), repeat),
+        })
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("bench_agent_score")
+    parser.add_argument(
+        "--message_counts",
+        type=int,
+        nargs="+",
+        default=[10, 1000, 10000],
+        help="thread sizes to benchmark",
+    )
+    parser.add_argument("--rows", type=int, default=20, help="threads per size")
+    parser.add_argument("--repeat", type=int, default=3, help="timing repeats")
+    args = parser.parse_args()
+
+    print(f"{'messages':>10} {'multi-pass':>12} {'1-pass json':>12} "
+          f"{'1-pass':>12} {'batch':>12}")
+    for record in run_benchmark(args.message_counts, args.rows, args.repeat):
+        print(f"{record['message_count']:>10} "
+              f"{record['multi_pass_s']:>12.5f} "
+              f"{record['single_pass_json_s']:>12.5f} "
+              f"{record['single_pass_s']:>12.5f} "
+              f"{record['batch_s']:>12.5f}")
@@ -0,0 +1,128 @@
+"""Benchmark of experiment configuration loading."""
+import argparse
+import tempfile
+import time
+from typing import Any, Dict, List
+from unittest.mock import patch
+
+import yaml
+
+from llmops import experiment as experiment_module
+from llmops.experiment import load_experiment
+
+
+def generate_config(evaluator_count: int, connection_count: int) -> Dict[str, Any]:
+    """Generate an experiment configuration with the given number of sections."""
+    connections = [
+        {
+            "name": f"conn{i}",
+            "connection_type": "AzureOpenAIConnection",
+            "api_base": "https://example.openai.azure.com/",
+            "api_version": "2023-07-01-preview",
+            "api_key": f"key{i}",
+            "api_type": "azure",
+            "deployment_name": "gpt-4o-mini",
+        }
+        for i in range(connection_count)
+    ]
+    evaluators = [
+        {
+            "name": f"eval_{i}",
+            "flow": "evaluations",
+            "entry_point": "pure_python_flow:get_math_response",
+            "connections_ref": [f"conn{i % connection_count}"],
+            "env_vars": [{"EVAL_INDEX": str(i)}, {"ENABLE_TELEMETRY": True}],
+            "datasets": [{
+                "name": f"dataset_{i}",
+                "source": "data/math_data.jsonl",
+                "description": "Synthetic dataset",
+                "mappings": {
+                    "ground_truth": "${data.answer}",
+                    "response": "${target.response}",
+                },
+            }],
+        }
+        for i in range(evaluator_count)
+    ]
+    return {
+        "name": "bench",
+        "description": "Synthetic experiment",
+        "flow": "flows/math_code_generation",
+        "entry_point": "pure_python_flow:get_math_response",
+        "connections_ref": ["conn0"],
+        "env_vars": [{"PROMPTY_FILE": "math_prompt.prompty"}],
+        "connections": connections,
+        "evaluators": evaluators,
+    }
+
+
+def _time(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(evaluator_counts: List[int], repeat: int = 5) -> List[Dict[str, Any]]:
+    """
+    Time load_experiment with the pure-Python loader, libyaml and the cache.
+
+    Returns:
+        list: One record per configuration size with best times in seconds
+    """
+    records = []
+    for evaluator_count in evaluator_counts:
+        with tempfile.TemporaryDirectory() as base_path, \
+                tempfile.TemporaryDirectory() as cache_dir:
+            config = generate_config(evaluator_count, max(evaluator_count // 2, 1))
+            with open(f"{base_path}/experiment.yaml", "w", encoding="utf-8") as f:
+                yaml.dump(config, f)
+            with open(f"{base_path}/experiment.dev.yaml", "w", encoding="utf-8") as f:
+                yaml.dump({"evaluators": config["evaluators"][::2]}, f)
+
+            with patch.object(experiment_module, "_YAML_LOADER", yaml.SafeLoader):
+                python_loader = _time(
+                    lambda: load_experiment(base_path=base_path, env="dev"), repeat
+                )
+            default_loader = _time(
+                lambda: load_experiment(base_path=base_path, env="dev"), repeat
+            )
+            # Warm the cache once, then time cache hits
+            load_experiment(base_path=base_path, env="dev", cache_dir=cache_dir)
+            cached = _time(
+                lambda: load_experiment(
+                    base_path=base_path, env="dev", cache_dir=cache_dir
+                ),
+                repeat
+            )
+
+        records.append({
+            "evaluators": evaluator_count,
+            "libyaml": experiment_module._YAML_LOADER is not yaml.SafeLoader,
+            "python_loader_s": python_loader,
+            "default_loader_s": default_loader,
+            "cached_s": cached,
+        })
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("bench_config_load")
+    parser.add_argument(
+        "--evaluator_counts",
+        type=int,
+        nargs="+",
+        default=[3, 100, 1000],
+        help="number of evaluators in the generated configurations",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="timing repeats")
+    args = parser.parse_args()
+
+    print(f"{'evaluators':>10} {'SafeLoader':>12} {'default':>12} {'cached':>12}")
+    for record in run_benchmark(args.evaluator_counts, args.repeat):
+        print(f"{record['evaluators']:>10} "
+              f"{record['python_loader_s'] * 1000:>10.2f}ms "
+              f"{record['default_loader_s'] * 1000:>10.2f}ms "
+              f"{record['cached_s'] * 1000:>10.2f}ms")
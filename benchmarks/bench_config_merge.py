@@ -0,0 +1,106 @@
+"""Benchmark of merging large experiment configurations."""
+import argparse
+import time
+from copy import deepcopy
+from typing import Any, Dict, List
+
+from llmops.config_overlay import merge
+
+
+def generate_layers(item_count: int) -> List[Dict[str, Any]]:
+    """Generate a base and env layer with ``item_count`` named items each."""
+    base = {
+        "connections": [
+            {"name": f"conn{i}", "api_base": "https://base", "api_key": f"k{i}"}
+            for i in range(item_count)
+        ],
+        "evaluators": [
+            {
+                "name": f"eval_{i}",
+                "datasets": [{"name": f"ds_{i}", "source": "data/base.jsonl"}],
+                "env_vars": [{"INDEX": str(i)}],
+            }
+            for i in range(item_count)
+        ],
+    }
+    env = {
+        "connections": [
+            {"name": f"conn{i}", "api_base": "https://env"}
+            for i in range(0, item_count * 2, 2)
+        ],
+        "evaluators": [
+            {"name": f"eval_{i}", "datasets": [{"name": f"ds_{i}", "source": "data/env.jsonl"}]}
+            for i in range(0, item_count * 2, 2)
+        ],
+    }
+    return [base, env]
+
+
+def _deep_copy_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge the way Experiment.deep_merge did before the overlay engine."""
+    result = deepcopy(base)
+    for key, value in override.items():
+        if key in result and isinstance(result[key], dict) and isinstance(value, dict):
+            result[key] = _deep_copy_merge(result[key], value)
+        elif key in result and isinstance(result[key], list) and isinstance(value, list):
+            if result[key] and isinstance(result[key][0], dict) and 'name' in result[key][0]:
+                merged_list = deepcopy(result[key])
+                override_map = {item['name']: item for item in value}
+                for i, item in enumerate(merged_list):
+                    if item['name'] in override_map:
+                        merged_list[i] = _deep_copy_merge(item, override_map[item['name']])
+                for override_item in value:
+                    if not any(item['name'] == override_item['name'] for item in merged_list):
+                        merged_list.append(override_item)
+                result[key] = merged_list
+            else:
+                result[key] = value
+        else:
+            result[key] = value
+    return result
+
+
+def _time(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(item_counts: List[int], repeat: int = 3) -> List[Dict[str, Any]]:
+    """
+    Time the deep-copy merge and the overlay merge of generated layers.
+
+    Returns:
+        list: One record per layer size with best times in seconds
+    """
+    records = []
+    for item_count in item_counts:
+        base, env = generate_layers(item_count)
+        records.append({
+            "items": item_count,
+            "deep_copy_s": _time(lambda: _deep_copy_merge(base, env), repeat),
+            "overlay_s": _time(lambda: merge(base, env), repeat),
+        })
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("bench_config_merge")
+    parser.add_argument(
+        "--item_counts",
+        type=int,
+        nargs="+",
+        default=[100, 1000, 5000],
+        help="number of connections and evaluators in each generated layer",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="timing repeats")
+    args = parser.parse_args()
+
+    print(f"{'items':>8} {'deep copy':>12} {'overlay':>12}")
+    for record in run_benchmark(args.item_counts, args.repeat):
+        print(f"{record['items']:>8} "
+              f"{record['deep_copy_s'] * 1000:>10.2f}ms "
+              f"{record['overlay_s'] * 1000:>10.2f}ms")
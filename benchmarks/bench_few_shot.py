@@ -0,0 +1,128 @@
+"""Benchmark of static versus BM25-selected few-shot examples against the mock LLM."""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+from typing import Any, Dict, List
+
+from benchmarks.generate_math_data import generate_rows
+from benchmarks.mock_llm import MockChatServer
+from lib.fast_path.arithmetic import FAST_PATH_ENV_VAR
+from lib.few_shot.selector import BANK_ENV_VAR, BUDGET_ENV_VAR, K_ENV_VAR, load_examples
+from llmops.evaluator_registry import REPO_ROOT
+
+FLOW_DIR = os.path.join(REPO_ROOT, "math_coding", "flows", "math_code_generation")
+BANK_PATH = os.path.join(FLOW_DIR, "few_shot_examples.jsonl")
+DATA_PATH = os.path.join(REPO_ROOT, "math_coding", "data", "math_data.jsonl")
+
+# The prompty files used to inline the first four examples of the bank
+STATIC_EXAMPLE_COUNT = 4
+
+
+def questions(generated: int, seed: int = 0) -> List[str]:
+    """Return the math_coding dataset questions plus generated ones."""
+    with open(DATA_PATH, "r", encoding="utf-8") as f:
+        dataset = [json.loads(line)["question"] for line in f if line.strip()]
+    return dataset + [row["question"] for row in generate_rows(generated, seed)]
+
+
+def _run(question_list: List[str], settings: Dict[str, str]) -> Dict[str, float]:
+    from math_coding.flows.math_code_generation.pure_python_flow import (
+        get_math_response
+    )
+
+    os.environ.update(settings)
+    outputs = [get_math_response(question) for question in question_list]
+    prompt_tokens = [output["prompt_tokens"] for output in outputs]
+    latencies = sorted(output["llm_latency_ms"] for output in outputs)
+    return {
+        "prompt_tokens_mean": statistics.mean(prompt_tokens),
+        "llm_latency_ms_p50": statistics.median(latencies),
+        "llm_latency_ms_p95": latencies[int(0.95 * (len(latencies) - 1))],
+    }
+
+
+def run_benchmark(
+    generated: int = 100,
+    latency_ms: float = 20.0,
+    prompt_token_ms: float = 0.05,
+    k: int = 2,
+    token_budget: int = 250
+) -> List[Dict[str, Any]]:
+    """
+    Call the math_coding flow with the static and the selected examples.
+
+    The mock server delays each answer by ``latency_ms`` plus
+    ``prompt_token_ms`` per prompt token.
+
+    Returns:
+        list: One record per strategy with the mean prompt tokens and the
+            p50 and p95 LLM latency in milliseconds
+    """
+    question_list = questions(generated)
+    records = []
+    cwd = os.getcwd()
+    saved = {name: os.environ.get(name) for name in (
+        "AZURE_AI_CHAT_ENDPOINT", "AZURE_AI_CHAT_KEY", "PROMPTY_FILE",
+        BANK_ENV_VAR, K_ENV_VAR, BUDGET_ENV_VAR, FAST_PATH_ENV_VAR
+    )}
+    with tempfile.TemporaryDirectory() as tmp, \
+            MockChatServer(latency_ms, prompt_token_ms=prompt_token_ms) as server:
+        static_bank = os.path.join(tmp, "static_examples.jsonl")
+        with open(static_bank, "w", encoding="utf-8") as f:
+            for example in load_examples(BANK_PATH)[:STATIC_EXAMPLE_COUNT]:
+                f.write(json.dumps(example) + "\n")
+        os.environ.update({
+            "AZURE_AI_CHAT_ENDPOINT": server.endpoint,
+            "AZURE_AI_CHAT_KEY": "mock",
+            "PROMPTY_FILE": "math_prompt.prompty",
+            # Generated questions would otherwise never reach the LLM
+            FAST_PATH_ENV_VAR: "false",
+        })
+        # Flows load their prompty file relative to the working directory
+        os.chdir(FLOW_DIR)
+        try:
+            strategies = {
+                "static": {
+                    BANK_ENV_VAR: static_bank,
+                    K_ENV_VAR: str(STATIC_EXAMPLE_COUNT),
+                    BUDGET_ENV_VAR: "0",
+                },
+                "bm25": {
+                    BANK_ENV_VAR: BANK_PATH,
+                    K_ENV_VAR: str(k),
+                    BUDGET_ENV_VAR: str(token_budget),
+                },
+            }
+            for name, settings in strategies.items():
+                records.append({"strategy": name, **_run(question_list, settings)})
+        finally:
+            os.chdir(cwd)
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("bench_few_shot")
+    parser.add_argument("--generated", type=int, default=100, help="generated questions")
+    parser.add_argument("--latency_ms", type=float, default=20.0, help="base mock latency")
+    parser.add_argument(
+        "--prompt_token_ms", type=float, default=0.05,
+        help="mock latency per prompt token",
+    )
+    parser.add_argument("--k", type=int, default=2, help="selected examples")
+    parser.add_argument("--token_budget", type=int, default=250, help="example token budget")
+    args = parser.parse_args()
+
+    print(f"{'strategy':<8} {'prompt tokens':>14} {'p50 latency':>12} {'p95 latency':>12}")
+    for record in run_benchmark(
+        args.generated, args.latency_ms, args.prompt_token_ms, args.k, args.token_budget
+    ):
+        print(f"{record['strategy']:<8} {record['prompt_tokens_mean']:>14.1f} "
+              f"{record['llm_latency_ms_p50']:>10.2f}ms "
+              f"{record['llm_latency_ms_p95']:>10.2f}ms")
@@ -0,0 +1,232 @@
+"""End-to-end throughput benchmark of prepare_and_execute against a mock LLM."""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+
+import yaml
+
+from benchmarks.generate_math_data import write_dataset
+from benchmarks.mock_llm import MockChatServer
+from lib.answer_len.answer_length import AnswerLengthEvaluator
+from lib.fast_path.arithmetic import FAST_PATH_ENV_VAR
+from lib.f1_score.f1_score import F1ScoreEvaluator
+from llmops import local_eval
+from llmops.evaluator_registry import REPO_ROOT
+
+FLOW_DIR = os.path.join(REPO_ROOT, "math_coding", "flows", "math_code_generation")
+
+
+def eval_pipeline(name, data_path, column_mapping, output_path):
+    """
+    Evaluate the math_coding flow locally, timing its target and scoring.
+
+    The result gets a ``timings`` entry with the seconds spent in the target,
+    in scoring, and in the rest of the evaluation, which is reading the
+    dataset and writing the result file.
+    """
+    from math_coding.flows.math_code_generation.pure_python_flow import (
+        get_math_response
+    )
+
+    timings = {"target_s": 0.0, "scoring_s": 0.0}
+
+    def target(question):
+        start = time.perf_counter()
+        try:
+            return get_math_response(question)
+        finally:
+            timings["target_s"] += time.perf_counter() - start
+
+    score_outputs = local_eval.score_outputs
+
+    def timed_score_outputs(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return score_outputs(*args, **kwargs)
+        finally:
+            timings["scoring_s"] += time.perf_counter() - start
+
+    local_eval.score_outputs = timed_score_outputs
+    start = time.perf_counter()
+    try:
+        result = local_eval.evaluate(
+            data_path,
+            {"f1_score": F1ScoreEvaluator(), "answer_length": AnswerLengthEvaluator()},
+            target=target,
+            evaluator_config={"default": {"column_mapping": dict(column_mapping)}},
+            evaluation_name=name,
+            output_path=os.path.join(output_path, f"{name}.json"),
+        )
+    finally:
+        local_eval.score_outputs = score_outputs
+    timings["evaluate_s"] = time.perf_counter() - start
+    timings["io_s"] = (
+        timings["evaluate_s"] - timings["target_s"] - timings["scoring_s"]
+    )
+    result["timings"] = timings
+    return result
+
+
+def write_use_case(
+    base_path: str, row_count: int, seed: int = 0, fast_path: bool = False
+) -> None:
+    """
+    Write an experiment with a generated dataset evaluated by eval_pipeline.
+
+    Generated questions are all plain arithmetic, so the arithmetic fast path
+    of the flow is off unless ``fast_path`` is set.
+    """
+    os.makedirs(os.path.join(base_path, "data"), exist_ok=True)
+    write_dataset(os.path.join(base_path, "data", "math_data.jsonl"), row_count, seed)
+    experiment = {
+        "name": "bench_pipeline",
+        "flow": "flows/math_code_generation",
+        "entry_point": "pure_python_flow:get_math_response",
+        "connections_ref": [],
+        "connections": [],
+        "env_vars": [
+            {"PROMPTY_FILE": "math_prompt.prompty"},
+            {FAST_PATH_ENV_VAR: str(fast_path).lower()},
+        ],
+        "evaluators": [{
+            "name": "eval_pipeline",
+            "flow": "evaluations",
+            "entry_point": "eval_pipeline:eval_pipeline",
+            "functions": ["benchmarks.bench_pipeline:eval_pipeline"],
+            "connections_ref": [],
+            "env_vars": [],
+            "datasets": [{
+                "name": "math",
+                "source": "data/math_data.jsonl",
+                "mappings": {
+                    "ground_truth": "${data.answer}",
+                    "response": "${target.response}",
+                },
+            }],
+        }],
+    }
+    with open(os.path.join(base_path, "experiment.yaml"), "w", encoding="utf-8") as f:
+        yaml.dump(experiment, f)
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB and macOS bytes
+    return peak / 1024 if sys.platform != "darwin" else peak / 1024 ** 2
+
+
+def run_pipeline(base_path: str, endpoint: str) -> Dict[str, Any]:
+    """
+    Run prepare_and_execute on a use case written by write_use_case.
+
+    Runs in a fresh process so the peak RSS belongs to this run only.
+    """
+    from llmops.eval_experiments import prepare_and_execute
+
+    os.environ["AZURE_AI_CHAT_ENDPOINT"] = endpoint
+    os.environ["AZURE_AI_CHAT_KEY"] = "mock"
+    # Per-request HTTP logging of the Azure SDK would dominate the timings
+    logging.getLogger("azure").setLevel(logging.WARNING)
+    # Flows load their prompty file relative to the working directory
+    os.chdir(FLOW_DIR)
+
+    start = time.perf_counter()
+    results = prepare_and_execute(
+        base_path=base_path,
+        env_name="bench",
+        report_dir=os.path.join(base_path, "reports"),
+    )
+    total = time.perf_counter() - start
+
+    result = results[0]
+    timings = result["timings"]
+    rows = len(result["rows"])
+    return {
+        "rows": rows,
+        "total_s": total,
+        "rows_per_s": rows / total,
+        "peak_rss_mb": _peak_rss_mb(),
+        "target_s": timings["target_s"],
+        "scoring_s": timings["scoring_s"],
+        "io_s": timings["io_s"],
+        "orchestration_s": total - timings["evaluate_s"],
+        "f1_score": result["metrics"].get("f1_score.f1_score"),
+        "fast_path_rate": result["metrics"].get("usage.fast_path.rate"),
+    }
+
+
+def run_benchmark(
+    row_counts: List[int],
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    seed: int = 0,
+    fast_path: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Time prepare_and_execute on generated datasets of the given sizes.
+
+    Returns:
+        list: One record per dataset size with rows/sec, peak RSS in MiB and
+            the seconds spent in the target, scoring, I/O and orchestration
+    """
+    records = []
+    context = multiprocessing.get_context("spawn")
+    with MockChatServer(latency_ms, jitter_ms, seed=seed) as server:
+        for row_count in row_counts:
+            with tempfile.TemporaryDirectory() as base_path:
+                write_use_case(base_path, row_count, seed, fast_path)
+                with ProcessPoolExecutor(1, mp_context=context) as pool:
+                    record = pool.submit(
+                        run_pipeline, base_path, server.endpoint
+                    ).result()
+            record["latency_ms"] = latency_ms
+            records.append(record)
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("bench_pipeline")
+    parser.add_argument(
+        "--row_counts",
+        type=int,
+        nargs="+",
+        default=[1000, 10000, 100000],
+        help="sizes of the generated datasets",
+    )
+    parser.add_argument(
+        "--latency_ms", type=float, default=0.0, help="mock LLM response latency"
+    )
+    parser.add_argument(
+        "--jitter_ms", type=float, default=0.0, help="random +/- latency jitter"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="dataset and jitter seed")
+    parser.add_argument(
+        "--fast_path", action="store_true", help="answer arithmetic without the LLM"
+    )
+    parser.add_argument(
+        "--output", type=str, default=None, help="optional JSON results file"
+    )
+    args = parser.parse_args()
+
+    benchmark_records = run_benchmark(
+        args.row_counts, args.latency_ms, args.jitter_ms, args.seed, args.fast_path
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(benchmark_records, f, indent=2)
+
+    print(f"{'rows':>8} {'rows/s':>9} {'peak RSS':>10} {'target':>9} "
+          f"{'scoring':>9} {'I/O':>9} {'orchestr.':>9}")
+    for record in benchmark_records:
+        print(f"{record['rows']:>8} {record['rows_per_s']:>9.1f} "
+              f"{record['peak_rss_mb']:>8.1f}MB "
+              f"{record['target_s']:>8.2f}s {record['scoring_s']:>8.2f}s "
+              f"{record['io_s']:>8.2f}s {record['orchestration_s']:>8.2f}s")
@@ -0,0 +1,118 @@
+"""Benchmark of per-call versus shared HTTP transports of the chat client."""
+import argparse
+import logging
+import multiprocessing
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from azure.ai.inference import ChatCompletionsClient
+from azure.core.credentials import AzureKeyCredential
+
+from benchmarks.mock_llm import MockChatServer
+from lib.azure_clients.transport import TransportSettings, build_transport
+
+MESSAGES = [{"role": "user", "content": "QUESTION: Multiply 6 by 4.\nCODE:"}]
+
+
+def _timed_calls(endpoint: str, count: int, transport: Optional[Any]) -> List[float]:
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        # A new client per call, like the flow, with or without a shared transport
+        kwargs = {"transport": transport} if transport is not None else {}
+        client = ChatCompletionsClient(
+            endpoint=endpoint, credential=AzureKeyCredential("mock"), **kwargs
+        )
+        client.complete(messages=MESSAGES, model="mock")
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def drive(
+    endpoint: str,
+    ca_file: Optional[str],
+    mode: str,
+    concurrency: int,
+    requests_per_worker: int
+) -> Dict[str, Any]:
+    """
+    Send requests from ``concurrency`` threads and time them.
+
+    ``per_call`` gives every client its own transport, as the flow did,
+    while ``shared`` gives all clients one pooled transport. Runs in a child
+    process, so the mock server does not compete with it for the GIL.
+
+    Returns:
+        dict: Requests per second and the p50 and p95 latency in milliseconds
+    """
+    # Per-request HTTP logging of the Azure SDK would dominate the timings
+    logging.getLogger("azure").setLevel(logging.WARNING)
+    if ca_file:
+        # requests trusts this bundle for the self-signed certificate
+        os.environ["REQUESTS_CA_BUNDLE"] = ca_file
+    transport = None
+    if mode == "shared":
+        transport = build_transport(TransportSettings(pool_size=concurrency))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = pool.map(
+            lambda _: _timed_calls(endpoint, requests_per_worker, transport),
+            range(concurrency),
+        )
+        latencies = sorted(latency for worker in results for latency in worker)
+    total = time.perf_counter() - start
+    return {
+        "requests_per_s": len(latencies) / total,
+        "latency_ms_p50": statistics.median(latencies),
+        "latency_ms_p95": latencies[int(0.95 * (len(latencies) - 1))],
+    }
+
+
+def run_benchmark(
+    concurrency: int = 8,
+    requests_per_worker: int = 25,
+    latency_ms: float = 5.0,
+    tls: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Compare the per-call and the shared transport under the same load.
+
+    Returns:
+        list: One record per mode with the results of drive() and the number
+            of connections the mock server accepted
+    """
+    records = []
+    context = multiprocessing.get_context("spawn")
+    for mode in ("per_call", "shared"):
+        with MockChatServer(latency_ms, tls=tls) as server, \
+                ProcessPoolExecutor(1, mp_context=context) as pool:
+            record = pool.submit(
+                drive, server.endpoint, server.ca_file, mode,
+                concurrency, requests_per_worker
+            ).result()
+            records.append({
+                "mode": mode, "tls": tls, **record, "connections": server.connections
+            })
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("bench_transport")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent callers")
+    parser.add_argument(
+        "--requests", type=int, default=25, help="requests per concurrent caller"
+    )
+    parser.add_argument("--latency_ms", type=float, default=5.0, help="mock LLM latency")
+    parser.add_argument("--no_tls", action="store_true", help="use plain HTTP")
+    args = parser.parse_args()
+
+    print(f"{'mode':<9} {'req/s':>8} {'p50':>10} {'p95':>10} {'connections':>12}")
+    for record in run_benchmark(
+        args.concurrency, args.requests, args.latency_ms, not args.no_tls
+    ):
+        print(f"{record['mode']:<9} {record['requests_per_s']:>8.1f} "
+              f"{record['latency_ms_p50']:>8.2f}ms {record['latency_ms_p95']:>8.2f}ms "
+              f"{record['connections']:>12}")
@@ -0,0 +1,93 @@
+"""Generator of math questions with known answers in the math_data.jsonl schema."""
+import argparse
+import json
+import operator
+import random
+import re
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+_OPERATORS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "//": operator.floordiv,
+    "**": operator.pow,
+    "%": operator.mod,
+}
+
+# Question templates with the operator that answers them. Operands are drawn
+# so every answer is an integer.
+_TEMPLATES: List[Tuple[str, str, Callable[[random.Random], Tuple[int, int]]]] = [
+    ("What is the sum of {a} and {b}?", "+",
+     lambda rng: (rng.randint(1, 10000), rng.randint(1, 10000))),
+    ("Subtract {b} from {a}.", "-",
+     lambda rng: (rng.randint(1, 10000), rng.randint(1, 10000))),
+    ("Multiply {a} by {b}.", "*",
+     lambda rng: (rng.randint(1, 999), rng.randint(1, 999))),
+    ("What is {a} divided by {b}?", "//",
+     lambda rng: _divisible(rng)),
+    ("What is {a} to the power of {b}?", "**",
+     lambda rng: (rng.randint(2, 20), rng.randint(2, 6))),
+    ("What is the remainder when {a} is divided by {b}?", "%",
+     lambda rng: (rng.randint(10, 10000), rng.randint(2, 97))),
+]
+
+_PATTERNS = [
+    (re.compile(
+        "^" + re.escape(question).replace(r"\{a\}", r"(?P<a>-?\d+)")
+        .replace(r"\{b\}", r"(?P<b>-?\d+)") + "$"
+    ), symbol)
+    for question, symbol, _ in _TEMPLATES
+]
+
+
+def _divisible(rng: random.Random) -> Tuple[int, int]:
+    divisor = rng.randint(2, 99)
+    return divisor * rng.randint(1, 999), divisor
+
+
+def generate_row(rng: random.Random) -> Dict[str, str]:
+    """Generate one question and its answer."""
+    question, symbol, operands = rng.choice(_TEMPLATES)
+    a, b = operands(rng)
+    return {
+        "question": question.format(a=a, b=b),
+        "answer": str(_OPERATORS[symbol](a, b)),
+    }
+
+
+def generate_rows(count: int, seed: int = 0) -> Iterator[Dict[str, str]]:
+    """Generate ``count`` rows, the same rows for the same seed."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield generate_row(rng)
+
+
+def write_dataset(path: str, count: int, seed: int = 0) -> str:
+    """Write a generated dataset to a JSONL file and return its path."""
+    with open(path, "w", encoding="utf-8") as f:
+        for row in generate_rows(count, seed):
+            f.write(json.dumps(row) + "\n")
+    return path
+
+
+def expression_for(question: str) -> Optional[str]:
+    """Return the Python expression answering a generated question."""
+    question = question.strip().strip('"')
+    for pattern, symbol in _PATTERNS:
+        match = pattern.match(question)
+        if match:
+            return f"{match['a']} {symbol} {match['b']}"
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("generate_math_data")
+    parser.add_argument("--rows", type=int, default=1000, help="number of rows")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument(
+        "--output", type=str, default="math_data.jsonl", help="output JSONL file"
+    )
+    args = parser.parse_args()
+    write_dataset(args.output, args.rows, args.seed)
+    print(f"Wrote {args.rows} rows to {args.output}")
@@ -0,0 +1,224 @@
+"""Local mock of the Azure AI chat completions endpoint for offline benchmarks."""
+import datetime
+import ipaddress
+import json
+import os
+import random
+import ssl
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from benchmarks.generate_math_data import expression_for
+
+
+def answer_code(messages: list) -> str:
+    """
+    Return the JSON code reply the flow expects for a chat request.
+
+    Questions from ``generate_math_data`` are answered correctly, anything
+    else gets code that prints nothing useful.
+    """
+    content = str(messages[-1].get("content", "")) if messages else ""
+    question = content.rsplit("QUESTION:", 1)[-1].split("CODE:", 1)[0]
+    expression = expression_for(question)
+    code = f"print({expression})" if expression else "print('unknown')"
+    return json.dumps({"code": code})
+
+
+def write_self_signed_certificate(directory: str) -> tuple:
+    """
+    Write a self-signed certificate for 127.0.0.1 and its key.
+
+    Returns:
+        tuple: The certificate and key file paths
+    """
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(
+            x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]),
+            critical=False,
+        )
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(directory, "mock_llm.crt")
+    key_path = os.path.join(directory, "mock_llm.key")
+    with open(cert_path, "wb") as f:
+        f.write(certificate.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ))
+    return cert_path, key_path
+
+
+class MockChatServer:
+    """
+    Chat completions server answering after a configurable latency.
+
+    ``prompt_token_ms`` adds a delay per prompt token, to model the prompt
+    processing time before the first token of a real model. With ``tls`` the
+    server speaks HTTPS with a self-signed certificate, which clients trust
+    through ``ca_file``. ``connections`` counts the accepted connections.
+
+    Use it as a context manager and point AZURE_AI_CHAT_ENDPOINT at
+    ``endpoint``. The server runs on a background thread of the calling
+    process, so keep the code under test in another process when measuring
+    throughput.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        port: int = 0,
+        seed: Optional[int] = 0,
+        prompt_token_ms: float = 0.0,
+        tls: bool = False
+    ):
+        """Bind the server to ``port`` on localhost, a free port by default."""
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.prompt_token_ms = prompt_token_ms
+        self.requests = 0
+        self.connections = 0
+        self.ca_file = None
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+        self._cert_dir = None
+        if tls:
+            self._cert_dir = tempfile.TemporaryDirectory()
+            self.ca_file, key_file = write_self_signed_certificate(self._cert_dir.name)
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(self.ca_file, key_file)
+            # Handshakes run on the handler threads rather than the accept loop
+            self._server.socket = context.wrap_socket(
+                self._server.socket, server_side=True, do_handshake_on_connect=False
+            )
+
+    @property
+    def endpoint(self) -> str:
+        """Base URL of the server."""
+        host, port = self._server.server_address[:2]
+        scheme = "https" if self.ca_file else "http"
+        return f"{scheme}://{host}:{port}"
+
+    def _delay(self, prompt_tokens: int) -> float:
+        with self._lock:
+            self.requests += 1
+            jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+        latency = self.latency_ms + jitter + prompt_tokens * self.prompt_token_ms
+        return max(latency, 0.0) / 1000
+
+    @staticmethod
+    def prompt_tokens(messages: list) -> int:
+        """Estimate the prompt tokens of the messages at 4 characters each."""
+        return sum(len(str(m.get("content", ""))) for m in messages) // 4
+
+    def completion(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the chat completion response for a request body."""
+        messages = body.get("messages") or []
+        content = answer_code(messages)
+        prompt_tokens = self.prompt_tokens(messages)
+        completion_tokens = len(content) // 4
+        return {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model") or "mock",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content},
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Request handler of the mock chat completions endpoint."""
+
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes, Nagle would delay the body
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                """Count the connection."""
+                with server._lock:
+                    server.connections += 1
+                super().setup()
+
+            def do_POST(self):  # noqa: N802 - name required by BaseHTTPRequestHandler
+                """Answer a chat completions request."""
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                time.sleep(server._delay(
+                    server.prompt_tokens(body.get("messages") or [])
+                ))
+                if not self.path.split("?", 1)[0].endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                payload = json.dumps(server.completion(body)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):  # noqa: A002 - base class signature
+                """Keep benchmark output free of request logs."""
+
+        return Handler
+
+    def start(self) -> "MockChatServer":
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+        if self._cert_dir:
+            self._cert_dir.cleanup()
+
+    def __enter__(self) -> "MockChatServer":
+        """Start the server."""
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        """Stop the server."""
+        self.stop()
@@ -0,0 +1,293 @@
+"""Micro-benchmark suite of the framework hot paths with JSON results."""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import textwrap
+import time
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import yaml
+
+from benchmarks.bench_agent_score import generate_thread
+from benchmarks.bench_config_load import generate_config
+from benchmarks.bench_config_merge import generate_layers
+from lib.agent_eval.agent_score import AgentEvaluator
+from lib.answer_len.answer_length import AnswerLengthEvaluator
+from llmops.evaluator_registry import REPO_ROOT, EvaluatorRegistry
+from llmops.experiment import Experiment, load_experiment
+from math_coding.flows.math_code_generation.pure_python_flow import (
+    code_refine,
+    func_exe
+)
+
+SCALES = ("small", "medium", "large")
+
+# Input size of every case at each scale, in the unit given by the case
+SIZES = {
+    "code_refine": {"small": 10, "medium": 100, "large": 1000},
+    "func_exe": {"small": 10, "medium": 100, "large": 1000},
+    "agent_evaluator": {"small": 10, "medium": 1000, "large": 10000},
+    "answer_length": {"small": 100, "medium": 10000, "large": 100000},
+    "deep_merge": {"small": 10, "medium": 1000, "large": 5000},
+    "load_experiment": {"small": 3, "medium": 100, "large": 1000},
+    "evaluator_discovery": {"small": 3, "medium": 50, "large": 300},
+}
+
+# A case setup takes the size and an ExitStack for temporary resources, and
+# returns the function to time and the number of items one call processes
+Setup = Callable[[int, ExitStack], Tuple[Callable[[], Any], int]]
+
+
+def generate_code(line_count: int, seed: int = 0) -> str:
+    """Generate a code snippet in the JSON format returned by the LLM."""
+    rng = random.Random(seed)
+    lines = ["total = 0"]
+    for i in range(line_count - 3):
+        lines.append(f"x{i} = {rng.randint(1, 99)} * {rng.randint(1, 99)}")
+        if i % 10 == 0:
+            lines.append(f"total += x{i}")
+    lines += ["while total > 10 ** 9:", "    total //= 2", "print(total)"]
+    return json.dumps({"code": "\n".join(lines)})
+
+
+def _code_refine(size: int, stack: ExitStack) -> Tuple[Callable[[], Any], int]:
+    snippets = [generate_code(size, seed) for seed in range(20)]
+    return lambda: [code_refine(snippet) for snippet in snippets], len(snippets)
+
+
+def _func_exe(size: int, stack: ExitStack) -> Tuple[Callable[[], Any], int]:
+    snippets = [
+        code_refine(generate_code(size, seed)) for seed in range(20)
+    ]
+    return lambda: [func_exe(snippet) for snippet in snippets], len(snippets)
+
+
+def _agent_evaluator(size: int, stack: ExitStack) -> Tuple[Callable[[], Any], int]:
+    evaluator = AgentEvaluator()
+    rows = [
+        {
+            "full_output": generate_thread(size, seed),
+            "total_message_count": str(size),
+            "total_user_message_count": str((size + 1) // 2),
+            "total_assistant_message_count": str(size // 2),
+            "time_difference": str(size * 3),
+        }
+        for seed in range(10)
+    ]
+    return lambda: [evaluator(**row) for row in rows], len(rows)
+
+
+def _answer_length(size: int, stack: ExitStack) -> Tuple[Callable[[], Any], int]:
+    evaluator = AnswerLengthEvaluator()
+    rng = random.Random(0)
+    responses = ["x" * rng.randint(1, 200) for _ in range(size)]
+    return lambda: [evaluator(response=r) for r in responses], size
+
+
+def _deep_merge(size: int, stack: ExitStack) -> Tuple[Callable[[], Any], int]:
+    base, env = generate_layers(size)
+    return lambda: Experiment.deep_merge(base, env), size
+
+
+def _load_experiment(size: int, stack: ExitStack) -> Tuple[Callable[[], Any], int]:
+    base_path = stack.enter_context(tempfile.TemporaryDirectory())
+    config = generate_config(size, max(size // 2, 1))
+    with open(os.path.join(base_path, "experiment.yaml"), "w", encoding="utf-8") as f:
+        yaml.dump(config, f)
+    with open(os.path.join(base_path, "experiment.dev.yaml"), "w", encoding="utf-8") as f:
+        yaml.dump({"evaluators": config["evaluators"][::2]}, f)
+    return lambda: load_experiment(base_path=base_path, env="dev"), size
+
+
+def _evaluator_discovery(size: int, stack: ExitStack) -> Tuple[Callable[[], Any], int]:
+    # Evaluation files must live in the project to get a module path
+    base_path = stack.enter_context(
+        tempfile.TemporaryDirectory(prefix=".bench_", dir=REPO_ROOT)
+    )
+    os.makedirs(os.path.join(base_path, "evaluations"))
+    config = generate_config(size, 1)
+    for evaluator in config["evaluators"]:
+        evaluator["flow"] = "evaluations"
+        with open(os.path.join(base_path, "evaluations", evaluator["name"] + ".py"),
+                  "w", encoding="utf-8") as f:
+            f.write(textwrap.dedent(f'''
+                """Synthetic evaluation module."""
+
+
+                def eval_{evaluator["name"]}(name, data_path, mappings, report_dir):
+                    """Run the evaluation."""
+                    return {{}}
+
+
+                async def eval_{evaluator["name"]}_async(name, data_path, mappings, report_dir):
+                    """Run the evaluation asynchronously."""
+                    return {{}}
+            '''))
+    with open(os.path.join(base_path, "experiment.yaml"), "w", encoding="utf-8") as f:
+        yaml.dump(config, f)
+    experiment = load_experiment(base_path=base_path, env="dev")
+    index_path = os.path.join(base_path, ".evaluator_index.json")
+
+    def discover():
+        # Measure discovery without the persistent index it would reuse
+        if os.path.exists(index_path):
+            os.remove(index_path)
+        return EvaluatorRegistry.from_experiment(base_path, experiment)
+
+    return discover, size
+
+
+CASES: Dict[str, Setup] = {
+    "code_refine": _code_refine,
+    "func_exe": _func_exe,
+    "agent_evaluator": _agent_evaluator,
+    "answer_length": _answer_length,
+    "deep_merge": _deep_merge,
+    "load_experiment": _load_experiment,
+    "evaluator_discovery": _evaluator_discovery,
+}
+
+
+def measure(func: Callable[[], Any], repeat: int) -> List[float]:
+    """Return the duration in seconds of ``repeat`` calls after one warm-up."""
+    func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_suite(
+    cases: Optional[List[str]] = None,
+    scales: Optional[List[str]] = None,
+    repeat: int = 5
+) -> Dict[str, Any]:
+    """
+    Run the benchmark cases at the given scales.
+
+    Args:
+        cases: Names of CASES to run, all by default
+        scales: Names of SCALES to run, all by default
+        repeat: Timed calls per case and scale
+
+    Returns:
+        dict: ``environment`` details and one ``results`` record per case and
+            scale with the best and median call time in seconds
+    """
+    unknown = set(cases or []) - set(CASES) | set(scales or []) - set(SCALES)
+    if unknown:
+        raise ValueError(f"Unknown benchmark cases or scales: {sorted(unknown)}")
+
+    results = []
+    for name in cases or list(CASES):
+        for scale in scales or list(SCALES):
+            size = SIZES[name][scale]
+            with ExitStack() as stack:
+                func, items = CASES[name](size, stack)
+                timings = measure(func, repeat)
+            best = min(timings)
+            results.append({
+                "case": name,
+                "scale": scale,
+                "size": size,
+                "items": items,
+                "best_s": best,
+                "median_s": statistics.median(timings),
+                "per_item_us": best / items * 1e6,
+            })
+    return {
+        "environment": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float = 0.1
+) -> List[Dict[str, Any]]:
+    """
+    Compare best times against a baseline run.
+
+    Returns:
+        list: One record per case and scale present in both runs, with the
+            ``ratio`` of the new to the baseline time and whether it is a
+            ``regression`` beyond ``threshold``
+    """
+    previous = {(r["case"], r["scale"]): r for r in baseline["results"]}
+    records = []
+    for record in results["results"]:
+        before = previous.get((record["case"], record["scale"]))
+        if before is None or before["size"] != record["size"]:
+            continue
+        ratio = record["best_s"] / before["best_s"]
+        records.append({
+            "case": record["case"],
+            "scale": record["scale"],
+            "ratio": ratio,
+            "regression": ratio > 1 + threshold,
+        })
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("benchmarks.suite")
+    parser.add_argument(
+        "--cases", nargs="+", choices=list(CASES), help="cases to run, all by default"
+    )
+    parser.add_argument(
+        "--scales", nargs="+", choices=list(SCALES), help="scales to run, all by default"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="timing repeats")
+    parser.add_argument(
+        "--output", type=str, default="benchmark_results.json",
+        help="file the JSON results are written to",
+    )
+    parser.add_argument(
+        "--baseline", type=str, default=None,
+        help="JSON results of an earlier run to compare against",
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.1,
+        help="slowdown ratio above which a case counts as a regression",
+    )
+    args = parser.parse_args()
+
+    suite_results = run_suite(args.cases, args.scales, args.repeat)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(suite_results, f, indent=2)
+
+    ratios = {}
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            ratios = {
+                (r["case"], r["scale"]): r
+                for r in compare(suite_results, json.load(f), args.threshold)
+            }
+
+    print(f"{'case':<20} {'scale':<7} {'size':>7} {'best':>12} {'per item':>12} {'vs base':>8}")
+    for result in suite_results["results"]:
+        ratio = ratios.get((result["case"], result["scale"]))
+        change = ""
+        if ratio:
+            change = f"{ratio['ratio']:.2f}x" + (" !" if ratio["regression"] else "")
+        print(f"{result['case']:<20} {result['scale']:<7} {result['size']:>7} "
+              f"{result['best_s'] * 1000:>10.3f}ms "
+              f"{result['per_item_us']:>10.2f}us {change:>8}")
+    print(f"Results written to {args.output}")
+    if any(r["regression"] for r in ratios.values()):
+        sys.exit(1)
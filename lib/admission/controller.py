@@ -0,0 +1,317 @@
+""" A module to admit requests fairly between callers and shed the excess. """
+import contextlib
+import hashlib
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from lib.flow_metrics.tracing import get_tracer
+from lib.request_deadline.deadline import DeadlineExceeded, remaining
+
+# Headers and query parameter identifying the caller
+CALLER_HEADER = "x-caller-id"
+KEY_HEADER = "x-functions-key"
+KEY_PARAM = "code"
+
+# Environment variables configuring the process-wide controller
+MAX_CONCURRENCY_ENV_VAR = "ADMISSION_MAX_CONCURRENCY"
+MAX_QUEUE_ENV_VAR = "ADMISSION_MAX_QUEUE"
+MAX_WAIT_ENV_VAR = "ADMISSION_MAX_WAIT_S"
+WEIGHTS_ENV_VAR = "ADMISSION_WEIGHTS"
+
+# Weight of the service time of the last request in its moving average
+_SERVICE_SMOOTHING = 0.2
+
+
+class Overloaded(Exception):
+    """ An exception raised when a request is shed to protect the others. """
+
+    def __init__(self, message: str, retry_after_s: int):
+        """ Keep the seconds the caller should wait before retrying. """
+        super().__init__(message)
+        self.retry_after_s = retry_after_s
+
+
+class _Waiter:
+    def __init__(self, caller: str):
+        self.caller = caller
+        self.evicted = False
+        # Set when the request is admitted or pushed out of the queue
+        self.done = threading.Event()
+
+
+class AdmissionController:
+    """
+    A class to bound concurrent requests with weighted fair queuing.
+
+    At most ``max_concurrency`` requests run at once. Others wait in a queue
+    of at most ``max_queue`` requests, which is served by weighted fair
+    queuing: each request gets a virtual finish time that grows by
+    ``1 / weight`` per queued request of its caller, and the request with
+    the earliest finish time runs next. A caller sending a burst thus waits
+    behind its own requests, while a caller with a single request is served
+    after at most one request of every other caller. A caller has weight 1
+    unless ``weights`` gives it another one.
+
+    A request is shed with ``Overloaded`` when it waited ``max_wait_s``
+    seconds, which bounds the latency of the admitted requests during
+    bursts. When the queue is full, the request with the latest finish time
+    is shed, so a burst cannot lock other callers out of a full queue.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int = 64,
+        max_wait_s: float = 5.0,
+        weights: Optional[Dict[str, float]] = None
+    ):
+        """ Validate the limits and start with an empty queue. """
+        if max_concurrency <= 0 or max_queue < 0 or max_wait_s < 0:
+            raise ValueError(
+                "max_concurrency must be positive and max_queue and "
+                "max_wait_s must not be negative"
+            )
+        if any(weight <= 0 for weight in (weights or {}).values()):
+            raise ValueError("Caller weights must be positive")
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait_s = max_wait_s
+        self.weights = dict(weights or {})
+        self._lock = threading.Lock()
+        self._running = 0
+        self._queue: List[Tuple[float, int, _Waiter]] = []
+        self._order = itertools.count()
+        self._virtual_time = 0.0
+        self._last_finish: Dict[str, float] = {}
+        self._service_s: Optional[float] = None
+        self._admitted = 0
+        self._shed = 0
+        self._max_depth = 0
+        self._wait_s = 0.0
+
+    def acquire(self, caller: str) -> float:
+        """
+        Wait until the request of ``caller`` may run.
+
+        The wait is also bounded by the request deadline. Every successful
+        call must be followed by one call of ``release()``.
+
+        Returns:
+            float: The seconds the request waited in the queue
+
+        Raises:
+            Overloaded: If the queue is full or the request waited too long
+            DeadlineExceeded: If the request deadline passed in the queue
+        """
+        start = time.monotonic()
+        with self._lock:
+            if self._running < self.max_concurrency and not self._queue:
+                self._running += 1
+                self._admitted += 1
+                return 0.0
+            finish = max(self._virtual_time, self._last_finish.get(caller, 0.0))
+            finish += 1.0 / self.weights.get(caller, 1.0)
+            if len(self._queue) >= self.max_queue:
+                latest = max(self._queue, default=None)
+                if latest is None or latest[0] <= finish:
+                    self._shed += 1
+                    raise Overloaded("Admission queue is full", self._retry_after())
+                # Push out the request of the caller furthest ahead instead
+                self._queue.remove(latest)
+                heapq.heapify(self._queue)
+                self._shed += 1
+                latest[2].evicted = True
+                latest[2].done.set()
+            self._last_finish[caller] = finish
+            waiter = _Waiter(caller)
+            heapq.heappush(self._queue, (finish, next(self._order), waiter))
+            self._max_depth = max(self._max_depth, len(self._queue))
+
+        left = remaining()
+        timeout = self.max_wait_s if left is None else max(min(self.max_wait_s, left), 0.0)
+        waiter.done.wait(timeout)
+        with self._lock:
+            waited = time.monotonic() - start
+            if waiter.evicted:
+                raise Overloaded("Pushed out of the admission queue", self._retry_after())
+            # A request admitted just as its wait timed out keeps its slot
+            if waiter.done.is_set():
+                self._wait_s += waited
+                return waited
+            self._queue = [entry for entry in self._queue if entry[2] is not waiter]
+            heapq.heapify(self._queue)
+            self._shed += 1
+            retry_after_s = self._retry_after()
+        if left is not None and left <= self.max_wait_s:
+            raise DeadlineExceeded("Request deadline exceeded in the admission queue")
+        raise Overloaded(
+            f"Queued for more than {self.max_wait_s:g}s", retry_after_s
+        )
+
+    def release(self, service_s: Optional[float] = None) -> None:
+        """ Hand the slot of a finished request, which ran ``service_s`` seconds, to the next one. """
+        with self._lock:
+            if service_s is not None:
+                self._service_s = service_s if self._service_s is None else (
+                    _SERVICE_SMOOTHING * service_s
+                    + (1 - _SERVICE_SMOOTHING) * self._service_s
+                )
+            if not self._queue:
+                self._running -= 1
+                # Without a backlog every caller starts over on equal terms
+                self._last_finish.clear()
+                return
+            finish, _, waiter = heapq.heappop(self._queue)
+            self._virtual_time = finish
+            self._admitted += 1
+            waiter.done.set()
+
+    @contextlib.contextmanager
+    def admit(self, caller: str) -> Iterator[float]:
+        """
+        Run the block once the request of ``caller`` is admitted.
+
+        Yields:
+            float: The seconds the request waited in the queue
+        """
+        waited = self.acquire(caller)
+        start = time.monotonic()
+        try:
+            yield waited
+        finally:
+            self.release(time.monotonic() - start)
+
+    def _retry_after(self) -> int:
+        # The time the queue ahead needs to drain, at least one second
+        service_s = self._service_s if self._service_s is not None else self.max_wait_s
+        backlog = (len(self._queue) + 1) / self.max_concurrency
+        return max(1, math.ceil(service_s * backlog))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the queue depth, shed rate and other counters of the controller.
+
+        Returns:
+            dict: ``in_flight`` and ``queue_depth`` now, the largest queue
+                depth, the admitted and shed request counts, the share of
+                shed requests and the mean queue wait in milliseconds
+        """
+        with self._lock:
+            total = self._admitted + self._shed
+            return {
+                "in_flight": self._running,
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self._max_depth,
+                "admitted": self._admitted,
+                "shed": self._shed,
+                "shed_rate": self._shed / total if total else 0.0,
+                "mean_wait_ms": 1000 * self._wait_s / self._admitted if self._admitted else 0.0,
+            }
+
+
+def caller_id(headers: Mapping[str, str], params: Optional[Mapping[str, str]] = None) -> str:
+    """
+    Identify the caller of a request.
+
+    The function key identifies callers best, because the Functions host
+    checks it, so it is used when present, as ``key:`` and a hash of the
+    key. Otherwise the ``x-caller-id`` header names the caller. Requests
+    with neither come from ``anonymous``.
+    """
+    key = headers.get(KEY_HEADER) or (params or {}).get(KEY_PARAM)
+    if key:
+        return "key:" + hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
+    return headers.get(CALLER_HEADER) or "anonymous"
+
+
+def parse_weights(value: str) -> Dict[str, float]:
+    """
+    Parse caller weights written as ``caller=weight`` pairs separated by commas.
+
+    Raises:
+        ValueError: If a pair is malformed
+    """
+    weights = {}
+    for pair in filter(None, (part.strip() for part in value.split(","))):
+        caller, separator, weight = pair.rpartition("=")
+        if not separator or not caller:
+            raise ValueError(f"Invalid caller weight '{pair}', expected caller=weight")
+        weights[caller.strip()] = float(weight)
+    return weights
+
+
+_CONTROLLER_LOCK = threading.Lock()
+_CONTROLLER: Optional[AdmissionController] = None
+_SETTINGS: Optional[tuple] = None
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """
+    Return the process-wide admission controller, or None when it is disabled.
+
+    The controller is enabled by a positive ADMISSION_MAX_CONCURRENCY. The
+    queue size, the longest wait and the caller weights are read from
+    ADMISSION_MAX_QUEUE, ADMISSION_MAX_WAIT_S and ADMISSION_WEIGHTS.
+    """
+    global _CONTROLLER, _SETTINGS
+    max_concurrency = int(os.environ.get(MAX_CONCURRENCY_ENV_VAR, "0"))
+    if max_concurrency <= 0:
+        return None
+    settings = (
+        max_concurrency,
+        int(os.environ.get(MAX_QUEUE_ENV_VAR, "64")),
+        float(os.environ.get(MAX_WAIT_ENV_VAR, "5")),
+        os.environ.get(WEIGHTS_ENV_VAR, ""),
+    )
+    with _CONTROLLER_LOCK:
+        if _CONTROLLER is None or settings != _SETTINGS:
+            _CONTROLLER = AdmissionController(
+                max_concurrency=settings[0],
+                max_queue=settings[1],
+                max_wait_s=settings[2],
+                weights=parse_weights(settings[3])
+            )
+            _SETTINGS = settings
+        return _CONTROLLER
+
+
+@contextlib.contextmanager
+def admitted(
+    headers: Mapping[str, str], params: Optional[Mapping[str, str]] = None
+) -> Iterator[None]:
+    """
+    Run the block once the process-wide controller admits the request.
+
+    Does nothing when admission control is disabled. An ``admission`` span
+    records the caller, the queue wait, the queue depth and the shed rate.
+
+    Raises:
+        Overloaded: If the request is shed
+        DeadlineExceeded: If the request deadline passed in the queue
+    """
+    controller = get_admission_controller()
+    if controller is None:
+        yield
+        return
+
+    caller = caller_id(headers, params)
+    with get_tracer().start_as_current_span("admission") as span:
+        span.set_attribute("caller", caller)
+        try:
+            waited = controller.acquire(caller)
+        finally:
+            stats = controller.stats()
+            span.set_attribute("queue_depth", stats["queue_depth"])
+            span.set_attribute("shed_rate", stats["shed_rate"])
+        span.set_attribute("queue_wait_ms", waited * 1000)
+
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        controller.release(time.monotonic() - start)
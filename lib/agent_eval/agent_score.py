@@ -4,12 +4,80 @@ based on the messages exchanged between the user and the assistant.
 The class is made callable by implementing the special method
 __call__. The class has four methods that validate the count of
 dictionaries, assistant messages, user messages, and the time
-difference between messages. The __call__ method calculates the
-total score based on the results of the four validation methods and
-returns the agent's score as a percentage.
+difference between messages. The __call__ method computes the same four
+checks from the summary precomputed by the agent flow, or from a single
+pass over the full_output messages, and returns the agent's score as a
+percentage; evaluate_batch scores many runs at once. JSON is parsed with
+orjson when it is installed.
 """
 import json
-from typing import List, Dict, Any
+from itertools import repeat
+from typing import List, Dict, Any, Optional, Sequence, Union
+
+import numpy as np
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+
+def summarize_messages(messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Collect all statistics the evaluator needs in one pass over the messages.
+
+    Returns the total message count, the assistant and user message counts
+    (using the same rules as the validate methods) and the earliest and latest
+    created_at timestamps.
+    """
+    assistant_count = 0
+    user_count = 0
+    created_at = []
+    append_created_at = created_at.append
+    for msg in messages:
+        role = msg.get('role')
+        if role == "assistant":
+            if msg.get('assistant_id') is not None:
+                assistant_count += 1
+        elif role == "user":
+            if msg.get('assistant_id') is None:
+                user_count += 1
+
+        timestamp = msg.get('created_at')
+        if timestamp is not None:
+            append_created_at(timestamp)
+
+    # The time check only needs timestamps when there are two messages or more
+    if len(created_at) < len(messages) and len(messages) >= 2:
+        raise KeyError('created_at')
+    timestamps = list(map(int, created_at))
+
+    return {
+        "total_message_count": len(messages),
+        "assistant_message_count": assistant_count,
+        "user_message_count": user_count,
+        "min_created_at": min(timestamps) if timestamps else None,
+        "max_created_at": max(timestamps) if timestamps else None,
+    }
+
+
+def load_summary(full_output: Optional[str] = None,
+                 summary: Optional[Union[str, Dict[str, Any]]] = None
+                 ) -> Dict[str, Any]:
+    """
+    Return the message summary of an agent run.
+
+    A summary precomputed by the flow (as a dict or JSON string) is used as
+    is; otherwise the full_output transcript is parsed and summarized.
+    """
+    if summary:
+        if isinstance(summary, (str, bytes)):
+            return _json_loads(summary)
+        return summary
+    if full_output is None:
+        raise ValueError("AgentEvaluator needs a summary or a full_output")
+    return summarize_messages(_json_loads(full_output))
 
 
 class AgentEvaluator:
@@ -20,42 +88,98 @@ class AgentEvaluator:
     # A class is made a callable my implementing the special method __call__
     def __call__(self,
                  *,
-                 full_output: str,
                  total_message_count: str,
                  total_user_message_count: str,
                  total_assistant_message_count: str,
                  time_difference: str,
+                 full_output: Optional[str] = None,
+                 summary: Optional[Union[str, Dict[str, Any]]] = None,
                  **kwargs
                  ):
 
-        full_output = json.loads(full_output)
-
-        total_count = self.validate_dictionary_count(
-            full_output,
-            int(total_message_count)
+        score = self.score_summary(
+            load_summary(full_output, summary),
+            int(total_message_count),
+            int(total_user_message_count),
+            int(total_assistant_message_count),
+            int(time_difference)
         )
+        return {"agent_score": score}
 
-        assistant_count = self.validate_assistant_messages_count(
-            full_output,
-            int(total_assistant_message_count)
-        )
+    def evaluate_batch(self, columns: Dict[str, Sequence]) -> Dict[str, np.ndarray]:
+        """
+        Score many agent runs at once.
 
-        user_count = self.validate_user_messages_count(
-            full_output,
-            int(total_user_message_count)
+        Each row's summary (or, without one, its full_output transcript) is
+        loaded once, then the four checks run as array comparisons over all
+        rows.
+        """
+        row_count = len(columns["total_message_count"])
+        summaries = [
+            load_summary(full_output, summary)
+            for full_output, summary in zip(
+                columns.get("full_output", repeat(None, row_count)),
+                columns.get("summary", repeat(None, row_count))
+            )
+        ]
+        totals = np.fromiter(
+            (s["total_message_count"] for s in summaries), dtype=np.int64,
+            count=len(summaries)
+        )
+        assistants = np.fromiter(
+            (s["assistant_message_count"] for s in summaries), dtype=np.int64,
+            count=len(summaries)
+        )
+        users = np.fromiter(
+            (s["user_message_count"] for s in summaries), dtype=np.int64,
+            count=len(summaries)
+        )
+        spans = np.fromiter(
+            (s["max_created_at"] - s["min_created_at"]
+             if s["total_message_count"] >= 2 else 0 for s in summaries),
+            dtype=np.int64, count=len(summaries)
         )
 
-        time_diff = self.validate_time_difference(
-            full_output,
-            int(time_difference)
+        def expected(name):
+            return np.asarray(columns[name]).astype(np.int64)
+
+        total_score = (
+            (totals == expected("total_message_count")).astype(np.int64)
+            + (assistants == expected("total_assistant_message_count"))
+            + (users == expected("total_user_message_count"))
+            + (spans <= expected("time_difference"))
+        )
+        # Calculate percentage (4 is the maximum possible score)
+        return {"agent_score": (total_score * 100) // 4}
+
+    @staticmethod
+    def score_summary(summary: Dict[str, Any],
+                      expected_count: int,
+                      expected_user_count: int,
+                      expected_assistant_count: int,
+                      max_time_diff: int) -> int:
+        """
+        Score a message summary produced by summarize_messages
+        Returns the agent's score as a percentage
+        """
+        total_count = 1 if summary["total_message_count"] == expected_count else 0
+        assistant_count = (
+            1 if summary["assistant_message_count"] == expected_assistant_count
+            else 0
         )
+        user_count = 1 if summary["user_message_count"] == expected_user_count else 0
+        if summary["total_message_count"] < 2:
+            time_diff = 1  # If there's only one or no messages, consider it valid
+        else:
+            max_diff = summary["max_created_at"] - summary["min_created_at"]
+            time_diff = 1 if max_diff <= max_time_diff else 0
 
         total_score = total_count + assistant_count + user_count + time_diff
 
         # Calculate percentage (4 is the maximum possible score)
         percentage = (total_score / 4) * 100
 
-        return {"agent_score": int(percentage)}
+        return int(percentage)
 
     def validate_dictionary_count(self, messages: Any, expected_count: int) -> int:
         """
@@ -1,4 +1,7 @@
 """ A module to evaluate the length of the answer. """
+from typing import Dict, Sequence
+
+import numpy as np
 
 
 class AnswerLengthEvaluator:
@@ -6,6 +9,18 @@ class AnswerLengthEvaluator:
     def __init__(self):
         pass
 
-    # A class is made a callable my implementing the special method __call__
+    # A class is made a callable by implementing the special method __call__
     def __call__(self, *, response: str, **kwargs):
         return {"answer_length": len(str(response))}
+
+    def evaluate_batch(self, columns: Dict[str, Sequence]) -> Dict[str, np.ndarray]:
+        """
+        Compute the answer length of a whole response column at once.
+
+        Only llmops.local_eval and sweep runs call this. The eval_run_eval
+        scripts use azure-ai-evaluation, which scores rows with __call__.
+        """
+        responses = columns["response"]
+        return {"answer_length": np.fromiter(
+            map(len, map(str, responses)), dtype=np.int64, count=len(responses)
+        )}
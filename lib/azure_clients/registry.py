@@ -0,0 +1,192 @@
+""" A module to share Azure credentials and project clients across a process. """
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from azure.core.credentials import AccessToken, TokenCredential
+
+logger = logging.getLogger(__name__)
+
+# Environment variable with the connection string of the AI Foundry project
+CONNECTION_STRING_ENV_VAR = "CONNECTION_STRING"
+
+# Tokens are renewed when they expire within this many seconds
+DEFAULT_REFRESH_AHEAD_S = 300
+
+
+class CachingCredential:
+    """
+    A class to cache the tokens of a credential and renew them ahead of expiry.
+
+    Tokens are cached per scopes, claims and tenant. A token expiring within
+    ``refresh_ahead_s`` is renewed on the next request, and the cached token
+    is still returned if the renewal fails while it is valid. Concurrent
+    requests for the same token make a single call to the credential.
+    """
+
+    def __init__(
+        self,
+        credential: TokenCredential,
+        refresh_ahead_s: float = DEFAULT_REFRESH_AHEAD_S
+    ):
+        self.credential = credential
+        self.refresh_ahead_s = refresh_ahead_s
+        self.requests = 0
+        self._tokens: Dict[Tuple, AccessToken] = {}
+        self._lock = threading.Lock()
+
+    def get_token(
+        self,
+        *scopes: str,
+        claims: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+        **kwargs: Any
+    ) -> AccessToken:
+        """ Return a cached token, requesting a new one when it expires soon. """
+        key = (scopes, claims, tenant_id)
+        token = self._tokens.get(key)
+        if token is not None and not self._expires_soon(token):
+            return token
+        with self._lock:
+            token = self._tokens.get(key)
+            if token is not None and not self._expires_soon(token):
+                return token
+            try:
+                self.requests += 1
+                token = self.credential.get_token(
+                    *scopes, claims=claims, tenant_id=tenant_id, **kwargs
+                )
+            except Exception:
+                cached = self._tokens.get(key)
+                if cached is not None and cached.expires_on > time.time():
+                    logger.warning("Token renewal failed, using the cached token")
+                    return cached
+                raise
+            self._tokens[key] = token
+            return token
+
+    def _expires_soon(self, token: AccessToken) -> bool:
+        return token.expires_on - time.time() <= self.refresh_ahead_s
+
+    def close(self) -> None:
+        """ Close the wrapped credential. """
+        close = getattr(self.credential, "close", None)
+        if close is not None:
+            close()
+
+
+def _default_credential() -> TokenCredential:
+    from azure.identity import DefaultAzureCredential
+
+    return DefaultAzureCredential()
+
+
+def _project_client(conn_str: str, credential: TokenCredential) -> Any:
+    from azure.ai.projects import AIProjectClient
+
+    return AIProjectClient.from_connection_string(
+        conn_str=conn_str, credential=credential
+    )
+
+
+class ClientRegistry:
+    """
+    A class to hand out one credential and one project client per connection string.
+
+    The credential chain is probed once and its tokens are cached, instead
+    of once per client. Pass ``credential`` to use another credential, such
+    as a local fake in tests, and ``client_factory`` to build clients from a
+    connection string and a credential some other way.
+    """
+
+    def __init__(
+        self,
+        credential: Optional[TokenCredential] = None,
+        client_factory: Callable[[str, TokenCredential], Any] = _project_client,
+        refresh_ahead_s: float = DEFAULT_REFRESH_AHEAD_S
+    ):
+        self._credential = (
+            CachingCredential(credential, refresh_ahead_s)
+            if credential is not None else None
+        )
+        self._client_factory = client_factory
+        self._refresh_ahead_s = refresh_ahead_s
+        self._clients: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def credential(self) -> CachingCredential:
+        """ Return the shared credential, DefaultAzureCredential by default. """
+        with self._lock:
+            if self._credential is None:
+                self._credential = CachingCredential(
+                    _default_credential(), self._refresh_ahead_s
+                )
+            return self._credential
+
+    def project_client(self, conn_str: Optional[str] = None) -> Any:
+        """
+        Return the project client of a connection string, created once.
+
+        Args:
+            conn_str: Connection string of the project, CONNECTION_STRING by
+                default
+
+        Returns:
+            AIProjectClient: A client sharing the registry credential
+        """
+        conn_str = conn_str or os.environ[CONNECTION_STRING_ENV_VAR]
+        client = self._clients.get(conn_str)
+        if client is not None:
+            return client
+        credential = self.credential()
+        with self._lock:
+            client = self._clients.get(conn_str)
+            if client is None:
+                client = self._clients[conn_str] = self._client_factory(
+                    conn_str, credential
+                )
+            return client
+
+    def close(self) -> None:
+        """ Close every client and the credential, and forget them. """
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+            credential, self._credential = self._credential, None
+        for client in clients:
+            close = getattr(client, "close", None)
+            if close is not None:
+                close()
+        if credential is not None:
+            credential.close()
+
+
+_REGISTRY = ClientRegistry()
+
+
+def get_registry() -> ClientRegistry:
+    """ Return the process-wide client registry. """
+    return _REGISTRY
+
+
+def set_registry(registry: ClientRegistry) -> ClientRegistry:
+    """
+    Replace the process-wide client registry, for example in tests.
+
+    Returns:
+        ClientRegistry: The previous registry, to restore it afterwards
+    """
+    global _REGISTRY
+    previous, _REGISTRY = _REGISTRY, registry
+    return previous
+
+
+def get_credential() -> CachingCredential:
+    """ Return the shared credential of the process-wide registry. """
+    return _REGISTRY.credential()
+
+
+def get_project_client(conn_str: Optional[str] = None) -> Any:
+    """ Return the shared project client of a connection string. """
+    return _REGISTRY.project_client(conn_str)
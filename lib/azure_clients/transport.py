@@ -0,0 +1,101 @@
+""" A module to share one pooled HTTP transport between Azure SDK clients. """
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+import requests
+from azure.core.pipeline.transport import RequestsTransport
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Environment variables configuring the shared transport
+POOL_SIZE_ENV_VAR = "HTTP_POOL_SIZE"
+KEEP_ALIVE_ENV_VAR = "HTTP_KEEP_ALIVE"
+CONNECT_TIMEOUT_ENV_VAR = "HTTP_CONNECT_TIMEOUT_S"
+READ_TIMEOUT_ENV_VAR = "HTTP_READ_TIMEOUT_S"
+
+
+@dataclass(frozen=True)
+class TransportSettings:
+    """
+    A class to hold the connection pool and timeout settings of a transport.
+
+    ``pool_size`` is the number of connections kept open per host, so set it
+    to at least the number of concurrent requests. Without ``keep_alive``
+    every request asks the server to close its connection, which is only
+    useful to measure the cost of new connections.
+    """
+
+    pool_size: int = 32
+    keep_alive: bool = True
+    connect_timeout_s: float = 10.0
+    read_timeout_s: float = 120.0
+
+    @classmethod
+    def from_env(cls) -> "TransportSettings":
+        """ Read the settings from the HTTP_* environment variables. """
+        defaults = cls()
+        return cls(
+            pool_size=int(os.environ.get(POOL_SIZE_ENV_VAR, defaults.pool_size)),
+            keep_alive=os.environ.get(KEEP_ALIVE_ENV_VAR, "true").lower()
+            not in ("0", "false", "no"),
+            connect_timeout_s=float(
+                os.environ.get(CONNECT_TIMEOUT_ENV_VAR, defaults.connect_timeout_s)
+            ),
+            read_timeout_s=float(
+                os.environ.get(READ_TIMEOUT_ENV_VAR, defaults.read_timeout_s)
+            ),
+        )
+
+
+def build_session(settings: TransportSettings) -> requests.Session:
+    """
+    Build a requests session with a connection pool of ``settings.pool_size``.
+
+    Retries stay off in the session, because the Azure SDK pipeline retries.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=settings.pool_size,
+        max_retries=Retry(total=False, redirect=False, raise_on_status=False),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if not settings.keep_alive:
+        session.headers["Connection"] = "close"
+    return session
+
+
+def build_transport(settings: TransportSettings) -> RequestsTransport:
+    """ Build a transport over a pooled session that clients cannot close. """
+    return RequestsTransport(
+        session=build_session(settings),
+        session_owner=False,
+        connection_timeout=settings.connect_timeout_s,
+        read_timeout=settings.read_timeout_s,
+    )
+
+
+_LOCK = threading.Lock()
+_TRANSPORT: Optional[RequestsTransport] = None
+_SETTINGS: Optional[TransportSettings] = None
+
+
+def shared_transport(settings: Optional[TransportSettings] = None) -> RequestsTransport:
+    """
+    Return the process-wide transport, created once per settings.
+
+    Pass it as the ``transport`` keyword of Azure SDK clients so their
+    requests reuse open connections, and their TLS sessions, instead of
+    connecting again for every client. The settings default to the HTTP_*
+    environment variables.
+    """
+    global _TRANSPORT, _SETTINGS
+    settings = settings or TransportSettings.from_env()
+    with _LOCK:
+        if _TRANSPORT is None or settings != _SETTINGS:
+            # Clients may still use the previous transport, so it is not closed
+            _TRANSPORT, _SETTINGS = build_transport(settings), settings
+        return _TRANSPORT
@@ -0,0 +1,160 @@
+""" A module to answer plain arithmetic questions without calling an LLM. """
+import ast
+import operator
+import os
+import re
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+# Environment variable turning the fast path of the flows on
+FAST_PATH_ENV_VAR = "ARITHMETIC_FAST_PATH"
+
+# Exponents above this could make a single question take minutes
+MAX_EXPONENT = 100
+
+Number = Union[int, float]
+
+_BINARY_OPERATORS: Dict[type, Callable[[Number, Number], Number]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+_UNARY_OPERATORS: Dict[type, Callable[[Number], Number]] = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+_NUMBER = r"(-?\d+(?:\.\d+)?)"
+_PREFIX_PATTERN = re.compile(
+    r"^(?:what is|what's|calculate|compute|evaluate|find|solve)\s+(?:the value of\s+)?"
+)
+# Phrasings with their expression, operands in the order they are matched.
+# Operands are parenthesized, so "the square of -3" is (-3) ** 2.
+_PHRASES: List[Tuple[re.Pattern, str]] = [
+    (re.compile(pattern.format(n=_NUMBER)), expression)
+    for pattern, expression in [
+        (r"^(?:the )?sum of {n} and {n}$", "({0}) + ({1})"),
+        (r"^add {n} (?:and|to) {n}$", "({0}) + ({1})"),
+        (r"^(?:the )?difference between {n} and {n}$", "({0}) - ({1})"),
+        (r"^subtract {n} from {n}$", "({1}) - ({0})"),
+        (r"^(?:the )?product of {n} and {n}$", "({0}) * ({1})"),
+        (r"^multiply {n} (?:by|and) {n}$", "({0}) * ({1})"),
+        (r"^(?:the )?quotient of {n} (?:and|by) {n}$", "({0}) / ({1})"),
+        (r"^divide {n} by {n}$", "({0}) / ({1})"),
+        (r"^(?:the )?remainder (?:when|of) {n} (?:is )?divided by {n}$", "({0}) % ({1})"),
+        (r"^(?:the )?square root of {n}$", "({0}) ** 0.5"),
+        (r"^(?:the )?square of {n}$", "({0}) ** 2"),
+        (r"^(?:the )?cube of {n}$", "({0}) ** 3"),
+        (r"^{n}(?: percent|%) of {n}$", "({0}) * ({1}) / 100"),
+    ]
+]
+# Operator words that can be swapped for a symbol anywhere in an expression
+_OPERATOR_WORDS = [
+    (re.compile(r"\bto the power of\b"), "**"),
+    (re.compile(r"\bdivided by\b"), "/"),
+    (re.compile(r"\b(?:multiplied by|times)\b"), "*"),
+    (re.compile(r"\bplus\b"), "+"),
+    (re.compile(r"\bminus\b"), "-"),
+    (re.compile(r"\bsquared\b"), "** 2"),
+    (re.compile(r"\bcubed\b"), "** 3"),
+    (re.compile(r"\^"), "**"),
+]
+_EXPRESSION_PATTERN = re.compile(r"^[\d\s.+\-*/%()]+$")
+
+
+def safe_eval(expression: str) -> Number:
+    """
+    Evaluate an arithmetic expression of numbers and operators.
+
+    Only numbers, ``+ - * / // % **`` and parentheses are allowed, so no
+    names, calls or attributes can ever run.
+
+    Raises:
+        ValueError: If the expression is not plain arithmetic, is ambiguous
+            like ``-3 ** 2``, has a complex result or its exponent exceeds
+            MAX_EXPONENT
+        ZeroDivisionError: If the expression divides by zero
+    """
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Not an arithmetic expression: {expression}") from e
+    return _evaluate(tree.body)
+
+
+def _evaluate(node: ast.AST) -> Number:
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        operand = node.operand
+        if (isinstance(operand, ast.BinOp) and isinstance(operand.op, ast.Pow)
+                and isinstance(operand.left, ast.Constant)):
+            # Python reads -3 ** 2 as -(3 ** 2), people often mean (-3) ** 2
+            raise ValueError("Ambiguous sign of a power, parenthesize the base")
+        return _UNARY_OPERATORS[type(node.op)](_evaluate(node.operand))
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        left, right = _evaluate(node.left), _evaluate(node.right)
+        if isinstance(node.op, ast.Pow) and abs(right) > MAX_EXPONENT:
+            raise ValueError(f"Exponent {right} is larger than {MAX_EXPONENT}")
+        result = _BINARY_OPERATORS[type(node.op)](left, right)
+        if isinstance(result, complex):
+            raise ValueError("Complex results are not supported")
+        return result
+    raise ValueError(f"Unsupported arithmetic: {ast.dump(node)}")
+
+
+def format_number(value: Number) -> str:
+    """ Format a result like print() would, but integral floats without ``.0``. """
+    if isinstance(value, complex):
+        raise ValueError("Complex results are not supported")
+    if isinstance(value, float):
+        if value.is_integer() and abs(value) < 1e15:
+            return str(int(value))
+        return str(value)
+    return str(value)
+
+
+def to_expression(question: str) -> Optional[str]:
+    """ Return the arithmetic expression a question asks for, if it is one. """
+    text = " ".join(question.lower().split()).rstrip("?.!").strip()
+    text = _PREFIX_PATTERN.sub("", text)
+    for pattern, expression in _PHRASES:
+        match = pattern.match(text)
+        if match:
+            return expression.format(*match.groups())
+    for pattern, symbol in _OPERATOR_WORDS:
+        text = pattern.sub(f" {symbol} ", text)
+    if _EXPRESSION_PATTERN.match(text) and re.search(r"\d", text):
+        return " ".join(text.split())
+    return None
+
+
+def answer(question: str) -> Optional[str]:
+    """
+    Answer a plain arithmetic question locally.
+
+    Returns:
+        str: The answer as the flow would print it, or None when the question
+            is not plain arithmetic and needs the LLM
+    """
+    expression = to_expression(question)
+    if expression is None:
+        return None
+    try:
+        return format_number(safe_eval(expression))
+    except (ValueError, ZeroDivisionError, OverflowError):
+        return None
+
+
+def fast_path_enabled() -> bool:
+    """
+    Return whether ARITHMETIC_FAST_PATH turns the fast path on, off by default.
+
+    It is opt-in, because answered rows never reach the prompt and model,
+    which would skew experiments comparing prompty files, models or
+    temperatures.
+    """
+    return os.environ.get(FAST_PATH_ENV_VAR, "false").lower() in ("1", "true", "yes")
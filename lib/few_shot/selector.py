@@ -0,0 +1,177 @@
+""" A module to select the few-shot examples of a prompt with a BM25 index. """
+import functools
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
+
+# Environment variables configuring the selection of the flows
+BANK_ENV_VAR = "FEW_SHOT_FILE"
+K_ENV_VAR = "FEW_SHOT_K"
+BUDGET_ENV_VAR = "FEW_SHOT_TOKEN_BUDGET"
+
+DEFAULT_BANK_FILE = "few_shot_examples.jsonl"
+DEFAULT_K = 2
+DEFAULT_TOKEN_BUDGET = 250
+
+# Words, and the operator symbols that tell arithmetic questions apart
+_TOKEN_PATTERN = re.compile(r"[a-z]+|[+\-*/^%=]")
+_STOP_WORDS = frozenset({
+    "a", "an", "and", "are", "be", "by", "for", "if", "in", "is", "it", "of",
+    "the", "to", "what", "with",
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """ Split text into lowercase word and operator tokens, without numbers. """
+    return [
+        token for token in _TOKEN_PATTERN.findall(text.lower())
+        if token not in _STOP_WORDS
+    ]
+
+
+def estimate_tokens(text: str) -> int:
+    """ Estimate the LLM tokens of a text at four characters per token. """
+    return (len(text) + 3) // 4
+
+
+class BM25Index:
+    """
+    A class to rank documents against a query with Okapi BM25.
+
+    Postings are built once, so a query only visits the documents that
+    share at least one of its terms.
+    """
+
+    def __init__(self, documents: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.size = len(documents)
+        lengths = []
+        self._postings: Dict[str, List[tuple]] = {}
+        for doc_id, document in enumerate(documents):
+            terms = tokenize(document)
+            lengths.append(len(terms))
+            for term, count in Counter(terms).items():
+                self._postings.setdefault(term, []).append((doc_id, count))
+        average = (sum(lengths) / len(lengths)) if lengths else 0.0
+        self._norms = [
+            k1 * (1 - b + b * length / average) if average else k1
+            for length in lengths
+        ]
+        self._idf = {
+            term: math.log(1 + (self.size - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def scores(self, query: str) -> List[float]:
+        """ Return the BM25 score of every document for a query. """
+        scores = [0.0] * self.size
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, count in self._postings[term]:
+                scores[doc_id] += (
+                    idf * count * (self.k1 + 1) / (count + self._norms[doc_id])
+                )
+        return scores
+
+    def rank(self, query: str) -> List[int]:
+        """ Return document ids by descending score, ties in document order. """
+        scores = self.scores(query)
+        return sorted(range(self.size), key=lambda doc_id: -scores[doc_id])
+
+
+class FewShotSelector:
+    """
+    A class to pick the few-shot examples most relevant to a question.
+
+    Examples are dicts with a ``question`` and the Python ``code`` that
+    answers it. Up to ``k`` examples are selected by BM25 relevance while
+    their rendered size stays within ``token_budget``. Questions that match
+    no example get the first examples of the bank, so keep general examples
+    at the top.
+    """
+
+    def __init__(
+        self,
+        examples: Sequence[Dict[str, str]],
+        k: int = DEFAULT_K,
+        token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET
+    ):
+        self.examples = [self.render(example) for example in examples]
+        self.k = k
+        self.token_budget = token_budget
+        self._costs = [
+            estimate_tokens(example["question"] + example["code"])
+            for example in self.examples
+        ]
+        self._index = BM25Index([example["question"] for example in examples])
+
+    @staticmethod
+    def render(example: Dict[str, str]) -> Dict[str, str]:
+        """ Render an example the way the prompt shows it, code as a JSON reply. """
+        return {
+            "question": example["question"],
+            "code": json.dumps({"code": example["code"]}),
+        }
+
+    def select(self, question: str) -> List[Dict[str, str]]:
+        """ Return the rendered examples for a question, most relevant first. """
+        selected = []
+        remaining = self.token_budget
+        for doc_id in self._index.rank(question):
+            if len(selected) >= self.k:
+                break
+            cost = self._costs[doc_id]
+            if remaining is not None:
+                if cost > remaining:
+                    continue
+                remaining -= cost
+            selected.append(self.examples[doc_id])
+        return selected
+
+
+def load_examples(path: str) -> List[Dict[str, str]]:
+    """ Load a JSONL bank of examples with question and code fields. """
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+@functools.lru_cache(maxsize=16)
+def _cached_selector(
+    path: str,
+    signature: tuple,
+    k: int,
+    token_budget: Optional[int]
+) -> FewShotSelector:
+    return FewShotSelector(load_examples(path), k, token_budget)
+
+
+def get_selector(
+    path: Optional[str] = None,
+    k: Optional[int] = None,
+    token_budget: Optional[int] = None
+) -> FewShotSelector:
+    """
+    Return the selector of an example bank, built once per process.
+
+    The bank path, k and token budget default to FEW_SHOT_FILE, FEW_SHOT_K
+    and FEW_SHOT_TOKEN_BUDGET. A budget of 0 or less means no budget. The
+    index is rebuilt when the bank file changes.
+    """
+    path = os.path.abspath(path or os.environ.get(BANK_ENV_VAR, DEFAULT_BANK_FILE))
+    if k is None:
+        k = int(os.environ.get(K_ENV_VAR, DEFAULT_K))
+    if token_budget is None:
+        token_budget = int(os.environ.get(BUDGET_ENV_VAR, DEFAULT_TOKEN_BUDGET))
+    stat = os.stat(path)
+    return _cached_selector(
+        path,
+        (stat.st_size, stat.st_mtime_ns),
+        k,
+        token_budget if token_budget > 0 else None
+    )
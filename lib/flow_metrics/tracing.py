@@ -0,0 +1,150 @@
+""" A module to configure OpenTelemetry tracing of flows with a selectable exporter. """
+import json
+import os
+import threading
+from typing import Optional, Sequence
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SpanExporter,
+    SpanExportResult,
+)
+
+# Environment variables selecting the exporter and the JSONL file
+EXPORTER_ENV_VAR = "TRACE_EXPORTER"
+JSONL_PATH_ENV_VAR = "TRACE_JSONL_PATH"
+
+EXPORTERS = ("azure", "console", "jsonl", "none")
+DEFAULT_JSONL_PATH = "traces.jsonl"
+
+_LOCK = threading.Lock()
+_CONFIGURED_EXPORTER = None
+
+
+class JsonlSpanExporter(SpanExporter):
+    """
+    Export finished spans as one JSON object per line.
+
+    Each line holds the span name, trace and span ids, the parent span id,
+    the duration in milliseconds, the status and the span attributes, so
+    traces can be read offline without a collector.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def to_record(span: ReadableSpan) -> dict:
+        """ Convert a finished span to a JSON serializable record. """
+        context = span.get_span_context()
+        return {
+            "name": span.name,
+            "trace_id": format(context.trace_id, "032x"),
+            "span_id": format(context.span_id, "016x"),
+            "parent_id": (
+                format(span.parent.span_id, "016x") if span.parent else None
+            ),
+            "start_time_ns": span.start_time,
+            "duration_ms": (span.end_time - span.start_time) / 1e6,
+            "status": span.status.status_code.name,
+            "attributes": dict(span.attributes or {}),
+        }
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        """ Append the spans to the JSONL file. """
+        lines = "".join(
+            json.dumps(self.to_record(span), default=str) + "\n"
+            for span in spans
+        )
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        """ Nothing to release, the file is opened per export. """
+
+
+def selected_exporter(default: str = "none") -> str:
+    """
+    Return the exporter named by TRACE_EXPORTER, or the default.
+
+    Raises:
+        ValueError: If the exporter is not one of EXPORTERS
+    """
+    exporter = os.environ.get(EXPORTER_ENV_VAR, default).strip().lower()
+    if exporter not in EXPORTERS:
+        raise ValueError(
+            f"Unknown trace exporter '{exporter}', expected one of "
+            f"{', '.join(EXPORTERS)}"
+        )
+    return exporter
+
+
+def tracing_configured() -> bool:
+    """ Return whether configure_tracing has installed an exporter. """
+    return _CONFIGURED_EXPORTER is not None
+
+
+def configure_tracing(
+    exporter: str = "none",
+    connection_string: Optional[str] = None,
+    jsonl_path: Optional[str] = None
+) -> str:
+    """
+    Install the tracer provider for an exporter once per process.
+
+    Azure Monitor needs the azure-monitor-opentelemetry package and an
+    Application Insights connection string. The console and JSONL
+    exporters work offline; the JSONL path defaults to TRACE_JSONL_PATH.
+    Later calls are no-ops, since OpenTelemetry allows a single global
+    tracer provider.
+
+    Args:
+        exporter: One of "azure", "console", "jsonl" or "none"
+        connection_string: Application Insights connection string for "azure"
+        jsonl_path: File the "jsonl" exporter appends spans to
+
+    Returns:
+        str: The exporter in use
+    """
+    global _CONFIGURED_EXPORTER
+    with _LOCK:
+        if _CONFIGURED_EXPORTER is not None:
+            return _CONFIGURED_EXPORTER
+        if exporter == "azure":
+            from azure.monitor.opentelemetry import configure_azure_monitor
+            configure_azure_monitor(connection_string=connection_string)
+        elif exporter in ("console", "jsonl"):
+            if exporter == "console":
+                span_exporter = ConsoleSpanExporter()
+            else:
+                span_exporter = JsonlSpanExporter(
+                    jsonl_path
+                    or os.environ.get(JSONL_PATH_ENV_VAR, DEFAULT_JSONL_PATH)
+                )
+            provider = TracerProvider()
+            provider.add_span_processor(BatchSpanProcessor(span_exporter))
+            trace.set_tracer_provider(provider)
+        elif exporter != "none":
+            raise ValueError(f"Unknown trace exporter '{exporter}'")
+        _CONFIGURED_EXPORTER = exporter
+        return exporter
+
+
+def flush_tracing() -> None:
+    """ Export the spans still buffered by the tracer provider. """
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "force_flush"):
+        provider.force_flush()
+
+
+def get_tracer() -> trace.Tracer:
+    """ Return the tracer flows record their stage spans with. """
+    return trace.get_tracer("genaiops.flow")
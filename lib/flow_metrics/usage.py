@@ -0,0 +1,92 @@
+""" A module to capture the token usage and stage latencies of a flow call. """
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+from lib.flow_metrics.tracing import get_tracer
+
+# Output columns every flow reports alongside its response
+USAGE_COLUMNS = (
+    "prompt_tokens",
+    "completion_tokens",
+    "llm_latency_ms",
+    "refine_latency_ms",
+    "exec_latency_ms",
+    "retries",
+    "fast_path",
+)
+
+
+class AttemptCounter:
+    """
+    Count the HTTP attempts of one Azure SDK call.
+
+    Pass an instance as the ``raw_request_hook`` keyword of the call. The
+    hook runs after the retry policy, so it sees every attempt.
+    """
+
+    def __init__(self):
+        self.attempts = 0
+
+    def __call__(self, request: Any) -> None:
+        self.attempts += 1
+
+    @property
+    def retries(self) -> int:
+        """Number of attempts after the first one."""
+        return max(self.attempts - 1, 0)
+
+
+class StageTimer:
+    """ A class to time the stages of a flow call in milliseconds. """
+
+    def __init__(self):
+        self.durations_ms: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str, **attributes: Any) -> Iterator[Any]:
+        """
+        Time a stage, adding to its total if it runs more than once.
+
+        The stage is also recorded as a ``flow.<name>`` tracing span with the
+        given attributes, and the span is yielded to add more of them.
+        """
+        with get_tracer().start_as_current_span(
+            f"flow.{name}", attributes=attributes
+        ) as span:
+            start = time.perf_counter()
+            try:
+                yield span
+            finally:
+                elapsed = (time.perf_counter() - start) * 1000
+                self.durations_ms[name] = self.durations_ms.get(name, 0.0) + elapsed
+
+
+def usage_columns(
+    usage: Any = None,
+    timer: StageTimer = None,
+    retries: int = 0,
+    fast_path: bool = False
+) -> Dict[str, Any]:
+    """
+    Build the usage columns of a flow output.
+
+    Args:
+        usage: Completion or run usage with prompt_tokens and completion_tokens
+        timer: Timer with ``llm``, ``refine`` and ``exec`` stages
+        retries: Number of retried requests
+        fast_path: Whether the answer was computed without the LLM
+
+    Returns:
+        dict: A value for each of USAGE_COLUMNS
+    """
+    durations = timer.durations_ms if timer else {}
+    return {
+        "prompt_tokens": int(getattr(usage, "prompt_tokens", 0) or 0),
+        "completion_tokens": int(getattr(usage, "completion_tokens", 0) or 0),
+        "llm_latency_ms": round(durations.get("llm", 0.0), 3),
+        "refine_latency_ms": round(durations.get("refine", 0.0), 3),
+        "exec_latency_ms": round(durations.get("exec", 0.0), 3),
+        "retries": int(retries),
+        "fast_path": bool(fast_path),
+    }
@@ -0,0 +1,134 @@
+""" A module to cache flow answers of questions that differ only trivially. """
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable, Optional, Tuple
+
+# Environment variables configuring the cache of the flows
+SIZE_ENV_VAR = "QUESTION_CACHE_SIZE"
+VERIFY_ENV_VAR = "QUESTION_CACHE_VERIFY"
+
+_NUMBER_PATTERN = re.compile(r"-?\d[\d,]*(?:\.\d+)?|-?\.\d+")
+# Words, number placeholders and operators; everything else is dropped
+_TOKEN_PATTERN = re.compile(r"[^\W_]+|#|[+\-*/^%=()<>]")
+_NUMBER_TOKEN = "#"
+
+
+def _canonical_number(text: str) -> str:
+    text = text.replace(",", "")
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    if text in ("", "-", "-0"):
+        return "0"
+    return text
+
+
+def canonicalize(question: str) -> Tuple[str, Tuple[str, ...]]:
+    """
+    Split a question into canonical text and the numbers it contains.
+
+    The text is the lowercased words and operators of the question
+    separated by single spaces, with numbers replaced by ``#``, so casing,
+    spacing, punctuation and number formatting never matter. Numbers are
+    normalized, so ``1,000.50`` becomes ``1000.5``.
+    """
+    text = unicodedata.normalize("NFKC", question).lower().strip()
+    numbers = tuple(
+        _canonical_number(match) for match in _NUMBER_PATTERN.findall(text)
+    )
+    text = _NUMBER_PATTERN.sub(_NUMBER_TOKEN, text)
+    return " ".join(_TOKEN_PATTERN.findall(text)), numbers
+
+
+@dataclass
+class CachedAnswer:
+    """ A class to hold the cached code and response of a question. """
+
+    question: str
+    code: str
+    response: str
+
+
+class NearDuplicateCache:
+    """
+    A class to find cached answers of questions that differ only trivially.
+
+    Questions are canonicalized first, and a cached answer is only returned
+    for a question with exactly the same words, operators and numbers. Casing,
+    spacing, punctuation and number formatting are the only differences
+    allowed, because a single added or changed word, such as "not" or
+    "exclusive", can change the answer. The cache keeps at most
+    ``max_entries`` answers and evicts the least recently used one. Answers
+    are kept per ``namespace``, such as the prompty file and model that
+    produced them.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, CachedAnswer]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(question: str, namespace: Hashable) -> Tuple:
+        return (namespace, *canonicalize(question))
+
+    def get(self, question: str, namespace: Hashable = None) -> Optional[CachedAnswer]:
+        """ Return the answer of the same question up to trivial differences, if cached. """
+        key = self._key(question, namespace)
+        with self._lock:
+            answer = self._entries.get(key)
+            if answer is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return answer
+
+    def put(
+        self, question: str, code: str, response: str, namespace: Hashable = None
+    ) -> None:
+        """ Cache the answer of a question, evicting the least recently used. """
+        key = self._key(question, namespace)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = CachedAnswer(question, code, response)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, question: str, namespace: Hashable = None) -> None:
+        """ Remove the cached answer of a question, for example a stale one. """
+        with self._lock:
+            self._entries.pop(self._key(question, namespace), None)
+
+
+_CACHE_LOCK = threading.Lock()
+_CACHE: Optional[NearDuplicateCache] = None
+
+
+def get_question_cache() -> Optional[NearDuplicateCache]:
+    """
+    Return the process-wide question cache, or None when it is disabled.
+
+    The cache is enabled by a positive QUESTION_CACHE_SIZE.
+    """
+    global _CACHE
+    size = int(os.environ.get(SIZE_ENV_VAR, "0"))
+    if size <= 0:
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None or _CACHE.max_entries != size:
+            _CACHE = NearDuplicateCache(max_entries=size)
+        return _CACHE
+
+
+def verify_enabled() -> bool:
+    """ Return whether QUESTION_CACHE_VERIFY asks to re-run cached code. """
+    return os.environ.get(VERIFY_ENV_VAR, "").lower() in ("1", "true", "yes")
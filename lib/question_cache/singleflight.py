@@ -0,0 +1,88 @@
+""" A module to share one in-flight computation between identical requests. """
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# Environment variable with the seconds a request waits for a shared call
+TIMEOUT_ENV_VAR = "COALESCE_TIMEOUT_S"
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    A class to coalesce concurrent calls that have the same key.
+
+    The first caller of a key runs the function, and callers arriving while
+    it runs wait for it and receive the same result or exception. Nothing is
+    kept once the call completes, so a failed call is retried by the next
+    caller. Pair it with a cache to serve later callers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(
+        self,
+        key: Hashable,
+        function: Callable[[], Any],
+        timeout: Optional[float] = None
+    ) -> Tuple[Any, bool]:
+        """
+        Run ``function`` once for all concurrent callers of ``key``.
+
+        Args:
+            key: Key identifying identical calls
+            function: Function without arguments computing the result
+            timeout: Seconds a waiting caller waits for the running call,
+                None to wait until it completes. The running call itself is
+                not interrupted, so bound it with its own timeout.
+
+        Returns:
+            tuple: The result and whether it came from another caller's call
+
+        Raises:
+            TimeoutError: If a waiting caller times out
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError(
+                    f"Timed out after {timeout}s waiting for an identical request"
+                )
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = function()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self) -> int:
+        """ Return the number of keys with a running call. """
+        with self._lock:
+            return len(self._calls)
+
+
+def coalesce_timeout() -> Optional[float]:
+    """ Return the wait timeout set by COALESCE_TIMEOUT_S, None by default. """
+    value = os.environ.get(TIMEOUT_ENV_VAR)
+    return float(value) if value else None
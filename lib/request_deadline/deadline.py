@@ -0,0 +1,142 @@
+""" A module to propagate a request deadline to every downstream call. """
+import contextlib
+import contextvars
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional
+
+# Header with the milliseconds the caller is willing to wait for a response
+TIMEOUT_HEADER = "x-request-timeout-ms"
+
+# Environment variable with the default, and largest, request timeout
+TIMEOUT_ENV_VAR = "REQUEST_TIMEOUT_S"
+
+# Monotonic time by which the current request must be answered
+_DEADLINE: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+
+
+class DeadlineExceeded(TimeoutError):
+    """ An exception raised when the request deadline has passed. """
+
+
+def timeout_from_headers(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Return the request timeout in seconds, None when nothing limits it.
+
+    The timeout comes from the ``x-request-timeout-ms`` header, capped by
+    REQUEST_TIMEOUT_S, which is also the timeout of requests without the
+    header. Set REQUEST_TIMEOUT_S a little below the Functions host timeout.
+
+    Raises:
+        ValueError: If the header is not a positive number
+    """
+    value = os.environ.get(TIMEOUT_ENV_VAR)
+    configured = float(value) if value else None
+    header = headers.get(TIMEOUT_HEADER)
+    if header is None:
+        return configured
+    timeout_s = float(header) / 1000
+    if timeout_s <= 0:
+        raise ValueError(f"{TIMEOUT_HEADER} must be positive, got {header}")
+    return timeout_s if configured is None else min(timeout_s, configured)
+
+
+@contextlib.contextmanager
+def request_deadline(timeout_s: Optional[float]) -> Iterator[Optional[float]]:
+    """
+    Set the deadline of the calls made in the block, None for no deadline.
+
+    A deadline already set by an enclosing block is only ever shortened.
+    The deadline is kept in a context variable, so it follows the request
+    into ``contextvars.copy_context()`` but not into plain new threads.
+
+    Yields:
+        float: The deadline in ``time.monotonic()`` seconds, or None
+    """
+    deadline = _DEADLINE.get()
+    if timeout_s is not None:
+        requested = time.monotonic() + timeout_s
+        deadline = requested if deadline is None else min(deadline, requested)
+    token = _DEADLINE.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _DEADLINE.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """ Return the seconds left until the deadline, None without one. """
+    deadline = _DEADLINE.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def expired() -> bool:
+    """ Return whether the deadline of the current request has passed. """
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def check_deadline(stage: str) -> None:
+    """
+    Stop the request before ``stage`` if its deadline has passed.
+
+    Raises:
+        DeadlineExceeded: If the deadline has passed
+    """
+    if expired():
+        raise DeadlineExceeded(f"Request deadline exceeded before {stage}")
+
+
+def call_options(stage: str) -> Dict[str, Any]:
+    """
+    Return the keyword arguments bounding an Azure SDK call by the deadline.
+
+    ``timeout`` bounds the call including its retries, and ``read_timeout``
+    a single response, so no call outlives the request.
+
+    Raises:
+        DeadlineExceeded: If the deadline has passed
+    """
+    check_deadline(stage)
+    left = remaining()
+    if left is None:
+        return {}
+    return {"timeout": left, "read_timeout": left}
+
+
+def run_within_deadline(function: Callable[..., Any], *args: Any, stage: str) -> Any:
+    """
+    Call ``function`` and stop waiting for it at the deadline.
+
+    Without a deadline the function is called directly. Otherwise it runs on
+    a daemon thread, which is abandoned if it is not done in time, because
+    Python cannot stop a running thread.
+
+    Raises:
+        DeadlineExceeded: If the deadline passes before the function returns
+    """
+    check_deadline(stage)
+    left = remaining()
+    if left is None:
+        return function(*args)
+
+    outcome = {}
+    done = threading.Event()
+
+    def call():
+        try:
+            outcome["result"] = function(*args)
+        except BaseException as e:  # pylint: disable=broad-except
+            outcome["error"] = e
+        finally:
+            done.set()
+
+    threading.Thread(target=call, daemon=True).start()
+    if not done.wait(left):
+        raise DeadlineExceeded(f"Request deadline exceeded during {stage}")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
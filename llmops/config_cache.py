@@ -0,0 +1,91 @@
+"""Compiled experiment configuration cache module."""
+import functools
+import hashlib
+import logging
+import os
+import pickle
+import sys
+import tempfile
+from typing import Any, List, Optional, Sequence
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_ENV_VAR = "EXPERIMENT_CACHE_DIR"
+CACHE_FORMAT_VERSION = 3
+
+# Modules that build the compiled configuration; editing any of them
+# invalidates the cache without a CACHE_FORMAT_VERSION bump
+_COMPILER_MODULES = ("experiment.py", "config_overlay.py", "variables.py")
+
+
+def file_digest(path: str) -> Optional[str]:
+    """Return the SHA-256 digest of a file, or None if it does not exist."""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def compiler_digest() -> str:
+    """Return a digest of the source of the configuration compiler modules."""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    return hashlib.sha256("|".join(
+        file_digest(os.path.join(directory, name)) or "missing"
+        for name in _COMPILER_MODULES
+    ).encode("utf-8")).hexdigest()
+
+
+def cache_key(paths: List[str], extras: Sequence[str] = ()) -> str:
+    """
+    Return the cache key of the configuration built from the given files.
+
+    The key covers the content of every file (or its absence), any extra
+    inputs such as command line overrides, the cache format, the source of
+    the modules that compile the configuration and the Python and PyYAML
+    versions, so any change invalidates it.
+    """
+    key = hashlib.sha256()
+    key.update(
+        f"{CACHE_FORMAT_VERSION}|{compiler_digest()}|{sys.version_info[:2]}|"
+        f"{yaml.__version__}".encode("utf-8")
+    )
+    for path in paths:
+        key.update(b"|")
+        key.update((file_digest(path) or "missing").encode("utf-8"))
+    for extra in extras:
+        key.update(b"|")
+        key.update(extra.encode("utf-8"))
+    return key.hexdigest()
+
+
+def load_compiled(cache_dir: str, key: str) -> Optional[Any]:
+    """Return the cached configuration for a key, or None on a miss."""
+    path = os.path.join(cache_dir, f"{key}.pickle")
+    try:
+        with open(path, "rb") as f:
+            compiled = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError,
+            ImportError) as e:
+        logger.warning("Ignoring unreadable config cache %s: %s", path, e)
+        return None
+    logger.debug("Loaded compiled experiment config from %s", path)
+    return compiled
+
+
+def store_compiled(cache_dir: str, key: str, compiled: Any) -> None:
+    """Store a compiled configuration under a key, replacing it atomically."""
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, os.path.join(cache_dir, f"{key}.pickle"))
+    except BaseException:
+        os.unlink(temp_path)
+        raise
@@ -0,0 +1,175 @@
+"""Layered experiment configuration overlay module."""
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import yaml
+
+ConfigPath = Tuple[str, ...]
+
+
+def _is_named_list(value: Any) -> bool:
+    return (
+        isinstance(value, list)
+        and bool(value)
+        and isinstance(value[0], dict)
+        and "name" in value[0]
+    )
+
+
+def _format_path(path: ConfigPath) -> str:
+    return ".".join(path)
+
+
+class ConfigOverlay:
+    """
+    Merge configuration layers in order, recording where values came from.
+
+    Dictionaries are merged key by key and lists of dictionaries with a
+    ``name`` key are merged item by item through a name index, so merging is
+    linear in the size of the layers. Any other value replaces the one below
+    it. Merged containers are new objects, while unchanged values are shared
+    with the layers instead of being copied.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty overlay."""
+        self.config: Dict[str, Any] = {}
+        self.layers: List[str] = []
+        self._sources: Dict[ConfigPath, int] = {}
+
+    def add_layer(self, name: str, data: Optional[Dict[str, Any]]) -> None:
+        """Merge a layer on top of the current configuration."""
+        index = len(self.layers)
+        self.layers.append(name)
+        if index == 0:
+            self.config = dict(data or {})
+            self._sources[()] = index
+            return
+        self.config = self._merge_dict(self.config, data or {}, (), index)
+
+    def source_of(self, path: Union[str, Sequence[str]]) -> Optional[str]:
+        """
+        Return the name of the layer that set the value at a path.
+
+        Paths are dotted keys, with list items addressed by their name, such
+        as ``evaluators.math_eval.datasets.math_ds.source``.
+        """
+        if isinstance(path, str):
+            path = tuple(path.split(".")) if path else ()
+        path = tuple(path)
+        found = -1
+        for end in range(len(path) + 1):
+            found = max(found, self._sources.get(path[:end], -1))
+        return self.layers[found] if found >= 0 else None
+
+    @property
+    def provenance(self) -> Dict[str, str]:
+        """Map of the paths written by each layer to the layer name."""
+        return {
+            _format_path(path): self.layers[index]
+            for path, index in self._sources.items()
+        }
+
+    def _merge_dict(
+        self,
+        base: Dict[str, Any],
+        override: Dict[str, Any],
+        path: ConfigPath,
+        index: int
+    ) -> Dict[str, Any]:
+        result = dict(base)
+        for key, value in override.items():
+            current = result.get(key)
+            key_path = path + (key,)
+            if isinstance(current, dict) and isinstance(value, dict):
+                result[key] = self._merge_dict(current, value, key_path, index)
+            elif _is_named_list(current) and isinstance(value, list):
+                result[key] = self._merge_named_list(
+                    current, value, key_path, index
+                )
+            else:
+                result[key] = value
+                self._sources[key_path] = index
+        return result
+
+    def _merge_named_list(
+        self,
+        base: List[Dict[str, Any]],
+        override: List[Any],
+        path: ConfigPath,
+        index: int
+    ) -> List[Any]:
+        result = list(base)
+        positions = {
+            item["name"]: i for i, item in enumerate(result)
+            if isinstance(item, dict) and "name" in item
+        }
+        for item in override:
+            name = item["name"]
+            item_path = path + (str(name),)
+            position = positions.get(name)
+            if position is None:
+                positions[name] = len(result)
+                result.append(item)
+                self._sources[item_path] = index
+            elif isinstance(item, dict) and isinstance(result[position], dict):
+                result[position] = self._merge_dict(
+                    result[position], item, item_path, index
+                )
+            else:
+                result[position] = item
+                self._sources[item_path] = index
+        return result
+
+
+def merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge two configuration dictionaries, with override taking precedence."""
+    overlay = ConfigOverlay()
+    overlay.add_layer("base", base)
+    overlay.add_layer("override", override)
+    return overlay.config
+
+
+def parse_override(assignment: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Turn a ``path=value`` assignment into a sparse configuration layer.
+
+    The path uses the same dotted form as ``ConfigOverlay.source_of`` and the
+    value is parsed as YAML. Path segments that address a named list in
+    ``config`` produce a list item with that name, so the layer merges into
+    the existing item.
+    """
+    path, separator, raw_value = assignment.partition("=")
+    if not separator or not path:
+        raise ValueError(
+            f"Invalid config override '{assignment}', expected path=value"
+        )
+    try:
+        value = yaml.safe_load(raw_value)
+    except yaml.YAMLError as e:
+        raise ValueError(
+            f"Invalid value in config override '{assignment}': {e}"
+        ) from e
+
+    segments = path.split(".")
+    named = []
+    node: Any = config
+    for segment in segments:
+        is_named = _is_named_list(node)
+        named.append(is_named)
+        if is_named:
+            node = next(
+                (item for item in node if str(item.get("name")) == segment),
+                None
+            )
+        elif isinstance(node, dict):
+            node = node.get(segment)
+        else:
+            node = None
+
+    if named[-1] and isinstance(value, dict):
+        layer: Any = [dict(value, name=segments[-1])]
+    else:
+        layer = {segments[-1]: value}
+    for segment, is_named in zip(reversed(segments[:-1]), reversed(named[:-1])):
+        layer = [dict(layer, name=segment)] if is_named else {segment: layer}
+    return layer
@@ -0,0 +1,138 @@
+"""Per-row and run-level deadlines of evaluation targets."""
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from lib.request_deadline.deadline import DeadlineExceeded, request_deadline
+
+logger = logging.getLogger(__name__)
+
+# Environment variables read by the targets, also in worker processes
+ROW_TIMEOUT_ENV_VAR = "ROW_TIMEOUT_S"
+RUN_DEADLINE_ENV_VAR = "RUN_DEADLINE"
+
+# Output column flagging the rows whose target ran out of time
+TIMED_OUT_COLUMN = "timed_out"
+
+
+def set_row_timeout(timeout_s: Optional[float]) -> None:
+    """Set the per-row timeout of the next evaluations, None for no timeout."""
+    if timeout_s:
+        os.environ[ROW_TIMEOUT_ENV_VAR] = str(float(timeout_s))
+    else:
+        os.environ.pop(ROW_TIMEOUT_ENV_VAR, None)
+
+
+def start_run_deadline(timeout_s: Optional[float]) -> Optional[float]:
+    """
+    Start the run-level deadline, None to run without one.
+
+    Returns:
+        float: The deadline as a Unix timestamp, or None
+    """
+    if not timeout_s:
+        os.environ.pop(RUN_DEADLINE_ENV_VAR, None)
+        return None
+    deadline = time.time() + float(timeout_s)
+    os.environ[RUN_DEADLINE_ENV_VAR] = repr(deadline)
+    return deadline
+
+
+def run_deadline() -> Optional[float]:
+    """Return the run-level deadline as a Unix timestamp, if one was started."""
+    value = os.environ.get(RUN_DEADLINE_ENV_VAR)
+    return float(value) if value else None
+
+
+def run_expired() -> bool:
+    """Return whether the run-level deadline has passed."""
+    deadline = run_deadline()
+    return deadline is not None and time.time() >= deadline
+
+
+def row_budget(timeout_s: Optional[float] = None) -> Optional[float]:
+    """
+    Return the seconds a row may take, None when nothing limits it.
+
+    The budget is the per-row timeout, ROW_TIMEOUT_S by default, cut short
+    by the time left until the run-level deadline.
+    """
+    if timeout_s is None:
+        value = os.environ.get(ROW_TIMEOUT_ENV_VAR)
+        timeout_s = float(value) if value else None
+    deadline = run_deadline()
+    if deadline is None:
+        return timeout_s
+    remaining = deadline - time.time()
+    return remaining if timeout_s is None else min(timeout_s, remaining)
+
+
+def timeout_output(reason: str) -> Dict[str, Any]:
+    """Build the output recorded for a row whose target ran out of time."""
+    return {"response": "", TIMED_OUT_COLUMN: True, "error": reason}
+
+
+def _call_with_deadline(budget: Optional[float], target: Callable, *args, **kwargs) -> Any:
+    """Call the target with its downstream calls bounded by the row budget."""
+    with request_deadline(budget):
+        return target(*args, **kwargs)
+
+
+def deadline_target(target: Callable, timeout_s: Optional[float] = None) -> Callable:
+    """
+    Wrap a target so that each row stops waiting for it at its deadline.
+
+    The timeout defaults to ROW_TIMEOUT_S and is cut short by the run-level
+    deadline. Each call runs on its own daemon thread. A row that is not done
+    in time gets ``timeout_output()``, and other rows get ``timed_out`` set
+    to False. Rows after the run deadline are not started at all, so an
+    evaluation finishes quickly with the outputs it already has. The target
+    runs inside ``request_deadline()``, so the flows stop their LLM calls and
+    code execution at the same deadline. Python cannot stop a running
+    thread, so a call hung elsewhere is abandoned rather than killed. Without
+    a timeout or run deadline the target is returned unchanged. The wrapper
+    keeps the target signature, so it can be passed to
+    ``evaluate(target=...)``.
+    """
+    if timeout_s is None and not os.environ.get(ROW_TIMEOUT_ENV_VAR) and run_deadline() is None:
+        return target
+
+    @functools.wraps(target)
+    def bounded(*args, **kwargs):
+        budget = row_budget(timeout_s)
+        if budget is not None and budget <= 0:
+            bounded.timeouts += 1
+            return timeout_output("Run deadline exceeded")
+
+        outcome = {}
+        done = threading.Event()
+        context = contextvars.copy_context()
+
+        def call():
+            try:
+                outcome["output"] = context.run(
+                    _call_with_deadline, budget, target, *args, **kwargs
+                )
+            except BaseException as e:  # pylint: disable=broad-except
+                outcome["error"] = e
+            finally:
+                done.set()
+
+        threading.Thread(target=call, daemon=True).start()
+        if not done.wait(budget) or isinstance(outcome.get("error"), DeadlineExceeded):
+            bounded.timeouts += 1
+            logger.warning("Target timed out after %.1fs", budget)
+            return timeout_output(f"Timed out after {budget:.1f}s")
+        if "error" in outcome:
+            raise outcome["error"]
+        output = outcome["output"]
+        if isinstance(output, dict):
+            output = {**output, TIMED_OUT_COLUMN: False}
+        return output
+
+    bounded.timeouts = 0
+    return bounded
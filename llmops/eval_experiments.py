@@ -2,15 +2,39 @@
 import argparse
 import asyncio
 import datetime
-import importlib
+import hashlib
 import inspect
+import json
+import multiprocessing
 import os
-import sys
-from typing import Optional
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import logging
 from dotenv import load_dotenv
 
-from llmops.experiment import load_experiment
+from lib.flow_metrics.tracing import (
+    EXPORTER_ENV_VAR,
+    JSONL_PATH_ENV_VAR,
+    flush_tracing,
+)
+from llmops.deadlines import run_expired, set_row_timeout, start_run_deadline
+from llmops.evaluator_registry import EvaluatorRegistry
+from llmops.experiment import Experiment, load_experiment
+from llmops.incremental import CACHE_PATH_ENV_VAR
+from llmops.profiling import PROFILE_MODES, profile_dir, profiled
+from llmops.run_metrics import add_usage_metrics, write_metrics
+from llmops.sharding import merge_results, shard_tag, validate_shard, write_shard
+from llmops.sweep import run_sweep
+from llmops.work_queue import (
+    DONE,
+    Task,
+    WorkQueue,
+    new_run_id,
+    new_worker_id,
+    run_prefix,
+)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -36,28 +60,385 @@ def set_environment_variables(env_dict):
         os.environ[key] = str(value)
 
 
+def execute_eval_function(
+    service_function: Callable,
+    eval_id: str,
+    data_path: str,
+    mappings: Dict[str, str],
+    report_dir: Optional[str]
+):
+    """
+    Execute a sync or async evaluation function on a dataset.
+
+    The p50/p95 aggregates of the flow usage columns, such as tokens and
+    latencies, are added to the metrics of the result.
+    """
+    if inspect.iscoroutinefunction(service_function):
+        logger.debug(
+            "Executing async evaluation function"
+        )
+        return add_usage_metrics(asyncio.run(service_function(
+            eval_id,
+            data_path,
+            mappings,
+            report_dir
+        )))
+
+    logger.debug(
+        "Executing sync evaluation function"
+    )
+    return add_usage_metrics(service_function(
+        eval_id,
+        data_path,
+        mappings,
+        report_dir
+    ))
+
+
+def _build_tasks(
+    run_id: str,
+    evaluator_name: str,
+    function_name: str,
+    dataset_name: str,
+    data_path: str,
+    rows_per_task: int
+) -> List[Task]:
+    """
+    Split a dataset into queue tasks of at most rows_per_task rows.
+
+    Task ids start with ``run_id``, so a new run never gets the results of
+    an earlier run, which may have used other flow or evaluator code.
+    """
+    with open(data_path, "r", encoding="utf-8") as f:
+        lines = [line.rstrip("\n") for line in f if line.strip()]
+
+    tasks = []
+    for chunk, start in enumerate(range(0, len(lines), rows_per_task)):
+        payload = "\n".join(lines[start:start + rows_per_task]) + "\n"
+        digest = hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+        tasks.append(Task(
+            task_id=(
+                f"{run_prefix(run_id)}{evaluator_name}/{function_name}/"
+                f"{dataset_name}/{chunk}-{digest}"
+            ),
+            evaluator=evaluator_name,
+            function=function_name,
+            dataset=dataset_name,
+            chunk=chunk,
+            payload=payload
+        ))
+    return tasks
+
+
+def _execute_task(
+    queue: WorkQueue,
+    task: Task,
+    worker_id: str,
+    experiment: Experiment,
+    report_dir: Optional[str],
+    registry: EvaluatorRegistry,
+    profile: Optional[str] = None
+):
+    """Run one queue task while keeping its lease alive."""
+    evaluator = experiment.get_evaluator(task.evaluator)
+    dataset = experiment.get_dataset(task.evaluator, task.dataset)
+    if evaluator is None or dataset is None:
+        raise ValueError(
+            f"Task {task.task_id} does not match the loaded experiment"
+        )
+
+    service_function = registry.function(task.evaluator, task.function)
+
+    set_environment_variables(evaluator.resolved_env_vars)
+    set_row_timeout(evaluator.row_timeout_s)
+
+    task_dir = os.path.join(report_dir or ".", "queue_tasks")
+    os.makedirs(task_dir, exist_ok=True)
+    safe_task_id = re.sub(r"[^A-Za-z0-9_.-]", "_", task.task_id)
+    data_path = os.path.join(task_dir, f"{safe_task_id}.jsonl")
+    with open(data_path, "w", encoding="utf-8") as f:
+        f.write(task.payload)
+
+    stop_heartbeat = threading.Event()
+
+    def keep_lease():
+        while not stop_heartbeat.wait(queue.lease_seconds / 3):
+            if not queue.heartbeat(task.task_id, worker_id):
+                logger.warning("Lost lease on task %s", task.task_id)
+                return
+
+    heartbeat = threading.Thread(target=keep_lease, daemon=True)
+    heartbeat.start()
+    try:
+        with profiled(profile, safe_task_id, profile_dir(report_dir)):
+            return execute_eval_function(
+                service_function,
+                f"{experiment.name}_{safe_task_id}",
+                data_path,
+                dataset.mappings,
+                task_dir
+            )
+    finally:
+        stop_heartbeat.set()
+        heartbeat.join()
+
+
+def run_worker(
+    queue_path: str,
+    exp_filename: Optional[str] = None,
+    base_path: Optional[str] = None,
+    env_name: Optional[str] = None,
+    report_dir: Optional[str] = None,
+    poll_interval: float = 1.0,
+    lease_seconds: float = 300.0,
+    max_attempts: int = 3,
+    overrides: Optional[List[str]] = None,
+    profile: Optional[str] = None,
+) -> int:
+    """
+    Pull and execute evaluation tasks from a work queue until it is drained.
+
+    Returns:
+        int: Number of tasks completed by this worker
+    """
+    load_dotenv(override=True)
+    worker_id = new_worker_id()
+    queue = WorkQueue(queue_path, lease_seconds, max_attempts)
+
+    experiment = load_experiment(
+        filename=exp_filename, base_path=base_path, env=env_name,
+        overrides=overrides
+    )
+    set_environment_variables(experiment.resolved_env_vars)
+    logger.info("Worker %s joined queue %s", worker_id, queue_path)
+
+    registry = EvaluatorRegistry.from_experiment(base_path, experiment)
+    completed = 0
+    try:
+        while True:
+            task = queue.claim(worker_id)
+            if task is None:
+                if queue.is_drained():
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            logger.info(
+                "Worker %s executing task %s (attempt %d)",
+                worker_id, task.task_id, task.attempts
+            )
+            try:
+                result = _execute_task(
+                    queue, task, worker_id, experiment, report_dir, registry,
+                    profile
+                )
+            except Exception as e:  # pylint: disable=broad-except
+                logger.error("Task %s failed: %s", task.task_id, str(e))
+                queue.nack(task.task_id, worker_id, str(e))
+            else:
+                if queue.ack(task.task_id, worker_id, result):
+                    completed += 1
+                else:
+                    logger.warning(
+                        "Worker %s lost the lease on task %s, result dropped",
+                        worker_id, task.task_id
+                    )
+    finally:
+        flush_tracing()
+
+    logger.info("Worker %s completed %d tasks", worker_id, completed)
+    return completed
+
+
+def _execute_queued(
+    queue: WorkQueue,
+    run_id: str,
+    groups: Dict[Tuple[str, str, str], List[Task]],
+    workers: int,
+    experiment_name: str,
+    report_dir: Optional[str],
+    worker_kwargs: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """Enqueue tasks, run local workers and merge the per-task results."""
+    superseded = queue.supersede(run_id)
+    if superseded:
+        logger.info("Failed %d unfinished tasks of earlier runs", superseded)
+    added = queue.enqueue(
+        task for tasks in groups.values() for task in tasks
+    )
+    logger.info(
+        "Enqueued %d tasks of run %s in %s, starting %d workers",
+        added, run_id, queue.path, workers
+    )
+
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_worker, args=(queue.path,),
+                        kwargs=worker_kwargs)
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    logger.info("Queue status: %s", queue.stats())
+
+    results = []
+    failed = []
+    for (evaluator_name, function_name, dataset_name), tasks in groups.items():
+        records = queue.results([task.task_id for task in tasks])
+        shard_results = []
+        for task in tasks:
+            record = records.get(task.task_id) or {}
+            if record.get("status") == DONE:
+                shard_results.append(record["result"])
+            else:
+                failed.append((task.task_id, record.get("error")))
+
+        merged = merge_results(shard_results)
+        output_path = os.path.join(
+            report_dir or ".",
+            f"{experiment_name}_{evaluator_name}_{dataset_name}_"
+            f"{function_name}_queued.json"
+        )
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(merged, f, indent=2)
+        logger.info(
+            "Evaluation completed successfully: %s", merged["metrics"]
+        )
+        results.append(merged)
+
+    if failed:
+        for task_id, error in failed:
+            logger.error("Task %s did not complete: %s", task_id, error)
+        raise RuntimeError(f"{len(failed)} evaluation tasks did not complete")
+    return results
+
+
 def prepare_and_execute(
     exp_filename: Optional[str] = None,
     base_path: Optional[str] = None,
     env_name: Optional[str] = None,
     report_dir: Optional[str] = None,
     eval_to_exec: Optional[str] = "*",
+    num_shards: int = 1,
+    shard_index: int = 0,
+    workers: int = 0,
+    queue_path: Optional[str] = None,
+    rows_per_task: int = 1,
+    join_queue: bool = False,
+    resume: bool = False,
+    overrides: Optional[List[str]] = None,
+    sweep: bool = False,
+    cache_path: Optional[str] = None,
+    trace_exporter: Optional[str] = None,
+    profile: Optional[str] = None,
+    run_timeout_s: Optional[float] = None,
 ):
-    """Prepare and execute the evaluations for the given experiment."""
+    """
+    Prepare and execute the evaluations for the given experiment.
+
+    When ``num_shards`` is greater than one, only the dataset rows that hash
+    to ``shard_index`` are evaluated and the outputs are tagged with the
+    shard, so they can be combined with ``python -m llmops.sharding``.
+
+    When ``workers`` is greater than zero, the dataset rows are put into a
+    durable work queue as tasks of ``rows_per_task`` rows and executed by that
+    many worker processes. With ``join_queue``, the workers only pull tasks
+    from an existing queue, which lets other machines help with a run.
+    Every run enqueues its own tasks and fails the unfinished tasks of
+    earlier runs, unless ``resume`` continues the latest run of the queue,
+    keeping its completed tasks and retrying the others.
+
+    ``overrides`` are ``path=value`` assignments applied on top of the
+    experiment files, such as ``evaluators.math_eval.flow=evaluations``.
+
+    With ``sweep``, the variants of the experiment ``sweep`` section are
+    evaluated together instead, see ``llmops.sweep.run_sweep``.
+
+    With ``cache_path``, evaluation targets reuse the outputs of rows that
+    are unchanged since a previous run, see ``llmops.incremental``.
+
+    ``trace_exporter`` selects where the flows export their stage spans:
+    ``azure``, ``console`` or ``jsonl``, which writes ``traces.jsonl`` to
+    the report directory.
+
+    ``profile`` runs each evaluation under a ``cpu``, ``wall`` or ``memory``
+    profiler and writes its profile and a top-N summary to the ``profiles``
+    folder of the report directory, see ``llmops.profiling.profiled``.
+
+    ``run_timeout_s`` bounds the whole run. Once it passes, remaining rows
+    are recorded as timed out without calling the target and remaining
+    evaluations are skipped, so the results so far are still written. Each
+    row is also bounded by the ``row_timeout_s`` of its evaluator, see
+    ``llmops.deadlines.deadline_target``.
+    """
+    validate_shard(num_shards, shard_index)
+    if profile and profile not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode '{profile}'")
     load_dotenv(override=True)
     logger.debug("Environment variables loaded")
+    # Read by the targets, also in worker processes
+    start_run_deadline(run_timeout_s)
+    if cache_path:
+        # Read by the evaluation functions and inherited by worker processes
+        os.environ[CACHE_PATH_ENV_VAR] = os.path.abspath(cache_path)
+    if trace_exporter:
+        # Read when the flows are imported, also by worker processes
+        os.environ[EXPORTER_ENV_VAR] = trace_exporter
+        if trace_exporter == "jsonl":
+            os.environ.setdefault(JSONL_PATH_ENV_VAR, os.path.abspath(
+                os.path.join(report_dir or ".", "traces.jsonl")
+            ))
 
     results = []
+    queue_path = queue_path or os.path.join(report_dir or ".", "eval_queue.db")
+    worker_kwargs = {
+        "exp_filename": exp_filename,
+        "base_path": base_path,
+        "env_name": env_name,
+        "report_dir": report_dir,
+        "lease_seconds": 300.0,
+        "max_attempts": 3,
+        "overrides": overrides,
+        "profile": profile,
+    }
+
+    if join_queue:
+        context = multiprocessing.get_context("spawn")
+        processes = [
+            context.Process(target=run_worker, args=(queue_path,),
+                            kwargs=worker_kwargs)
+            for _ in range(max(workers, 1))
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        return results
+
+    if workers > 0:
+        queue = WorkQueue(
+            queue_path,
+            worker_kwargs["lease_seconds"],
+            worker_kwargs["max_attempts"]
+        )
+        run_id = (queue.latest_run() if resume else None) or new_run_id()
+        logger.info(
+            "%s queue run %s", "Resuming" if resume else "Starting", run_id
+        )
 
     try:
         experiment = load_experiment(
-            filename=exp_filename, base_path=base_path, env=env_name
+            filename=exp_filename, base_path=base_path, env=env_name,
+            overrides=overrides
         )
         experiment_name = experiment.name
         logger.info("Loaded experiment: %s", experiment.name)
 
         eval_flows = experiment.evaluators
         logger.info("Found %d evaluators to process", len(eval_flows))
+        registry = EvaluatorRegistry.from_experiment(base_path, experiment)
 
         set_environment_variables(experiment.resolved_env_vars)
         logger.debug("Set experiment-level environment variables")
@@ -67,134 +448,123 @@ def prepare_and_execute(
                 logger.info("Creating report directory: %s", report_dir)
                 os.makedirs(report_dir, exist_ok=True)
 
+        if sweep:
+            with profiled(
+                profile, f"{experiment_name}_sweep", profile_dir(report_dir)
+            ):
+                return [run_sweep(experiment, base_path, report_dir)]
+
+        task_groups = {}
         for evaluator in eval_flows:
             logger.info("Processing evaluator: %s", evaluator.name)
 
             if eval_to_exec not in ["*", evaluator.name]:
                 logger.info("Evaluator could not be processed: %s", evaluator.name)
                 continue
-            else:
-                evaluator_path = os.path.join(
-                    base_path, evaluator.flow
-                )
-                logger.debug("Evaluator path: %s", evaluator_path)
-                evaluator.resolve_variables()
 
-                set_environment_variables(evaluator.resolved_env_vars)
-                logger.debug("Set evaluator-specific environment variables")
+            # Evaluator variables were resolved with the experiment
+            set_environment_variables(evaluator.resolved_env_vars)
+            set_row_timeout(evaluator.row_timeout_s)
+            logger.debug("Set evaluator-specific environment variables")
 
-                try:
-                    logger.debug(
-                        "PROMPTY_FILE value: %s", os.environ.get(
-                            'PROMPTY_FILE'
-                            )
-                    )
-                except KeyError:
-                    logger.warning("PROMPTY_FILE environment variable not set")
-                    raise
-
-                service_module = None
-                eval_filename = evaluator.name + ".py"
-
-                if os.path.isfile(os.path.join(evaluator_path, eval_filename)):
-                    logger.info("Found evaluation file: %s", eval_filename)
-                    module_name = evaluator.name.lstrip().rstrip()
-                    flow_components = evaluator_path.split(os.sep)
-                    flow_formatted = '.'.join(flow_components)
-                    module_path = (
-                        f'{flow_formatted}.'
-                        f'{module_name}'
-                    )
-
-                    dependent_modules_dir = os.path.join(
-                        base_path, experiment.flow
+            try:
+                logger.debug(
+                    "PROMPTY_FILE value: %s", os.environ.get(
+                        'PROMPTY_FILE'
                         )
-                    logger.debug("Adding to sys.path: %s", dependent_modules_dir)
-                    sys.path.append(dependent_modules_dir)
-
-                    # evaluations folder
-                    current_dir = os.path.dirname(os.path.abspath(__file__))
-                    parent_dir = os.path.dirname(current_dir)
-
-                    logger.debug("Adding to sys.path: %s", parent_dir)
-                    sys.path.insert(0, parent_dir)
-
-                    logger.info("Importing module: %s", module_path)
-                    service_module = importlib.import_module(
-                        module_path
+                )
+            except KeyError:
+                logger.warning("PROMPTY_FILE environment variable not set")
+                raise
+
+            eval_functions = registry.functions(evaluator.name)
+            for function_name, service_function in eval_functions:
+                logger.info(
+                    "Executing evaluation function: %s", function_name
+                )
+                for ds in evaluator.datasets:
+                    logger.info("Processing dataset: %s", ds.source)
+
+                    data_path = os.path.join(base_path, ds.source)
+                    if num_shards > 1:
+                        tag = shard_tag(shard_index, num_shards)
+                        eval_id = (
+                            f"{experiment_name}_{evaluator.name}_"
+                            f"{ds.name}_{function_name}_{tag}"
                         )
-
-                    module_names = dir(service_module)
-
-                    # Filter names to get functions defined in module
-                    function_names = [
-                        name for name in module_names
-                        if inspect.isfunction
-                        (
-                            getattr(
-                                service_module,
-                                name
-                                )
+                        data_path = write_shard(
+                            data_path,
+                            os.path.join(report_dir or ".", "shards"),
+                            num_shards,
+                            shard_index
+                        )
+                    else:
+                        timestamp = datetime.datetime.now().strftime(
+                            "%Y%m%d_%H%M%S"
+                            )
+                        eval_id = f"{experiment_name}_eval_{timestamp}"
+
+                    if workers > 0:
+                        task_groups[(evaluator.name, function_name, ds.name)] = \
+                            _build_tasks(
+                                run_id,
+                                evaluator.name,
+                                function_name,
+                                ds.name,
+                                data_path,
+                                rows_per_task
                             )
-                        ]
-                    logger.debug("Found %d functions in module", len(
-                        function_names
+                        continue
+
+                    if run_expired():
+                        logger.warning(
+                            "Run deadline exceeded, skipping %s on %s",
+                            function_name, ds.name
                         )
+                        continue
+
+                    with profiled(
+                        profile,
+                        f"{evaluator.name}_{function_name}_{ds.name}",
+                        profile_dir(report_dir)
+                    ):
+                        result = execute_eval_function(
+                            service_function,
+                            eval_id,
+                            data_path,
+                            ds.mappings,
+                            report_dir
+                        )
+                    logger.info(
+                        "Evaluation completed successfully: %s", result
                     )
-
-                    for function_name in function_names:
-                        if (
-                            function_name.lower().startswith('eval_')
-                        ):
-                            logger.info(
-                                "Executing evaluation function: %s", function_name
-                            )
-                            service_function = getattr(
-                                service_module,
-                                function_name
-                                )
-                            for ds in evaluator.datasets:
-                                logger.info("Processing dataset: %s", ds.source)
-
-                                timestamp = datetime.datetime.now().strftime(
-                                    "%Y%m%d_%H%M%S"
-                                    )
-                                eval_id = f"{experiment_name}_eval_{timestamp}"
-
-                                if inspect.iscoroutinefunction(service_function):
-                                    logger.debug(
-                                        "Executing async evaluation function"
-                                    )
-                                    result = asyncio.run(service_function(
-                                        eval_id,
-                                        os.path.join(base_path, ds.source),
-                                        ds.mappings,
-                                        report_dir
-                                    ))
-                                else:
-                                    logger.debug(
-                                        "Executing sync evaluation function"
-                                    )
-                                    result = service_function(
-                                        eval_id,
-                                        os.path.join(
-                                            base_path,
-                                            ds.source
-                                        ),
-                                        ds.mappings,
-                                        report_dir
-                                    )
-                                logger.info(
-                                    "Evaluation completed successfully: %s", result
-                                )
-                                results.append(result)
-                else:
-                    print(f"No evaluation flow found for {evaluator.name}")
+                    if num_shards == 1:
+                        # Shard metrics are recomputed when shards are merged
+                        write_metrics(result, os.path.join(
+                            report_dir or ".",
+                            f"{experiment_name}_{evaluator.name}_{ds.name}_"
+                            f"{function_name}_metrics.json"
+                        ))
+                    results.append(result)
+
+        if workers > 0:
+            results.extend(_execute_queued(
+                queue,
+                run_id,
+                task_groups,
+                workers,
+                experiment_name,
+                report_dir,
+                worker_kwargs
+            ))
 
         return results
     except Exception as e:
         print(f"Evaluation failed: {str(e)}")
         raise
+    finally:
+        # Spans are exported in batches, export the rest before exiting
+        flush_tracing()
 
 
 if __name__ == "__main__":
@@ -229,6 +599,81 @@ if __name__ == "__main__":
         help="experiment config file name",
         default="*"
     )
+    parser.add_argument(
+        "--num_shards",
+        type=int,
+        help="number of shards the datasets are split into",
+        default=1
+    )
+    parser.add_argument(
+        "--shard_index",
+        type=int,
+        help="index of the dataset shard evaluated by this run",
+        default=0
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="number of local worker processes pulling rows from a work queue",
+        default=0
+    )
+    parser.add_argument(
+        "--queue_path",
+        type=str,
+        help="work queue database path, defaults to <report_dir>/eval_queue.db",
+    )
+    parser.add_argument(
+        "--rows_per_task",
+        type=int,
+        help="number of dataset rows in each work queue task",
+        default=1
+    )
+    parser.add_argument(
+        "--join_queue",
+        action="store_true",
+        help="only run workers against an existing work queue",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue the latest work queue run instead of starting a new one",
+    )
+    parser.add_argument(
+        "--set",
+        dest="overrides",
+        action="append",
+        help="override an experiment setting, e.g. evaluators.math_eval.flow=evaluations",
+        default=None,
+    )
+    parser.add_argument(
+        "--sweep",
+        action="store_true",
+        help="evaluate all variants of the experiment sweep section",
+    )
+    parser.add_argument(
+        "--cache_path",
+        type=str,
+        help="incremental evaluation cache database, reused across runs",
+        default=None,
+    )
+    parser.add_argument(
+        "--trace_exporter",
+        choices=["azure", "console", "jsonl", "none"],
+        help="exporter of the flow tracing spans, jsonl writes traces.jsonl to the report dir",
+        default=None,
+    )
+    parser.add_argument(
+        "--profile",
+        choices=list(PROFILE_MODES),
+        help="profile each evaluation and write profiles to the report dir",
+        default=None,
+    )
+    parser.add_argument(
+        "--run_timeout_s",
+        type=float,
+        help="seconds after which remaining rows time out and evaluations are skipped",
+        default=None,
+    )
     args = parser.parse_args()
 
     prepare_and_execute(
@@ -237,4 +682,17 @@ if __name__ == "__main__":
         env_name=args.environment_name,
         report_dir=args.report_dir,
         eval_to_exec=args.eval_to_exec,
+        num_shards=args.num_shards,
+        shard_index=args.shard_index,
+        workers=args.workers,
+        queue_path=args.queue_path,
+        rows_per_task=args.rows_per_task,
+        join_queue=args.join_queue,
+        resume=args.resume,
+        overrides=args.overrides,
+        sweep=args.sweep,
+        cache_path=args.cache_path,
+        trace_exporter=args.trace_exporter,
+        profile=args.profile,
+        run_timeout_s=args.run_timeout_s,
     )
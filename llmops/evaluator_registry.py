@@ -0,0 +1,191 @@
+"""Evaluation function registry module."""
+import ast
+import importlib
+import json
+import logging
+import os
+import tempfile
+from typing import Callable, Dict, List, Optional, Tuple
+
+from llmops.experiment import Evaluator, Experiment
+
+logger = logging.getLogger(__name__)
+
+EVAL_FUNCTION_PREFIX = "eval_"
+INDEX_FILE_NAME = ".evaluator_index.json"
+INDEX_FORMAT_VERSION = 1
+
+# The folder holding llmops, which use case modules are imported from
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def module_path_for(file_path: str) -> str:
+    """Return the dotted module path of a Python file in the repository."""
+    file_path = os.path.abspath(file_path)
+    for root in (REPO_ROOT, os.getcwd()):
+        relative = os.path.relpath(file_path, root)
+        if not relative.startswith(os.pardir):
+            break
+    else:
+        raise ValueError(f"Evaluation file {file_path} is outside the project")
+    return os.path.splitext(relative)[0].replace(os.sep, ".")
+
+
+def discover_functions(file_path: str) -> List[str]:
+    """Return the eval_ functions defined at the top level of a file."""
+    with open(file_path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=file_path)
+    return [
+        node.name for node in tree.body
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+        and node.name.lower().startswith(EVAL_FUNCTION_PREFIX)
+    ]
+
+
+class DiscoveryIndex:
+    """
+    Cache of the eval_ functions found in evaluation files.
+
+    Entries are keyed by file path and reused while the file size and
+    modification time are unchanged, so files are only parsed when edited.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        """Load the index from a JSON file, if one is given and readable."""
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        self._dirty = False
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == INDEX_FORMAT_VERSION:
+                    self.entries = data.get("files", {})
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring unreadable evaluator index %s: %s", path, e)
+
+    def functions(self, file_path: str) -> List[str]:
+        """Return the eval_ functions of a file, parsing it on a cache miss."""
+        stat = os.stat(file_path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        entry = self.entries.get(file_path)
+        if entry is None or entry["signature"] != signature:
+            entry = {
+                "signature": signature,
+                "functions": discover_functions(file_path),
+            }
+            self.entries[file_path] = entry
+            self._dirty = True
+        return entry["functions"]
+
+    def save(self) -> None:
+        """Write the index back if it changed, replacing it atomically."""
+        if not self.path or not self._dirty:
+            return
+        directory = os.path.dirname(self.path) or "."
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"version": INDEX_FORMAT_VERSION, "files": self.entries}, f
+                )
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            os.unlink(temp_path)
+            logger.warning("Could not save evaluator index %s: %s", self.path, e)
+            return
+        self._dirty = False
+
+
+class EvaluatorRegistry:
+    """
+    Map evaluator names to their evaluation functions.
+
+    The registry is built once per run from the explicit ``functions`` list
+    of each evaluator (``module.path:function`` entries) or, when there is
+    none, from the discovery index of the evaluator's ``<flow>/<name>.py``
+    file. Modules are imported on first use with ``importlib`` and without
+    changing ``sys.path``.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty registry."""
+        self._entries: Dict[str, List[Tuple[str, str]]] = {}
+        self._resolved: Dict[str, List[Tuple[str, Callable]]] = {}
+
+    def register(self, evaluator_name: str, entry_points: List[str]) -> None:
+        """Register ``module.path:function`` entry points for an evaluator."""
+        entries = []
+        for entry_point in entry_points:
+            module_path, separator, function_name = entry_point.partition(":")
+            if not separator or not module_path or not function_name:
+                raise ValueError(
+                    f"Invalid entry point '{entry_point}' for evaluator "
+                    f"{evaluator_name}, expected module.path:function"
+                )
+            entries.append((module_path, function_name))
+        self._entries[evaluator_name] = entries
+        self._resolved.pop(evaluator_name, None)
+
+    @classmethod
+    def from_experiment(
+        cls,
+        base_path: str,
+        experiment: Experiment,
+        index_path: Optional[str] = None
+    ) -> "EvaluatorRegistry":
+        """Build the registry of every evaluator of an experiment."""
+        registry = cls()
+        index = DiscoveryIndex(
+            index_path or os.path.join(base_path or ".", INDEX_FILE_NAME)
+        )
+        for evaluator in experiment.evaluators:
+            registry.register(
+                evaluator.name, cls._entry_points(base_path, evaluator, index)
+            )
+        index.save()
+        return registry
+
+    @staticmethod
+    def _entry_points(
+        base_path: str,
+        evaluator: Evaluator,
+        index: DiscoveryIndex
+    ) -> List[str]:
+        if evaluator.functions:
+            return evaluator.functions
+
+        file_path = os.path.join(
+            base_path or "", evaluator.flow, evaluator.name.strip() + ".py"
+        )
+        if not os.path.isfile(file_path):
+            logger.warning("No evaluation flow found for %s", evaluator.name)
+            return []
+        module_path = module_path_for(file_path)
+        return [
+            f"{module_path}:{function_name}"
+            for function_name in index.functions(file_path)
+        ]
+
+    def functions(self, evaluator_name: str) -> List[Tuple[str, Callable]]:
+        """Return the (name, function) pairs of an evaluator."""
+        if evaluator_name not in self._resolved:
+            if evaluator_name not in self._entries:
+                raise KeyError(f"Evaluator {evaluator_name} is not registered")
+            resolved = []
+            for module_path, function_name in self._entries[evaluator_name]:
+                logger.info("Importing module: %s", module_path)
+                module = importlib.import_module(module_path)
+                resolved.append((function_name, getattr(module, function_name)))
+            self._resolved[evaluator_name] = resolved
+        return self._resolved[evaluator_name]
+
+    def function(self, evaluator_name: str, function_name: str) -> Callable:
+        """Return one evaluation function of an evaluator."""
+        for name, function in self.functions(evaluator_name):
+            if name == function_name:
+                return function
+        raise KeyError(
+            f"Evaluation function {function_name} not found for "
+            f"evaluator {evaluator_name}"
+        )
@@ -1,13 +1,23 @@
 """Experiment configuration module."""
 import os
-import re
-from copy import deepcopy
+from copy import copy
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Union
 
 import yaml
-from dotenv import load_dotenv
+
+from llmops.config_cache import (
+    CACHE_DIR_ENV_VAR,
+    cache_key,
+    load_compiled,
+    store_compiled
+)
+from llmops.config_overlay import ConfigOverlay, merge, parse_override
+from llmops.variables import VariableResolver
+
+# Use the libyaml C loader when PyYAML was built with it
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 
 @dataclass
@@ -34,13 +44,18 @@ class Connection:
 
     def resolve_variables(self, env_vars: Dict[str, str]) -> None:
         """Resolve variables in connection properties using env vars."""
-        for field_name, field_value in self.__dict__.items():
-            if isinstance(field_value, str) and "${" in field_value:
-                var_name = re.search(r'\${(.*)}', field_value).group(1)
-                if var_name in env_vars:
-                    setattr(self, field_name, env_vars[var_name])
-                else:
-                    raise ValueError(f"env var {var_name} not found")
+        resolver = VariableResolver(env_vars)
+        self.resolve_with(resolver)
+        resolver.raise_missing()
+
+    def resolve_with(self, resolver: VariableResolver, location: str = "") -> None:
+        """Resolve connection properties, collecting missing variables."""
+        for field_name, field_value in list(self.__dict__.items()):
+            setattr(
+                self,
+                field_name,
+                resolver.resolve(field_value, f"{location}{field_name}")
+            )
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Connection':
@@ -67,30 +82,27 @@ class Evaluator:
     env_vars: List[Dict[str, str]]
     datasets: List[DatasetMapping]
     resolved_env_vars: Dict[str, str] = field(default_factory=dict)
-
-    def resolve_variables(self) -> None:
-        """Resolve all variables in the experiment configuration."""
-        load_dotenv()
-        env_vars = dict(os.environ)
-
-        # Resolve connection variables in main experiment
+    # Optional module.path:function entry points of the evaluation functions
+    functions: List[str] = field(default_factory=list)
+    # Optional seconds each dataset row may spend in the target
+    row_timeout_s: Optional[float] = None
+
+    def resolve_variables(
+        self,
+        env_vars: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Resolve all variables in the evaluator configuration."""
+        resolver = VariableResolver(env_vars)
+        self.resolve_with(resolver)
+        resolver.raise_missing("Environment variable")
+
+    def resolve_with(self, resolver: VariableResolver, location: str = "") -> None:
+        """Resolve connections and env vars, collecting missing variables."""
         for conn in self.connections:
-            conn.resolve_variables(env_vars)
-
-        # Resolve experiment env vars
-        self.resolved_env_vars = {}
-        for env_var_dict in self.env_vars:
-            for key, value in env_var_dict.items():
-                if isinstance(value, str) and "${" in value:
-                    var_name = re.search(r'\${(.*)}', value).group(1)
-                    if var_name in env_vars:
-                        self.resolved_env_vars[key] = env_vars[var_name]
-                    else:
-                        raise ValueError(
-                            f"Environment variable {var_name} not found"
-                        )
-                else:
-                    self.resolved_env_vars[key] = value
+            conn.resolve_with(resolver, f"{location}connections.{conn.name}.")
+        self.resolved_env_vars = resolver.resolve_env_vars(
+            self.env_vars, f"{location}env_vars"
+        )
 
     @classmethod
     def from_dict(
@@ -101,7 +113,7 @@ class Evaluator:
         for conn_name in data['connections_ref']:
             if conn_name in connections_map:
                 expanded_connections.append(
-                    deepcopy(connections_map[conn_name])
+                    copy(connections_map[conn_name])
                 )
             else:
                 raise ValueError(
@@ -121,7 +133,54 @@ class Evaluator:
                     description=ds.get('description'),
                     mappings=ds.get('mappings', {})
                 ) for ds in data.get('datasets', [])
-            ]
+            ],
+            functions=data.get('functions', []),
+            row_timeout_s=(
+                float(data['row_timeout_s'])
+                if data.get('row_timeout_s') is not None else None
+            )
+        )
+
+
+@dataclass
+class SweepConfig:
+    """Matrix of flow variants evaluated together in a sweep."""
+
+    prompty: List[str] = field(default_factory=list)
+    model: List[str] = field(default_factory=list)
+    temperature: List[float] = field(default_factory=list)
+    evaluators: Dict[str, str] = field(default_factory=dict)
+    max_concurrency: int = 8
+    requests_per_minute: Optional[float] = None
+
+    def variants(self) -> List[Dict[str, Any]]:
+        """Expand the matrix into the target arguments of every variant."""
+        axes = [
+            ("prompty_file", self.prompty),
+            ("model", self.model),
+            ("temperature", self.temperature),
+        ]
+        variants = [{}]
+        for name, values in axes:
+            if values:
+                variants = [
+                    {**variant, name: value}
+                    for variant in variants for value in values
+                ]
+        return variants
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SweepConfig':
+        """Create a SweepConfig instance from a dictionary."""
+        if not data.get('evaluators'):
+            raise ValueError("Sweep configuration requires evaluators")
+        return cls(
+            prompty=list(data.get('prompty', [])),
+            model=list(data.get('model', [])),
+            temperature=list(data.get('temperature', [])),
+            evaluators=dict(data['evaluators']),
+            max_concurrency=int(data.get('max_concurrency', 8)),
+            requests_per_minute=data.get('requests_per_minute')
         )
 
 
@@ -137,6 +196,10 @@ class Experiment:
     description: Optional[str] = None
     evaluators: List[Evaluator] = field(default_factory=list)
     resolved_env_vars: Dict[str, str] = field(default_factory=dict)
+    sweep: Optional[SweepConfig] = None
+    config_overlay: Optional[ConfigOverlay] = field(
+        default=None, repr=False, compare=False
+    )
 
     @staticmethod
     def deep_merge(
@@ -144,78 +207,68 @@ class Experiment:
         override: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Deep merge two dictionaries, with override taking precedence."""
-        result = deepcopy(base)
-
-        for key, value in override.items():
-            if key in result and isinstance(result[key], dict) and isinstance(
-                value,
-                dict
-            ):
-                result[key] = Experiment.deep_merge(result[key], value)
-            elif (
-                key in result
-                and isinstance(result[key], list)
-                and isinstance(
-                    value,
-                    list
-                )
-            ):
-                # For lists, merge by name if items are dict with 'name' key
-                if (
-                    result[key]
-                    and isinstance(result[key][0], dict)
-                    and 'name' in result[key][0]
-                ):
-                    merged_list = deepcopy(result[key])
-                    override_map = {item['name']: item for item in value}
-                    for i, item in enumerate(merged_list):
-                        if item['name'] in override_map:
-                            if isinstance(item, dict):
-                                merged_list[i] = Experiment.deep_merge(
-                                    item,
-                                    override_map[item['name']]
-                                )
-                            else:
-                                merged_list[i] = override_map[item['name']]
-                    # Add new items from override that don't exist in base
-                    for override_item in value:
-                        if (
-                            not any(item['name'] == override_item['name']
-                                    for item in merged_list)
-                                ):
-                            merged_list.append(override_item)
-                    result[key] = merged_list
-                else:
-                    result[key] = value
-            else:
-                result[key] = value
-        return result
+        return merge(base, override)
 
     @classmethod
-    def load_config(cls,
-                    base_path: Union[str, Path],
-                    dev_path: Optional[Union[str, Path]] = None
-                    ) -> Dict[str, Any]:
-        """Load and merge configuration from base and dev YAML files."""
+    def build_overlay(cls,
+                      base_path: Union[str, Path],
+                      dev_path: Optional[Union[str, Path]] = None,
+                      local_path: Optional[Union[str, Path]] = None,
+                      overrides: Optional[List[str]] = None
+                      ) -> ConfigOverlay:
+        """
+        Merge the base, env, local and override layers of a configuration.
+
+        Missing env and local files are skipped. Overrides are ``path=value``
+        assignments applied last, in order, as a single ``overrides`` layer.
+        """
+        overlay = ConfigOverlay()
         with open(base_path, 'r', encoding='utf-8') as f:
-            base_config = yaml.safe_load(f)
+            overlay.add_layer(
+                str(base_path), yaml.load(f, Loader=_YAML_LOADER)
+            )
 
-        if dev_path:
+        for layer_path in (dev_path, local_path):
+            if not layer_path:
+                continue
             try:
-                with open(dev_path, 'r', encoding='utf-8') as f:
-                    dev_config = yaml.safe_load(f) or {}
-                return cls.deep_merge(base_config, dev_config)
+                with open(layer_path, 'r', encoding='utf-8') as f:
+                    layer = yaml.load(f, Loader=_YAML_LOADER) or {}
             except FileNotFoundError:
-                return base_config
-        return base_config
+                continue
+            overlay.add_layer(str(layer_path), layer)
+
+        if overrides:
+            layer = {}
+            for assignment in overrides:
+                layer = merge(layer, parse_override(assignment, overlay.config))
+            overlay.add_layer("overrides", layer)
+        return overlay
+
+    @classmethod
+    def load_config(cls,
+                    base_path: Union[str, Path],
+                    dev_path: Optional[Union[str, Path]] = None,
+                    local_path: Optional[Union[str, Path]] = None,
+                    overrides: Optional[List[str]] = None
+                    ) -> Dict[str, Any]:
+        """Load and merge configuration from base and dev YAML files."""
+        return cls.build_overlay(
+            base_path, dev_path, local_path, overrides
+        ).config
 
     @classmethod
     def from_yaml(cls,
                   yaml_path: Union[str, Path],
-                  dev_yaml_path: Optional[Union[str, Path]] = None
+                  dev_yaml_path: Optional[Union[str, Path]] = None,
+                  local_yaml_path: Optional[Union[str, Path]] = None,
+                  overrides: Optional[List[str]] = None
                   ) -> "Experiment":
         """Create an Experiment instance from YAML files."""
-        config = cls.load_config(yaml_path, dev_yaml_path)
+        overlay = cls.build_overlay(
+            yaml_path, dev_yaml_path, local_yaml_path, overrides
+        )
+        config = overlay.config
 
         # Create connections map from the connections section
         connections_config = config.get('connections', [])
@@ -231,10 +284,8 @@ class Experiment:
             if isinstance(conn_name, str):
                 if conn_name in connections_map:
                     expanded_connections.append(
-                        deepcopy(
-                            connections_map[conn_name]
-                            )
-                        )
+                        copy(connections_map[conn_name])
+                    )
                 else:
                     raise ValueError(f"Connection {conn_name} not found")
             else:  # Already expanded connection
@@ -254,31 +305,44 @@ class Experiment:
             entry_point=config['entry_point'],
             connections=expanded_connections,
             env_vars=config['env_vars'],
-            evaluators=evaluators
+            evaluators=evaluators,
+            sweep=(
+                SweepConfig.from_dict(config['sweep'])
+                if config.get('sweep') else None
+            ),
+            config_overlay=overlay
         )
 
-    def resolve_variables(self) -> None:
-        """Resolve all variables in the experiment configuration."""
-        load_dotenv()
-        env_vars = dict(os.environ)
-
-        # Resolve connection variables in main experiment
+    def resolve_variables(
+        self,
+        env_vars: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Resolve all variables in the experiment and its evaluators.
+
+        The environment and .env file are read once for the whole tree.
+        Evaluators also see the experiment env vars, as they do when they
+        run. Every missing variable is reported in a single ValueError.
+        """
+        resolver = VariableResolver(env_vars)
         for conn in self.connections:
-            conn.resolve_variables(env_vars)
-
-        # Resolve experiment env vars
-        self.resolved_env_vars = {}
-
-        for env_var_dict in self.env_vars:
-            for key, value in env_var_dict.items():
-                if isinstance(value, str) and "${" in value:
-                    var_name = re.search(r'\${(.*)}', value).group(1)
-                    if var_name in env_vars:
-                        self.resolved_env_vars[key] = env_vars[var_name]
-                    else:
-                        raise ValueError(f"env var {var_name} not found")
-                else:
-                    self.resolved_env_vars[key] = value
+            conn.resolve_with(resolver, f"connections.{conn.name}.")
+        self.resolved_env_vars = resolver.resolve_env_vars(
+            self.env_vars, "env_vars"
+        )
+
+        evaluator_resolver = resolver.with_overlay(self.resolved_env_vars)
+        for evaluator in self.evaluators:
+            evaluator.resolve_with(
+                evaluator_resolver, f"evaluators.{evaluator.name}."
+            )
+        resolver.raise_missing()
+
+    def source_of(self, path: str) -> Optional[str]:
+        """Get the configuration layer that set the value at a dotted path."""
+        if self.config_overlay is None:
+            return None
+        return self.config_overlay.source_of(path)
 
     def get_evaluator(self, evaluator_name: str) -> Optional[Evaluator]:
         """Get evaluator configuration by name."""
@@ -304,9 +368,22 @@ class Experiment:
 def load_experiment(
     filename: Optional[str] = None,
     base_path: Optional[str] = None,
-    env: Optional[str] = None
+    env: Optional[str] = None,
+    cache_dir: Optional[str] = None,
+    overrides: Optional[List[str]] = None
 ) -> Experiment:
-    """Load an experiment configuration from a YAML file."""
+    """
+    Load an experiment configuration from a YAML file.
+
+    The configuration is layered as the base file, the env file
+    (``experiment.<env>.yaml``), an optional untracked local file
+    (``experiment.local.yaml``) and ``path=value`` overrides, each taking
+    precedence over the previous ones.
+
+    When ``cache_dir`` (or the EXPERIMENT_CACHE_DIR environment variable) is
+    set, the merged and validated configuration is cached there, keyed by the
+    content of the layers. Variables are resolved on every load.
+    """
     safe_base_path = base_path or ""
     experiment_file_name = filename or "experiment.yaml"
 
@@ -315,18 +392,40 @@ def load_experiment(
     if len(file_parts) != 2:  # noqa: PLR2004
         raise ValueError(f"Invalid experiment file '{experiment_file_name}'")
     env_experiment_file_name = f"{file_parts[0]}.{env}{file_parts[1]}"
+    local_experiment_file_name = f"{file_parts[0]}.local{file_parts[1]}"
 
     exp_file_path = os.path.join(safe_base_path, experiment_file_name)
     if not os.path.exists(exp_file_path):
         raise ValueError(f"Could not open experiment file {exp_file_path}")
 
     env_exp_file_path = os.path.join(safe_base_path, env_experiment_file_name)
-
-    # Load experiment configuration with optional dev override
-    experiment = Experiment.from_yaml(
-        exp_file_path,
-        env_exp_file_path  # Optional dev config
+    local_exp_file_path = os.path.join(
+        safe_base_path, local_experiment_file_name
     )
+    extra_layers = {}
+    if os.path.isfile(local_exp_file_path):
+        extra_layers["local_yaml_path"] = local_exp_file_path
+    if overrides:
+        extra_layers["overrides"] = list(overrides)
+
+    cache_dir = cache_dir or os.environ.get(CACHE_DIR_ENV_VAR)
+    experiment = None
+    if cache_dir:
+        key = cache_key(
+            [exp_file_path, env_exp_file_path, local_exp_file_path],
+            overrides or []
+        )
+        experiment = load_compiled(cache_dir, key)
+
+    if experiment is None:
+        # Load experiment configuration with optional dev override
+        experiment = Experiment.from_yaml(
+            exp_file_path,
+            env_exp_file_path,  # Optional dev config
+            **extra_layers
+        )
+        if cache_dir:
+            store_compiled(cache_dir, key, experiment)
 
     # Resolve all variables
     experiment.resolve_variables()
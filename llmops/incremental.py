@@ -0,0 +1,334 @@
+"""Incremental evaluation cache for target outputs and evaluator scores."""
+import ast
+import functools
+import hashlib
+import importlib.util
+import inspect
+import json
+import logging
+import os
+import sqlite3
+import sys
+import sysconfig
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from lib.fast_path.arithmetic import FAST_PATH_ENV_VAR
+from lib.few_shot.selector import (
+    BANK_ENV_VAR as FEW_SHOT_BANK_ENV_VAR,
+    BUDGET_ENV_VAR as FEW_SHOT_BUDGET_ENV_VAR,
+    DEFAULT_BANK_FILE as DEFAULT_FEW_SHOT_BANK,
+    K_ENV_VAR as FEW_SHOT_K_ENV_VAR
+)
+from lib.question_cache.near_duplicate import (
+    SIZE_ENV_VAR as QUESTION_CACHE_SIZE_ENV_VAR,
+    VERIFY_ENV_VAR as QUESTION_CACHE_VERIFY_ENV_VAR
+)
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH_ENV_VAR = "EVAL_CACHE_PATH"
+
+# Settings that change the output of the flows, part of every target
+# fingerprint. Keys and other secrets are left out on purpose.
+TARGET_ENV_VARS = (
+    "PROMPTY_FILE",
+    "AZURE_AI_CHAT_ENDPOINT",
+    "GPT4O_DEPLOYMENT_NAME",
+    "AGENT_TRANSCRIPT_MAX_CHARS",
+    FEW_SHOT_BANK_ENV_VAR,
+    FEW_SHOT_K_ENV_VAR,
+    FEW_SHOT_BUDGET_ENV_VAR,
+    FAST_PATH_ENV_VAR,
+    QUESTION_CACHE_SIZE_ENV_VAR,
+    QUESTION_CACHE_VERIFY_ENV_VAR,
+)
+
+# Modules installed here are versioned by the environment, not the repo
+_LIBRARY_PATHS = tuple(sorted({
+    os.path.join(os.path.abspath(sysconfig.get_paths()[name]), "")
+    for name in ("stdlib", "platstdlib", "purelib", "platlib")
+}))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS target_outputs (
+    target_fp TEXT NOT NULL,
+    row_fp TEXT NOT NULL,
+    output TEXT NOT NULL,
+    PRIMARY KEY (target_fp, row_fp)
+);
+CREATE TABLE IF NOT EXISTS scores (
+    evaluator_fp TEXT NOT NULL,
+    row_fp TEXT NOT NULL,
+    scores TEXT NOT NULL,
+    PRIMARY KEY (evaluator_fp, row_fp)
+)
+"""
+
+
+def _digest(*parts: Any) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = json.dumps(part, sort_keys=True, default=str).encode("utf-8")
+        digest.update(hashlib.sha256(part).digest())
+    return digest.hexdigest()
+
+
+def _source_of(obj: Any) -> bytes:
+    """Return the source of the module that defines a function or class."""
+    target = obj if inspect.isfunction(obj) or inspect.isclass(obj) else type(obj)
+    target = inspect.unwrap(target)
+    try:
+        with open(inspect.getfile(target), "rb") as f:
+            return f.read()
+    except (OSError, TypeError):
+        # Built-ins and interactively defined objects have no source file
+        return repr(target).encode("utf-8")
+
+
+def _imported_names(path: str, package: Optional[str]) -> Iterator[str]:
+    """Yield the names of the modules, and their parents, a file imports."""
+    with open(path, "rb") as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            try:
+                base = importlib.util.resolve_name(
+                    "." * node.level + (node.module or ""), package
+                ) if node.level else node.module
+            except (ImportError, ValueError):
+                continue
+            # Imported names may be submodules as well as attributes
+            names = [base] + [f"{base}.{alias.name}" for alias in node.names]
+        else:
+            continue
+        for name in names:
+            parts = name.split(".")
+            for end in range(1, len(parts) + 1):
+                yield ".".join(parts[:end])
+
+
+def _local_modules(obj: Any) -> Dict[str, bytes]:
+    """
+    Return the source of the local modules a function or class depends on.
+
+    Starting from the module that defines ``obj``, imports are followed
+    transitively through every module that is not part of the standard
+    library or an installed package, such as the ``lib`` helpers of a flow.
+    """
+    target = obj if inspect.isfunction(obj) or inspect.isclass(obj) else type(obj)
+    target = inspect.unwrap(target)
+    try:
+        start = os.path.abspath(inspect.getfile(target))
+    except (OSError, TypeError):
+        return {}
+    module = sys.modules.get(getattr(target, "__module__", None))
+    pending = [(start, getattr(module, "__package__", None))]
+    sources: Dict[str, bytes] = {}
+    seen = {start}
+    while pending:
+        path, package = pending.pop()
+        try:
+            names = set(_imported_names(path, package))
+        except (OSError, SyntaxError, ValueError):
+            continue
+        for name in sorted(names):
+            try:
+                spec = importlib.util.find_spec(name)
+            except (ImportError, ValueError):
+                continue
+            origin = spec and spec.origin and os.path.abspath(spec.origin)
+            if (
+                not origin or not origin.endswith(".py") or origin in seen
+                or origin.startswith(_LIBRARY_PATHS)
+            ):
+                continue
+            seen.add(origin)
+            sources[name] = _file_content(origin)
+            pending.append((origin, spec.parent))
+    return sources
+
+
+def _file_content(path: str) -> bytes:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return b"missing"
+
+
+def fingerprint_target(
+    target: Callable,
+    files: Iterable[str] = (),
+    params: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Fingerprint a target by its code, extra files, settings and parameters.
+
+    The code is the module source of the target and of the local modules it
+    imports, directly or not. The settings are the TARGET_ENV_VARS values.
+    Pass the prompty file in ``files`` and other parameters in ``params``
+    so that editing either invalidates the cached outputs.
+    """
+    return _digest(
+        _source_of(target),
+        _local_modules(target),
+        *(_file_content(path) for path in files),
+        {name: os.environ.get(name) for name in TARGET_ENV_VARS},
+        params or {}
+    )
+
+
+def fingerprint_evaluator(
+    evaluator: Callable,
+    column_mapping: Optional[Dict[str, str]] = None
+) -> str:
+    """Fingerprint an evaluator by its code and column mapping."""
+    return _digest(
+        _source_of(evaluator), _local_modules(evaluator), column_mapping or {}
+    )
+
+
+def fingerprint_row(row: Dict[str, Any]) -> str:
+    """Fingerprint a data row by its content."""
+    return _digest(row)
+
+
+class ResultCache:
+    """
+    SQLite store of target outputs and evaluator scores per row.
+
+    Outputs are keyed by the target and input row fingerprints. Scores are
+    keyed by the evaluator fingerprint and a row fingerprint that covers
+    the data row and the target output, so a changed output is re-scored.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Open the cache database at ``path``, creating it if needed."""
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=60)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _get_many(
+        self, table: str, column: str, key_column: str, key: str,
+        row_fps: List[str]
+    ) -> Dict[str, Any]:
+        found = {}
+        with self._connect() as conn:
+            # Stay under the SQLite host parameter limit
+            for start in range(0, len(row_fps), 500):
+                chunk = row_fps[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for row_fp, value in conn.execute(
+                    f"SELECT row_fp, {column} FROM {table} "
+                    f"WHERE {key_column} = ? AND row_fp IN ({placeholders})",
+                    [key, *chunk]
+                ):
+                    found[row_fp] = json.loads(value)
+        return found
+
+    def get_outputs(self, target_fp: str, row_fps: List[str]) -> Dict[str, Any]:
+        """Return the cached target outputs of the given rows."""
+        return self._get_many(
+            "target_outputs", "output", "target_fp", target_fp, row_fps
+        )
+
+    def put_outputs(self, target_fp: str, outputs: Dict[str, Any]) -> None:
+        """Store target outputs keyed by row fingerprint."""
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO target_outputs VALUES (?, ?, ?)",
+                [(target_fp, row_fp, json.dumps(output, default=str))
+                 for row_fp, output in outputs.items()]
+            )
+
+    def get_scores(self, evaluator_fp: str, row_fps: List[str]) -> Dict[str, Any]:
+        """Return the cached evaluator scores of the given rows."""
+        return self._get_many(
+            "scores", "scores", "evaluator_fp", evaluator_fp, row_fps
+        )
+
+    def put_scores(self, evaluator_fp: str, scores: Dict[str, Any]) -> None:
+        """Store evaluator scores keyed by row fingerprint."""
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO scores VALUES (?, ?, ?)",
+                [(evaluator_fp, row_fp, json.dumps(value, default=str))
+                 for row_fp, value in scores.items()]
+            )
+
+
+def prompty_files(target: Callable) -> List[str]:
+    """
+    Return the possible paths of the prompty file a flow target uses.
+
+    Flows read PROMPTY_FILE and the few-shot bank of FEW_SHOT_FILE relative
+    to the working directory, which is the flow folder when deployed, so
+    both locations are fingerprinted.
+    """
+    prompty_file = os.environ.get("PROMPTY_FILE")
+    if not prompty_file:
+        return []
+    flow_dir = os.path.dirname(inspect.getfile(inspect.unwrap(target)))
+    files = []
+    for name in (prompty_file, os.environ.get(FEW_SHOT_BANK_ENV_VAR, DEFAULT_FEW_SHOT_BANK)):
+        files += [name, os.path.join(flow_dir, name)]
+    return files
+
+
+def incremental_target(
+    target: Callable,
+    files: Optional[Iterable[str]] = None,
+    params: Optional[Dict[str, Any]] = None,
+    cache_path: Optional[str] = None
+) -> Callable:
+    """
+    Wrap a target so that unchanged rows reuse their previous output.
+
+    The cache path defaults to the EVAL_CACHE_PATH environment variable.
+    Without a cache path the target is returned unchanged. The wrapper keeps
+    the target signature, so it can be passed to ``evaluate(target=...)``.
+    Files default to the PROMPTY_FILE prompty and the few-shot bank. The
+    fingerprint also covers the local modules the target imports and the
+    TARGET_ENV_VARS settings, see ``fingerprint_target``.
+    """
+    cache_path = cache_path or os.environ.get(CACHE_PATH_ENV_VAR)
+    if not cache_path:
+        return target
+
+    if files is None:
+        files = prompty_files(target)
+    cache = ResultCache(cache_path)
+    target_fp = fingerprint_target(target, files, params)
+    signature = inspect.signature(target)
+
+    @functools.wraps(target)
+    def cached(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        row_fp = fingerprint_row(bound.arguments)
+        found = cache.get_outputs(target_fp, [row_fp])
+        if row_fp in found:
+            cached.hits += 1
+            return found[row_fp]
+        cached.misses += 1
+        output = target(*args, **kwargs)
+        cache.put_outputs(target_fp, {row_fp: output})
+        return output
+
+    cached.hits = 0
+    cached.misses = 0
+    return cached
@@ -0,0 +1,308 @@
+"""Local evaluation runner with support for batch evaluators."""
+import inspect
+import json
+import logging
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from llmops.incremental import (
+    ResultCache,
+    fingerprint_evaluator,
+    fingerprint_row,
+    fingerprint_target
+)
+from llmops.run_metrics import add_usage_metrics
+
+logger = logging.getLogger(__name__)
+
+_MAPPING_PATTERN = re.compile(r"^\$\{(data|target)\.([^}]+)\}$")
+
+
+def load_rows(data_path: str) -> List[Dict[str, Any]]:
+    """Load the rows of a JSONL dataset."""
+    with open(data_path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def evaluator_inputs(evaluator: Callable) -> List[str]:
+    """Return the named inputs an evaluator accepts."""
+    call = evaluator if inspect.isfunction(evaluator) else evaluator.__call__
+    return [
+        name for name, param in inspect.signature(call).parameters.items()
+        if param.kind in (param.KEYWORD_ONLY, param.POSITIONAL_OR_KEYWORD)
+        and name != "self"
+    ]
+
+
+def build_columns(
+    rows: List[Dict[str, Any]],
+    target_outputs: Optional[List[Dict[str, Any]]],
+    inputs: List[str],
+    column_mapping: Optional[Dict[str, str]] = None
+) -> Dict[str, List[Any]]:
+    """
+    Build the input columns of an evaluator.
+
+    Mappings use the evaluate() syntax, ``${data.<column>}`` or
+    ``${target.<output>}``. Inputs without a mapping are taken from the target
+    output of the same name, or else from the data column of the same name.
+    """
+    column_mapping = column_mapping or {}
+    columns = {}
+    for name in inputs:
+        source = column_mapping.get(name)
+        if source is None:
+            if target_outputs and name in target_outputs[0]:
+                source = f"${{target.{name}}}"
+            elif rows and name in rows[0]:
+                source = f"${{data.{name}}}"
+            else:
+                continue
+
+        match = _MAPPING_PATTERN.match(source)
+        if not match:
+            raise ValueError(f"Invalid column mapping '{source}' for {name}")
+        origin, key = match.groups()
+        records = target_outputs if origin == "target" else rows
+        if records is None:
+            raise ValueError(f"Column mapping '{source}' requires a target")
+        columns[name] = [record.get(key) for record in records]
+    return columns
+
+
+def score_columns(
+    evaluator: Callable,
+    columns: Dict[str, Sequence],
+    row_count: int
+) -> Dict[str, np.ndarray]:
+    """
+    Score columns with an evaluator.
+
+    Evaluators that implement ``evaluate_batch(columns)`` receive the whole
+    columns and return one array per metric. Other evaluators are called
+    once per row.
+    """
+    if hasattr(evaluator, "evaluate_batch"):
+        scores = evaluator.evaluate_batch(columns)
+        return {name: np.asarray(values) for name, values in scores.items()}
+
+    per_row = [
+        evaluator(**{name: values[i] for name, values in columns.items()})
+        for i in range(row_count)
+    ]
+    metric_names = []
+    for scores in per_row:
+        for name in scores:
+            if name not in metric_names:
+                metric_names.append(name)
+    return {
+        name: np.asarray([scores.get(name) for scores in per_row])
+        for name in metric_names
+    }
+
+
+def _cached_outputs(
+    target: Callable,
+    inputs: List[Dict[str, Any]],
+    cache: ResultCache,
+    target_files: Sequence[str]
+) -> List[Any]:
+    """Call the target only for inputs without a cached output."""
+    target_fp = fingerprint_target(target, target_files)
+    row_fps = [fingerprint_row(row_inputs) for row_inputs in inputs]
+    outputs = cache.get_outputs(target_fp, row_fps)
+    computed = {}
+    for row_fp, row_inputs in zip(row_fps, inputs):
+        if row_fp not in outputs and row_fp not in computed:
+            computed[row_fp] = target(**row_inputs)
+    if computed:
+        cache.put_outputs(target_fp, computed)
+        outputs.update(computed)
+    logger.info(
+        "Target outputs: %d cached, %d computed",
+        len(row_fps) - len(computed), len(computed)
+    )
+    return [outputs[row_fp] for row_fp in row_fps]
+
+
+def _cached_scores(
+    evaluator: Callable,
+    columns: Dict[str, Sequence],
+    row_fps: List[str],
+    cache: ResultCache,
+    evaluator_fp: str
+) -> Dict[str, np.ndarray]:
+    """Score only the rows without cached scores for this evaluator."""
+    found = cache.get_scores(evaluator_fp, row_fps)
+    missing = [i for i, row_fp in enumerate(row_fps) if row_fp not in found]
+    if missing:
+        subset = {
+            name: [values[i] for i in missing]
+            for name, values in columns.items()
+        }
+        computed = {
+            metric: values.tolist()
+            for metric, values in score_columns(
+                evaluator, subset, len(missing)
+            ).items()
+        }
+        new_scores = {
+            row_fps[i]: {metric: values[j] for metric, values in computed.items()}
+            for j, i in enumerate(missing)
+        }
+        cache.put_scores(evaluator_fp, new_scores)
+        found.update(new_scores)
+    logger.info(
+        "Evaluator scores: %d cached, %d computed",
+        len(row_fps) - len(missing), len(missing)
+    )
+
+    metric_names = []
+    for row_fp in row_fps:
+        for metric in found[row_fp]:
+            if metric not in metric_names:
+                metric_names.append(metric)
+    return {
+        metric: np.asarray([found[row_fp].get(metric) for row_fp in row_fps])
+        for metric in metric_names
+    }
+
+
+def aggregate_scores(scores: Dict[str, Dict[str, np.ndarray]]) -> Dict[str, float]:
+    """Average every numeric metric column, like evaluate() does."""
+    metrics = {}
+    for evaluator_name, metric_columns in scores.items():
+        for metric_name, values in metric_columns.items():
+            if values.dtype.kind in "iuf" and values.size:
+                metrics[f"{evaluator_name}.{metric_name}"] = float(
+                    np.nanmean(values.astype(np.float64))
+                )
+    return metrics
+
+
+def evaluate(
+    data: str,
+    evaluators: Dict[str, Callable],
+    target: Optional[Callable] = None,
+    evaluator_config: Optional[Dict[str, Dict[str, Any]]] = None,
+    evaluation_name: Optional[str] = None,
+    output_path: Optional[str] = None,
+    cache: Optional[ResultCache] = None,
+    target_files: Sequence[str] = ()
+) -> Dict[str, Any]:
+    """
+    Evaluate a dataset locally, with results shaped like Azure AI evaluations.
+
+    With a ``cache``, rows whose target and evaluator fingerprints match a
+    previous run reuse the stored outputs and scores, and only changed rows
+    are computed.
+
+    Args:
+        data (str): Path to the JSONL dataset
+        evaluators (dict): Evaluators keyed by name
+        target (callable): Optional target called with each row's inputs
+        evaluator_config (dict): Column mappings per evaluator name or
+            ``default``, as ``{"column_mapping": {...}}``
+        evaluation_name (str): Name used in the log output
+        output_path (str): Optional path the result is written to
+        cache (ResultCache): Optional cache of previous outputs and scores
+        target_files (list): Files the target depends on, such as its
+            prompty file, included in the target fingerprint
+
+    Returns:
+        dict: ``rows`` with inputs, outputs and scores, and aggregate ``metrics``
+    """
+    rows = load_rows(data)
+    logger.info(
+        "Evaluating %d rows for %s", len(rows), evaluation_name or data
+    )
+
+    target_outputs = None
+    if target is not None:
+        target_inputs = set(inspect.signature(target).parameters)
+        inputs = [
+            {k: v for k, v in row.items() if k in target_inputs}
+            for row in rows
+        ]
+        if cache is None:
+            target_outputs = [target(**row_inputs) for row_inputs in inputs]
+        else:
+            target_outputs = _cached_outputs(
+                target, inputs, cache, target_files
+            )
+
+    result = score_outputs(
+        rows, target_outputs, evaluators, evaluator_config, cache
+    )
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, default=str)
+    return result
+
+
+def score_outputs(
+    rows: List[Dict[str, Any]],
+    target_outputs: Optional[List[Dict[str, Any]]],
+    evaluators: Dict[str, Callable],
+    evaluator_config: Optional[Dict[str, Dict[str, Any]]] = None,
+    cache: Optional[ResultCache] = None
+) -> Dict[str, Any]:
+    """
+    Score dataset rows and target outputs that were already computed.
+
+    Returns:
+        dict: ``rows`` with inputs, outputs and scores, and aggregate ``metrics``
+    """
+    evaluator_config = evaluator_config or {}
+    row_fps = None
+    if cache is not None:
+        row_fps = [
+            fingerprint_row({
+                "data": row,
+                "target": target_outputs[i] if target_outputs else None
+            })
+            for i, row in enumerate(rows)
+        ]
+
+    scores = {}
+    for name, evaluator in evaluators.items():
+        config = evaluator_config.get(name, evaluator_config.get("default", {}))
+        columns = build_columns(
+            rows,
+            target_outputs,
+            evaluator_inputs(evaluator),
+            config.get("column_mapping")
+        )
+        if cache is None:
+            scores[name] = score_columns(evaluator, columns, len(rows))
+        else:
+            scores[name] = _cached_scores(
+                evaluator,
+                columns,
+                row_fps,
+                cache,
+                fingerprint_evaluator(evaluator, config.get("column_mapping"))
+            )
+
+    result_rows = []
+    for i, row in enumerate(rows):
+        result_row = {f"inputs.{key}": value for key, value in row.items()}
+        if target_outputs is not None:
+            result_row.update({
+                f"outputs.{key}": value
+                for key, value in target_outputs[i].items()
+            })
+        result_rows.append(result_row)
+    for evaluator_name, metric_columns in scores.items():
+        for metric_name, values in metric_columns.items():
+            column = f"outputs.{evaluator_name}.{metric_name}"
+            for result_row, value in zip(result_rows, values.tolist()):
+                result_row[column] = value
+
+    return add_usage_metrics({
+        "rows": result_rows,
+        "metrics": aggregate_scores(scores),
+        "studio_url": None
+    })
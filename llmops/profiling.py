@@ -0,0 +1,115 @@
+"""Profiling of evaluation runs with cProfile or tracemalloc."""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("cpu", "wall", "memory")
+
+# Sort order of the cProfile summaries: self time finds CPU hot spots,
+# cumulative time finds the calls a run spends its wall time waiting in
+_SORT_KEYS = {"cpu": "tottime", "wall": "cumulative"}
+
+
+def profile_dir(report_dir: Optional[str]) -> str:
+    """Return the directory profiles are written to for a report dir."""
+    return os.path.join(report_dir or ".", "profiles")
+
+
+def _safe_label(label: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", label)
+
+
+def _write_summary(path: str, header: str, body: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(header + "\n\n" + body)
+
+
+@contextmanager
+def profiled(
+    mode: Optional[str],
+    label: str,
+    output_dir: str,
+    top_n: int = 30
+) -> Iterator[None]:
+    """
+    Profile the wrapped block and write its profile and a top-N summary.
+
+    ``cpu`` and ``wall`` run cProfile with a CPU or wall clock timer and
+    write ``<label>.<mode>.prof``, which ``pstats`` or snakeviz can load.
+    ``memory`` traces allocations with tracemalloc and writes the snapshot
+    to ``<label>.memory.tracemalloc``. Every mode also writes the top
+    ``top_n`` entries to ``<label>.<mode>.txt``. Without a mode the block
+    runs unprofiled.
+
+    cProfile only sees the calling thread, so work an evaluation function
+    hands to a thread pool shows up as time spent waiting on it.
+
+    Raises:
+        ValueError: If the mode is not one of PROFILE_MODES
+    """
+    if not mode:
+        yield
+        return
+    if mode not in PROFILE_MODES:
+        raise ValueError(
+            f"Unknown profile mode '{mode}', expected one of "
+            f"{', '.join(PROFILE_MODES)}"
+        )
+
+    os.makedirs(output_dir, exist_ok=True)
+    base = os.path.join(output_dir, f"{_safe_label(label)}.{mode}")
+    start = time.perf_counter()
+
+    if mode == "memory":
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            if not was_tracing:
+                tracemalloc.stop()
+            snapshot.dump(f"{base}.tracemalloc")
+            lines = [
+                str(stat)
+                for stat in snapshot.statistics("lineno")[:top_n]
+            ]
+            _write_summary(
+                f"{base}.txt",
+                f"{label}: memory profile, {time.perf_counter() - start:.3f}s,"
+                f" current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB",
+                "\n".join(lines) + "\n"
+            )
+            logger.info("Wrote memory profile of %s to %s.txt", label, base)
+        return
+
+    timer = time.process_time if mode == "cpu" else time.perf_counter
+    profiler = cProfile.Profile(timer)
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(f"{base}.prof")
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats(
+            _SORT_KEYS[mode]
+        ).print_stats(top_n)
+        _write_summary(
+            f"{base}.txt",
+            f"{label}: {mode} profile, {time.perf_counter() - start:.3f}s",
+            stream.getvalue()
+        )
+        logger.info("Wrote %s profile of %s to %s.prof", mode, label, base)
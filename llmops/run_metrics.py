@@ -0,0 +1,72 @@
+"""Run-level aggregates of the per-row usage columns of flows."""
+import json
+import os
+from typing import Any, Dict, List
+
+import numpy as np
+
+from lib.flow_metrics.usage import USAGE_COLUMNS
+from llmops.deadlines import TIMED_OUT_COLUMN
+
+# Columns whose run total is also reported
+_SUMMED_COLUMNS = ("prompt_tokens", "completion_tokens", "retries")
+# Boolean columns reported as the share of rows where they are true
+_RATE_COLUMNS = ("fast_path", TIMED_OUT_COLUMN)
+
+
+def usage_metrics(rows: List[Dict[str, Any]]) -> Dict[str, float]:
+    """
+    Aggregate the ``outputs.<usage column>`` values of evaluation rows.
+
+    Returns:
+        dict: ``usage.<column>.p50`` and ``usage.<column>.p95`` for every
+            usage column present, plus ``usage.<column>.total`` for token and
+            retry counts, or ``usage.<column>.rate`` for boolean columns
+    """
+    metrics = {}
+    for column in USAGE_COLUMNS + (TIMED_OUT_COLUMN,):
+        key = f"outputs.{column}"
+        if column in _RATE_COLUMNS:
+            flags = [row[key] for row in rows if isinstance(row.get(key), bool)]
+            if flags:
+                metrics[f"usage.{column}.rate"] = sum(flags) / len(flags)
+            continue
+        values = [
+            row[key] for row in rows
+            if isinstance(row.get(key), (int, float))
+            and not isinstance(row.get(key), bool)
+        ]
+        if not values:
+            continue
+        array = np.asarray(values, dtype=np.float64)
+        p50, p95 = np.percentile(array, [50, 95])
+        metrics[f"usage.{column}.p50"] = float(p50)
+        metrics[f"usage.{column}.p95"] = float(p95)
+        if column in _SUMMED_COLUMNS:
+            metrics[f"usage.{column}.total"] = float(array.sum())
+    return metrics
+
+
+def add_usage_metrics(result: Any) -> Any:
+    """Add the usage aggregates of an evaluate() result to its metrics."""
+    if isinstance(result, dict) and result.get("rows"):
+        metrics = result.get("metrics")
+        if metrics is None:
+            metrics = result["metrics"] = {}
+        metrics.update(usage_metrics(result["rows"]))
+    return result
+
+
+def write_metrics(result: Any, output_path: str) -> None:
+    """
+    Write the metrics of an evaluate() result, usage aggregates included.
+
+    evaluate() writes its output file before the usage aggregates are added,
+    so they are written to a separate file next to it.
+    """
+    metrics = result.get("metrics") if isinstance(result, dict) else None
+    if not metrics:
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump({"metrics": metrics}, f, indent=2, default=str)
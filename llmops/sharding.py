@@ -0,0 +1,226 @@
+"""Dataset sharding and shard result merging module."""
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from llmops.run_metrics import add_usage_metrics
+
+logger = logging.getLogger(__name__)
+
+SHARD_TAG_PATTERN = re.compile(r"_shard(\d+)of(\d+)")
+
+
+def validate_shard(num_shards: int, shard_index: int) -> None:
+    """Validate a shard specification."""
+    if num_shards < 1:
+        raise ValueError(f"num_shards must be >= 1, got {num_shards}")
+    if not 0 <= shard_index < num_shards:
+        raise ValueError(
+            f"shard_index must be in [0, {num_shards - 1}], got {shard_index}"
+        )
+
+
+def shard_tag(shard_index: int, num_shards: int) -> str:
+    """Return the tag used to name shard data and result files."""
+    return f"shard{shard_index}of{num_shards}"
+
+
+def shard_for_row(line: str, num_shards: int) -> int:
+    """
+    Return the shard a dataset row belongs to.
+
+    The row is hashed on its raw JSON line, so the assignment is the same on
+    every runner regardless of Python hash seeds or row order.
+    """
+    digest = hashlib.sha1(line.strip().encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % num_shards
+
+
+def write_shard(
+    data_path: str,
+    output_dir: str,
+    num_shards: int,
+    shard_index: int
+) -> str:
+    """
+    Write the rows of a JSONL dataset that belong to one shard.
+
+    Args:
+        data_path (str): Path to the source JSONL dataset
+        output_dir (str): Folder the shard file is written to
+        num_shards (int): Total number of shards
+        shard_index (int): Index of the shard to write
+
+    Returns:
+        str: Path of the written shard file
+    """
+    validate_shard(num_shards, shard_index)
+    os.makedirs(output_dir, exist_ok=True)
+
+    base_name, extension = os.path.splitext(os.path.basename(data_path))
+    shard_path = os.path.join(
+        output_dir,
+        f"{base_name}_{shard_tag(shard_index, num_shards)}{extension}"
+    )
+
+    row_count = 0
+    with open(data_path, "r", encoding="utf-8") as source, \
+            open(shard_path, "w", encoding="utf-8") as target:
+        for line in source:
+            if not line.strip():
+                continue
+            if shard_for_row(line, num_shards) == shard_index:
+                target.write(line if line.endswith("\n") else line + "\n")
+                row_count += 1
+
+    logger.info(
+        "Wrote %d rows of %s to shard file %s", row_count, data_path, shard_path
+    )
+    return shard_path
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def aggregate_metrics(results: List[Dict[str, Any]]) -> Dict[str, float]:
+    """
+    Aggregate the metrics of several evaluate() results.
+
+    Metrics backed by a per-row ``outputs.<metric>`` column are recomputed as
+    the mean over all rows, which is what evaluate() reports for a single run.
+    Metrics without a row column are averaged weighted by row count.
+    """
+    metric_names = []
+    for result in results:
+        for name in (result.get("metrics") or {}):
+            if name not in metric_names:
+                metric_names.append(name)
+
+    metrics = {}
+    for name in metric_names:
+        column = f"outputs.{name}"
+        values = [
+            row[column]
+            for result in results
+            for row in result.get("rows") or []
+            if _is_number(row.get(column))
+        ]
+        if values:
+            metrics[name] = sum(values) / len(values)
+            continue
+
+        weighted_total = 0.0
+        weight = 0
+        for result in results:
+            value = (result.get("metrics") or {}).get(name)
+            if _is_number(value):
+                rows = max(len(result.get("rows") or []), 1)
+                weighted_total += value * rows
+                weight += rows
+        if weight:
+            metrics[name] = weighted_total / weight
+    return metrics
+
+
+def merge_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge several evaluate() results into a single result."""
+    rows = []
+    for result in results:
+        rows.extend(result.get("rows") or [])
+    # Percentiles cannot be averaged across shards, recompute them
+    return add_usage_metrics({
+        "rows": rows,
+        "metrics": aggregate_metrics(results),
+        "studio_url": None
+    })
+
+
+def merge_result_files(
+    paths: List[str],
+    output_path: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Merge evaluate() output files of the shards of one evaluation.
+
+    Args:
+        paths (list): Paths of the per-shard evaluate() output files
+        output_path (str): Optional path the merged result is written to
+
+    Returns:
+        dict: Merged result with ``rows`` and aggregate ``metrics``
+    """
+    shard_counts = set()
+    shard_indexes = set()
+    for path in paths:
+        match = SHARD_TAG_PATTERN.search(os.path.basename(path))
+        if match:
+            shard_indexes.add(int(match.group(1)))
+            shard_counts.add(int(match.group(2)))
+
+    if len(shard_counts) > 1:
+        raise ValueError(f"Shard files use different shard counts: {paths}")
+    if shard_counts:
+        missing = set(range(shard_counts.pop())) - shard_indexes
+        if missing:
+            raise ValueError(
+                f"Missing shard results for shard(s) {sorted(missing)}"
+            )
+
+    results = []
+    for path in sorted(paths):
+        with open(path, "r", encoding="utf-8") as f:
+            results.append(json.load(f))
+
+    merged = merge_results(results)
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(merged, f, indent=2)
+        logger.info("Wrote merged result to %s", output_path)
+    return merged
+
+
+def merge_report_dir(report_dir: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Merge every group of shard result files found in a report folder.
+
+    Files are grouped by their name with the shard tag removed, and each group
+    is written next to its shards with ``merged`` in place of the shard tag.
+
+    Returns:
+        dict: Merged results keyed by output file path
+    """
+    groups = defaultdict(list)
+    for path in glob.glob(os.path.join(report_dir, "*.json")):
+        if SHARD_TAG_PATTERN.search(os.path.basename(path)):
+            merged_name = SHARD_TAG_PATTERN.sub(
+                "_merged", os.path.basename(path)
+            )
+            groups[os.path.join(report_dir, merged_name)].append(path)
+
+    merged = {}
+    for output_path, paths in sorted(groups.items()):
+        logger.info("Merging %d shard results into %s", len(paths), output_path)
+        merged[output_path] = merge_result_files(paths, output_path)
+    return merged
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("merge_shards")
+    parser.add_argument(
+        "--report_dir",
+        type=str,
+        required=True,
+        help="folder containing the per-shard evaluation outputs",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    for merged_path, merged_result in merge_report_dir(args.report_dir).items():
+        print(f"{merged_path}: {merged_result['metrics']}")
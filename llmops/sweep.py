@@ -0,0 +1,224 @@
+"""Experiment sweep module."""
+import importlib
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from llmops.deadlines import deadline_target
+from llmops.evaluator_registry import module_path_for
+from llmops.experiment import DatasetMapping, Experiment
+from llmops.local_eval import load_rows, score_outputs
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Space calls evenly so they stay under a number of requests per minute."""
+
+    def __init__(self, requests_per_minute: Optional[float] = None) -> None:
+        """Create a limiter, or a no-op limiter without a rate."""
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self) -> None:
+        """Wait for the next free request slot."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def load_entry_point(entry_point: str) -> Any:
+    """Import the object named by a ``module.path:attribute`` entry point."""
+    module_path, separator, attribute = entry_point.partition(":")
+    if not separator:
+        raise ValueError(
+            f"Invalid entry point '{entry_point}', expected module.path:attribute"
+        )
+    return getattr(importlib.import_module(module_path), attribute)
+
+
+def load_target(base_path: str, experiment: Experiment) -> Callable:
+    """Import the flow function named by the experiment entry point."""
+    module_name, _, function_name = experiment.entry_point.partition(":")
+    file_path = os.path.join(base_path or "", experiment.flow, module_name + ".py")
+    return load_entry_point(f"{module_path_for(file_path)}:{function_name}")
+
+
+def variant_name(variant: Dict[str, Any]) -> str:
+    """Return a short display name of a sweep variant."""
+    return ", ".join(f"{key}={value}" for key, value in variant.items()) or "default"
+
+
+def sweep_datasets(experiment: Experiment) -> Dict[str, List[DatasetMapping]]:
+    """
+    Return the datasets each sweep evaluator declares in the experiment.
+
+    Sweep evaluators are named after the experiment evaluators they stand in
+    for, and are scored on that evaluator's datasets with its mappings.
+
+    Raises:
+        ValueError: If a sweep evaluator is not an experiment evaluator
+    """
+    declared = {evaluator.name: evaluator for evaluator in experiment.evaluators}
+    unknown = set(experiment.sweep.evaluators) - set(declared)
+    if unknown:
+        raise ValueError(
+            f"Sweep evaluators {', '.join(sorted(unknown))} are not "
+            f"evaluators of experiment {experiment.name}"
+        )
+    return {
+        name: declared[name].datasets for name in experiment.sweep.evaluators
+    }
+
+
+def format_table(records: List[Dict[str, Any]]) -> str:
+    """Format sweep records as a markdown comparison table."""
+    metric_columns = []
+    for record in records:
+        for column in record["metrics"]:
+            if column not in metric_columns:
+                metric_columns.append(column)
+
+    header = ["variant"] + metric_columns + ["errors", "llm_seconds"]
+    lines = [
+        "| " + " | ".join(header) + " |",
+        "|" + "|".join(" --- " for _ in header) + "|",
+    ]
+    for record in records:
+        values = [record["variant"]]
+        values += [
+            f"{record['metrics'][column]:.4f}"
+            if column in record["metrics"] else ""
+            for column in metric_columns
+        ]
+        values += [str(record["errors"]), f"{record['llm_seconds']:.2f}"]
+        lines.append("| " + " | ".join(values) + " |")
+    return "\n".join(lines)
+
+
+def run_sweep(
+    experiment: Experiment,
+    base_path: str,
+    report_dir: Optional[str] = None,
+    target: Optional[Callable] = None
+) -> Dict[str, Any]:
+    """
+    Evaluate every variant of the experiment sweep in one run.
+
+    Each sweep evaluator scores the datasets of the experiment evaluator of
+    the same name, with its mappings. Each dataset source is loaded and run
+    once, and the target calls of all variants share one thread pool of
+    ``max_concurrency`` workers and one rate limiter.
+    Variants are passed to the target as ``prompty_file``, ``model`` and
+    ``temperature`` arguments, so the target must accept the swept ones.
+
+    Returns:
+        dict: ``variants`` with the metrics of each variant, and the
+            comparison ``table`` in markdown
+    """
+    sweep = experiment.sweep
+    if sweep is None:
+        raise ValueError(f"Experiment {experiment.name} has no sweep section")
+
+    # Rows still time out at the run deadline of prepare_and_execute
+    target = deadline_target(target or load_target(base_path, experiment))
+    target_params = set(inspect.signature(target).parameters)
+    variants = sweep.variants()
+    unsupported = {key for variant in variants for key in variant} - target_params
+    if unsupported:
+        raise ValueError(
+            f"Target {experiment.entry_point} does not accept sweep "
+            f"arguments: {', '.join(sorted(unsupported))}"
+        )
+
+    evaluators = {
+        name: load_entry_point(entry_point)()
+        for name, entry_point in sweep.evaluators.items()
+    }
+    datasets = sweep_datasets(experiment)
+    rows_by_source = {}
+    for evaluator_datasets in datasets.values():
+        for dataset in evaluator_datasets:
+            if dataset.source not in rows_by_source:
+                rows_by_source[dataset.source] = load_rows(
+                    os.path.join(base_path or "", dataset.source)
+                )
+    limiter = RateLimiter(sweep.requests_per_minute)
+
+    def call_target(row: Dict[str, Any], variant: Dict[str, Any]) -> Tuple[Any, float]:
+        inputs = {k: v for k, v in row.items() if k in target_params}
+        limiter.acquire()
+        start = time.perf_counter()
+        try:
+            return target(**inputs, **variant), time.perf_counter() - start
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error("Sweep target call failed: %s", str(e))
+            return e, time.perf_counter() - start
+
+    logger.info(
+        "Sweeping %d variants over %d datasets with %d workers",
+        len(variants), len(rows_by_source), sweep.max_concurrency
+    )
+    with ThreadPoolExecutor(max_workers=sweep.max_concurrency) as pool:
+        futures = {
+            (source, index): [
+                pool.submit(call_target, row, variant) for row in rows
+            ]
+            for source, rows in rows_by_source.items()
+            for index, variant in enumerate(variants)
+        }
+        calls = {key: [f.result() for f in batch] for key, batch in futures.items()}
+
+    records = []
+    for index, variant in enumerate(variants):
+        record = {
+            "variant": variant_name(variant),
+            "params": variant,
+            "metrics": {},
+            "errors": 0,
+            "llm_seconds": 0.0,
+        }
+        scored = {}
+        for source, rows in rows_by_source.items():
+            results = calls[(source, index)]
+            scored[source] = [
+                (row, output) for row, (output, _) in zip(rows, results)
+                if not isinstance(output, Exception)
+            ]
+            record["errors"] += len(rows) - len(scored[source])
+            record["llm_seconds"] += sum(seconds for _, seconds in results)
+        for name, evaluator_datasets in datasets.items():
+            for dataset in evaluator_datasets:
+                if not scored[dataset.source]:
+                    continue
+                result = score_outputs(
+                    [row for row, _ in scored[dataset.source]],
+                    [output for _, output in scored[dataset.source]],
+                    {name: evaluators[name]},
+                    {name: {"column_mapping": dataset.mappings}}
+                )
+                for metric, value in result["metrics"].items():
+                    record["metrics"][f"{dataset.name}.{metric}"] = value
+        records.append(record)
+
+    table = format_table(records)
+    logger.info("Sweep results:\n%s", table)
+    if report_dir:
+        os.makedirs(report_dir, exist_ok=True)
+        output_path = os.path.join(report_dir, f"{experiment.name}_sweep")
+        with open(f"{output_path}.json", "w", encoding="utf-8") as f:
+            json.dump({"variants": records}, f, indent=2, default=str)
+        with open(f"{output_path}.md", "w", encoding="utf-8") as f:
+            f.write(table + "\n")
+    return {"variants": records, "table": table}
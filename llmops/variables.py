@@ -0,0 +1,101 @@
+"""Experiment variable resolution module."""
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# ${VAR} or ${VAR:-default}; placeholders such as ${data.answer} in dataset
+# mappings are not variable names and are left alone
+PLACEHOLDER_PATTERN = re.compile(
+    r"\$\{([A-Za-z_][A-Za-z0-9_]*)(?::-([^}]*))?\}"
+)
+
+
+@lru_cache(maxsize=None)
+def _load_dotenv_once() -> None:
+    load_dotenv()
+
+
+def load_environment() -> Dict[str, str]:
+    """
+    Return a snapshot of the environment, loading the .env file once.
+
+    As with ``load_dotenv``, variables already set in the environment take
+    precedence over the .env file.
+    """
+    _load_dotenv_once()
+    return dict(os.environ)
+
+
+class MissingVariablesError(ValueError):
+    """Raised when placeholders refer to variables that are not set."""
+
+    def __init__(self, label: str, missing: List[Tuple[str, str]]) -> None:
+        """Create the error from (variable, location) pairs."""
+        self.missing = missing
+        super().__init__("; ".join(
+            f"{label} {name} not found at {location}"
+            for name, location in missing
+        ))
+
+
+class VariableResolver:
+    """
+    Substitute ``${VAR}`` and ``${VAR:-default}`` placeholders.
+
+    Missing variables are collected instead of raised, so a whole experiment
+    can be resolved before reporting every missing variable at once.
+    """
+
+    def __init__(self, env_vars: Optional[Mapping[str, Any]] = None) -> None:
+        """Create a resolver over a variable mapping, or the environment."""
+        self.env_vars = load_environment() if env_vars is None else env_vars
+        self.missing: List[Tuple[str, str]] = []
+
+    def with_overlay(self, env_vars: Mapping[str, Any]) -> "VariableResolver":
+        """Return a resolver whose variables are layered over this one's."""
+        resolver = VariableResolver({**self.env_vars, **env_vars})
+        resolver.missing = self.missing
+        return resolver
+
+    def resolve(self, value: Any, location: str) -> Any:
+        """Return a value with its placeholders substituted."""
+        if not isinstance(value, str) or "${" not in value:
+            return value
+
+        match = PLACEHOLDER_PATTERN.fullmatch(value)
+        if match:
+            # Keep the variable as is when it is the whole value
+            return self._lookup(match, location)
+        return PLACEHOLDER_PATTERN.sub(
+            lambda m: str(self._lookup(m, location)), value
+        )
+
+    def resolve_env_vars(
+        self,
+        env_vars: List[Dict[str, Any]],
+        location: str
+    ) -> Dict[str, Any]:
+        """Resolve a list of env var dictionaries, later entries winning."""
+        resolved = {}
+        for env_var_dict in env_vars:
+            for key, value in env_var_dict.items():
+                resolved[key] = self.resolve(value, f"{location}.{key}")
+        return resolved
+
+    def raise_missing(self, label: str = "env var") -> None:
+        """Raise a MissingVariablesError if any variable was missing."""
+        if self.missing:
+            raise MissingVariablesError(label, self.missing)
+
+    def _lookup(self, match: "re.Match[str]", location: str) -> Any:
+        name, default = match.group(1), match.group(2)
+        value = self.env_vars.get(name)
+        if value is not None and (default is None or value != ""):
+            return value
+        if default is not None:
+            return default
+        self.missing.append((name, location))
+        return match.group(0)
@@ -0,0 +1,278 @@
+"""Durable SQLite work queue for distributing evaluation rows to workers."""
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    evaluator TEXT NOT NULL,
+    function TEXT NOT NULL,
+    dataset TEXT NOT NULL,
+    chunk INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT
+)
+"""
+
+
+@dataclass
+class Task:
+    """A chunk of dataset rows to be scored by one evaluation function."""
+
+    task_id: str
+    evaluator: str
+    function: str
+    dataset: str
+    chunk: int
+    payload: str
+    attempts: int = 0
+
+
+class WorkQueue:
+    """
+    Work queue backed by a SQLite file.
+
+    Workers claim tasks under a time-limited lease, then acknowledge them with
+    a result or release them with an error. Tasks whose lease expires (for
+    example because the worker died) are handed to the next worker that asks,
+    and tasks that fail ``max_attempts`` times are marked failed. Any process
+    that can open the database file can join, including processes on other
+    machines sharing a filesystem with working file locks.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        lease_seconds: float = 300.0,
+        max_attempts: int = 3
+    ):
+        """Open the queue database at ``path``, creating it if needed."""
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, tasks: Iterable[Task]) -> int:
+        """
+        Add tasks to the queue, keeping the results of tasks already done.
+
+        Failed tasks and tasks whose lease expired are reset to pending with
+        no attempts, so a rerun executes every task that did not complete.
+
+        Returns:
+            int: Number of tasks added or reset
+        """
+        now = time.time()
+        rows = [
+            (t.task_id, t.evaluator, t.function, t.dataset, t.chunk, t.payload,
+             PENDING, FAILED, LEASED, now)
+            for t in tasks
+        ]
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT INTO tasks "
+                "(task_id, evaluator, function, dataset, chunk, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(task_id) DO UPDATE SET status = ?, attempts = 0, "
+                "lease_owner = NULL, lease_expires = NULL, error = NULL "
+                "WHERE status = ? OR (status = ? AND lease_expires < ?)",
+                rows
+            )
+            added = conn.total_changes - before
+            conn.execute("COMMIT")
+        return added
+
+    def supersede(self, run_id: str) -> int:
+        """
+        Fail the unfinished tasks of runs other than ``run_id``.
+
+        Task ids start with the id of their run, see ``run_prefix``. Tasks
+        leased by a live worker are left to finish.
+
+        Returns:
+            int: Number of tasks failed
+        """
+        prefix = run_prefix(run_id)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = ?, lease_owner = NULL, error = ? "
+                "WHERE substr(task_id, 1, ?) != ? "
+                "AND (status = ? OR (status = ? AND lease_expires < ?))",
+                (FAILED, f"superseded by run {run_id}", len(prefix), prefix,
+                 PENDING, LEASED, time.time())
+            )
+        return cursor.rowcount
+
+    def latest_run(self) -> Optional[str]:
+        """Return the id of the run that enqueued the last task, if any."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT task_id FROM tasks ORDER BY rowid DESC LIMIT 1"
+            ).fetchone()
+        return row["task_id"].split("/", 1)[0] if row else None
+
+    def claim(self, worker_id: str) -> Optional[Task]:
+        """Lease the next available task to a worker, or return None."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                while True:
+                    row = conn.execute(
+                        "SELECT * FROM tasks WHERE status = ? "
+                        "OR (status = ? AND lease_expires < ?) "
+                        "ORDER BY rowid LIMIT 1",
+                        (PENDING, LEASED, now)
+                    ).fetchone()
+                    if row is None:
+                        conn.execute("COMMIT")
+                        return None
+                    if row["attempts"] >= self.max_attempts:
+                        conn.execute(
+                            "UPDATE tasks SET status = ?, lease_owner = NULL, "
+                            "error = COALESCE(error, 'lease expired') "
+                            "WHERE task_id = ?",
+                            (FAILED, row["task_id"])
+                        )
+                        continue
+                    conn.execute(
+                        "UPDATE tasks SET status = ?, attempts = attempts + 1, "
+                        "lease_owner = ?, lease_expires = ? WHERE task_id = ?",
+                        (LEASED, worker_id, now + self.lease_seconds,
+                         row["task_id"])
+                    )
+                    conn.execute("COMMIT")
+                    return Task(
+                        task_id=row["task_id"],
+                        evaluator=row["evaluator"],
+                        function=row["function"],
+                        dataset=row["dataset"],
+                        chunk=row["chunk"],
+                        payload=row["payload"],
+                        attempts=row["attempts"] + 1
+                    )
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def heartbeat(self, task_id: str, worker_id: str) -> bool:
+        """Extend the lease of a task; returns False if the lease was lost."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET lease_expires = ? "
+                "WHERE task_id = ? AND status = ? AND lease_owner = ?",
+                (time.time() + self.lease_seconds, task_id, LEASED, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def ack(self, task_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        """
+        Store the result of a task and mark it done.
+
+        Only the worker holding the lease can acknowledge a task, so a
+        worker whose lease was taken over cannot overwrite the result.
+
+        Returns:
+            bool: False if the worker no longer held the lease
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = ?, result = ?, error = NULL, "
+                "lease_owner = NULL "
+                "WHERE task_id = ? AND status = ? AND lease_owner = ?",
+                (DONE, json.dumps(result, default=str), task_id, LEASED,
+                 worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def nack(self, task_id: str, worker_id: str, error: str) -> None:
+        """Release a failed task for retry, or fail it after max attempts."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= ? "
+                "THEN ? ELSE ? END, error = ?, lease_owner = NULL "
+                "WHERE task_id = ? AND status = ? AND lease_owner = ?",
+                (self.max_attempts, FAILED, PENDING, error, task_id, LEASED,
+                 worker_id)
+            )
+
+    def is_drained(self) -> bool:
+        """Return True when no task is pending or leased."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM tasks WHERE status IN (?, ?)",
+                (PENDING, LEASED)
+            ).fetchone()
+        return row[0] == 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of tasks in each status."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) FROM tasks GROUP BY status"
+            ).fetchall()
+        return {status: count for status, count in rows}
+
+    def results(self, task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Return the stored task records for the given task ids."""
+        records = {}
+        with self._connect() as conn:
+            for task_id in task_ids:
+                row = conn.execute(
+                    "SELECT status, result, error FROM tasks WHERE task_id = ?",
+                    (task_id,)
+                ).fetchone()
+                if row is not None:
+                    records[task_id] = {
+                        "status": row["status"],
+                        "result": json.loads(row["result"])
+                        if row["result"] else None,
+                        "error": row["error"]
+                    }
+        return records
+
+
+def new_run_id() -> str:
+    """Return a new id for the tasks enqueued by one run."""
+    return uuid.uuid4().hex[:12]
+
+
+def run_prefix(run_id: str) -> str:
+    """Return the prefix of the task ids of a run."""
+    return f"{run_id}/"
+
+
+def new_worker_id() -> str:
+    """Return a worker id that is unique across processes and machines."""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
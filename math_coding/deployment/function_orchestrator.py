@@ -3,9 +3,20 @@ import logging
 import os
 import json
 import azure.functions as func
-from azure.identity import DefaultAzureCredential
-from azure.ai.projects import AIProjectClient
-from azure.monitor.opentelemetry import configure_azure_monitor
+
+from lib.admission.controller import Overloaded, admitted
+from lib.azure_clients.registry import get_project_client
+from lib.flow_metrics.tracing import (
+    configure_tracing,
+    get_tracer,
+    selected_exporter,
+    tracing_configured
+)
+from lib.request_deadline.deadline import (
+    check_deadline,
+    request_deadline,
+    timeout_from_headers
+)
 
 
 # Blueprint creation
@@ -28,14 +39,24 @@ initialize_once()
 
 
 def enable_telemetry():
-    """Enable telemetry logging"""
+    """
+    Enable telemetry logging once per worker process.
+
+    Traces go to Azure Monitor unless TRACE_EXPORTER selects the console
+    or a JSONL file.
+    """
+    if tracing_configured():
+        return
+    exporter = selected_exporter(default="azure")
+    if exporter != "azure":
+        configure_tracing(exporter)
+        logging.info("Enabled %s trace export", exporter)
+        return
+
     # enable logging message contents
     os.environ["AZURE_TRACING_GEN_AI_CONTENT_RECORDING_ENABLED"] = "True"
 
-    project = AIProjectClient.from_connection_string(
-        conn_str=os.environ["CONNECTION_STRING"],
-        credential=DefaultAzureCredential(),
-    )
+    project = get_project_client()
 
     application_insights_connection_string = project.telemetry.get_connection_string()
 
@@ -44,51 +65,64 @@ def enable_telemetry():
             "No app insights configured, telemetry will not be logged."
         )
     project.telemetry.enable()
-    configure_azure_monitor(
-        connection_string=application_insights_connection_string
-        )
+    configure_tracing(exporter, application_insights_connection_string)
     logging.info("Enabled telemetry logging to project, view traces at:")
 
 
+def _handle(req: func.HttpRequest) -> func.HttpResponse:
+    """Validate the request and answer it within the request deadline."""
+    enable_telemetry()
+    question = req.params.get('question')
+
+    # 2. Input validation
+    if not question:
+        return func.HttpResponse(
+            body=json.dumps({"error": "Request body is required"}),
+            mimetype="application/json",
+            status_code=400
+        )
+
+    # 3. Import and execute business logic
+    check_deadline("get_math_response")
+    try:
+        from . import pure_python_flow
+        with get_tracer().start_as_current_span("orchestrator.get_math_response"):
+            result = pure_python_flow.get_math_response(question)
+    except ImportError as ie:
+        logging.error("Failed to import pure_python_flow: %s", str(ie))
+        return func.HttpResponse(
+            body=json.dumps(
+                {"error": "Business logic module not available"}
+            ),
+            mimetype="application/json",
+            status_code=500
+        )
+
+    # 4. Response handling
+    return func.HttpResponse(
+        body=json.dumps(result),
+        mimetype="application/json",
+        status_code=200
+    )
+
+
 @bp.route(route="process-math")
 def process_math(req: func.HttpRequest) -> func.HttpResponse:
     """
     HTTP Trigger handler that coordinates the request/response flow
     and delegates business logic to pure_python_flow.py
+
+    The x-request-timeout-ms header, or REQUEST_TIMEOUT_S, sets a deadline
+    for every downstream call. Once it passes, the request returns a 504.
+    With admission control enabled, requests beyond ADMISSION_MAX_CONCURRENCY
+    wait in a queue shared fairly between callers, and requests that cannot
+    be admitted in time return a 503 with a Retry-After header.
     """
     try:
-        # 1. Request handling
-        enable_telemetry()
-        question = req.params.get('question')
-
-        # 2. Input validation
-        if not question:
-            return func.HttpResponse(
-                body=json.dumps({"error": "Request body is required"}),
-                mimetype="application/json",
-                status_code=400
-            )
-
-        # 3. Import and execute business logic
-        try:
-            from . import pure_python_flow
-            result = pure_python_flow.get_math_response(question)
-        except ImportError as ie:
-            logging.error("Failed to import pure_python_flow: %s", str(ie))
-            return func.HttpResponse(
-                body=json.dumps(
-                    {"error": "Business logic module not available"}
-                ),
-                mimetype="application/json",
-                status_code=500
-            )
-
-        # 4. Response handling
-        return func.HttpResponse(
-            body=json.dumps(result),
-            mimetype="application/json",
-            status_code=200
-        )
+        # 1. Request handling, bounded by the deadline and admission control
+        with request_deadline(timeout_from_headers(req.headers)), \
+                admitted(req.headers, req.params):
+            return _handle(req)
 
     except ValueError as ve:
         return func.HttpResponse(
@@ -96,6 +130,21 @@ def process_math(req: func.HttpRequest) -> func.HttpResponse:
             mimetype="application/json",
             status_code=400
         )
+    except Overloaded as oe:
+        logging.warning("Shed: %s", str(oe))
+        return func.HttpResponse(
+            body=json.dumps({"error": "Service overloaded, retry later"}),
+            mimetype="application/json",
+            status_code=503,
+            headers={"Retry-After": str(oe.retry_after_s)}
+        )
+    except TimeoutError as te:
+        logging.warning("Timeout: %s", str(te))
+        return func.HttpResponse(
+            body=json.dumps({"error": "Request timed out"}),
+            mimetype="application/json",
+            status_code=504
+        )
     except ImportError as ie:
         logging.error("Import error: %s", str(ie))
         return func.HttpResponse(
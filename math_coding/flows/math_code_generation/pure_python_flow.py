@@ -1,13 +1,50 @@
 """Orchestation script for math_coding."""
 import ast
+import functools
 import json
 import os
 import sys
+import threading
+from contextlib import contextmanager
 from io import StringIO
 
 from azure.ai.inference import ChatCompletionsClient
 from azure.ai.inference.prompts import PromptTemplate
 from azure.core.credentials import AzureKeyCredential
+from azure.core.exceptions import AzureError
+
+from lib.azure_clients.transport import shared_transport
+from lib.fast_path.arithmetic import (
+    answer as arithmetic_answer,
+    fast_path_enabled
+)
+from lib.few_shot.selector import get_selector
+from lib.flow_metrics.tracing import (
+    configure_tracing,
+    get_tracer,
+    selected_exporter
+)
+from lib.flow_metrics.usage import AttemptCounter, StageTimer, usage_columns
+from lib.question_cache.near_duplicate import (
+    canonicalize,
+    get_question_cache,
+    verify_enabled
+)
+from lib.question_cache.singleflight import SingleFlight, coalesce_timeout
+from lib.request_deadline.deadline import (
+    DeadlineExceeded,
+    call_options,
+    check_deadline,
+    expired,
+    remaining,
+    run_within_deadline
+)
+
+# Exporter chosen by TRACE_EXPORTER; a no-op when the host already set one up
+configure_tracing(selected_exporter())
+
+# LLM calls in flight, shared by concurrent identical questions
+_IN_FLIGHT = SingleFlight()
 
 
 def infinite_loop_check(code_snippet):
@@ -60,57 +97,195 @@ def code_refine(original_code: str) -> str:
         return "Unknown Error:" + str(e)
 
 
+class _ThreadStdout:
+    """Stdout that writes to the buffer of the current thread, if it has one."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def _target(self):
+        buffer = getattr(self.local, "buffer", None)
+        return self.stream if buffer is None else buffer
+
+    def write(self, text):
+        """Write to the buffer of this thread, or to the wrapped stream."""
+        return self._target().write(text)
+
+    def flush(self):
+        """Flush the buffer of this thread, or the wrapped stream."""
+        self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self._target(), name)
+
+
+_STDOUT_LOCK = threading.Lock()
+
+
+@contextmanager
+def _captured_stdout():
+    """Capture everything this thread writes to sys.stdout."""
+    with _STDOUT_LOCK:
+        # Installed once, and again if a host replaced sys.stdout since
+        if not isinstance(sys.stdout, _ThreadStdout):
+            sys.stdout = _ThreadStdout(sys.stdout)
+        proxy = sys.stdout
+    previous = getattr(proxy.local, "buffer", None)
+    proxy.local.buffer = StringIO()
+    try:
+        yield proxy.local.buffer
+    finally:
+        proxy.local.buffer = previous
+
+
 def func_exe(code_snippet: str):
     """Execute the code snippet and return the result"""
     if (code_snippet == "JSONDecodeError" or
             code_snippet.startswith("Unknown Error:")):
         return code_snippet
 
-    # Define the result variable before executing the code snippet
-    old_stdout = sys.stdout
-    redirected_output = sys.stdout = StringIO()
-
-    # Execute the code snippet
-    try:
-        exec(code_snippet.lstrip())
-    except (SyntaxError, ValueError, TypeError) as e:
-        sys.stdout = old_stdout
-        return str(e)
+    # Capture stdout per thread, so concurrent calls (e.g. in experiment
+    # sweeps) keep their own output
+    with _captured_stdout() as redirected_output:
+        # Execute the code snippet
+        try:
+            exec(code_snippet.lstrip(), {})
+        except (SyntaxError, ValueError, TypeError) as e:
+            return str(e)
 
-    sys.stdout = old_stdout
     return redirected_output.getvalue().strip()
 
 
-def get_math_response(question):
-    """Get the response for the math question"""
+def _llm_response(question, endpoint, key, prompty_file, model, temperature,
+                  cache, namespace):
+    """Answer the question with the LLM and cache the answer."""
+    timer = StageTimer()
+    with timer.stage("template") as span:
+        path = f"./{prompty_file}"
+        prompt_template = PromptTemplate.from_prompty(file_path=path)
+        # Only the examples most relevant to the question go in the prompt
+        examples = get_selector().select(question)
+        span.set_attribute("few_shot_examples", len(examples))
+        messages = prompt_template.create_messages(
+            question=question, examples=examples
+        )
+
+    # The shared transport keeps connections open across calls
+    client = ChatCompletionsClient(
+        endpoint=endpoint,
+        credential=AzureKeyCredential(key),
+        transport=shared_transport()
+        )
+
+    parameters = dict(prompt_template.parameters)
+    if temperature is not None:
+        parameters["temperature"] = temperature
+
+    attempts = AttemptCounter()
+    model = model or prompt_template.model_name
+    with timer.stage("llm", model=model or "") as span:
+        try:
+            code = client.complete(
+                messages=messages,
+                model=model,
+                raw_request_hook=attempts,
+                # The call and its retries end at the request deadline
+                **call_options("llm"),
+                **parameters,
+            )
+        except AzureError as e:
+            if expired():
+                raise DeadlineExceeded("Request deadline exceeded during llm") from e
+            raise
+        span.set_attribute("retries", attempts.retries)
+
+    with timer.stage("refine"):
+        code_refined = code_refine(code.choices[0].message.content)
+    with timer.stage("exec"):
+        output = run_within_deadline(func_exe, code_refined, stage="exec")
+    # func_exe echoes the error markers of code_refine, never cache those
+    if cache is not None and output and output != code_refined:
+        cache.put(question, code_refined, output, namespace)
+    return {
+        "response": output,
+        **usage_columns(code.usage, timer, attempts.retries)
+    }
+
+
+def _wait_timeout():
+    """Return how long to wait for an identical call, bounded by the deadline."""
+    timeout, left = coalesce_timeout(), remaining()
+    if left is None:
+        return timeout
+    return left if timeout is None else min(timeout, left)
+
+
+def get_math_response(question, prompty_file=None, model=None,
+                      temperature=None):
+    """
+    Get the response for the math question.
+
+    The prompty file, model and temperature default to PROMPTY_FILE and the
+    prompty settings, and can be overridden per call by experiment sweeps.
+    Inside a ``request_deadline`` block, the LLM call and code execution
+    stop at the deadline with ``DeadlineExceeded``.
+    """
     try:
         endpoint = os.environ["AZURE_AI_CHAT_ENDPOINT"]
         key = os.environ["AZURE_AI_CHAT_KEY"]
-        prompty_file = os.environ["PROMPTY_FILE"]
+        prompty_file = prompty_file or os.environ["PROMPTY_FILE"]
     except KeyError:
         print("Missing environment variable 'AZURE_AI_CHAT_ENDPOINT' or "
               "'AZURE_AI_CHAT_KEY'")
         print("Set them before running this sample.")
         exit()
 
-    path = f"./{prompty_file}"
-    prompt_template = PromptTemplate.from_prompty(file_path=path)
+    with get_tracer().start_as_current_span(
+        "get_math_response", attributes={"prompty_file": prompty_file}
+    ) as span:
+        check_deadline("get_math_response")
+        # Plain arithmetic is computed locally in microseconds
+        output = arithmetic_answer(question) if fast_path_enabled() else None
+        span.set_attribute("fast_path", output is not None)
+        if output is not None:
+            return {"response": output, **usage_columns(fast_path=True)}
 
-    messages = prompt_template.create_messages(question=question)
-    client = ChatCompletionsClient(
-        endpoint=endpoint,
-        credential=AzureKeyCredential(key)
-        )
+        # Reformatted copies of answered questions skip the LLM call entirely
+        cache = get_question_cache()
+        namespace = (prompty_file, model, temperature)
+        cached = cache.get(question, namespace) if cache is not None else None
+        if cached is not None:
+            output = cached.response
+            if verify_enabled() and run_within_deadline(
+                func_exe, cached.code, stage="exec"
+            ) != output:
+                cache.discard(cached.question, namespace)
+                cached = None
+        span.set_attribute("question_cache_hit", cached is not None)
+        if cached is not None:
+            return {"response": output, **usage_columns()}
 
-    code = client.complete(
-        messages=messages,
-        model=prompt_template.model_name,
-        **prompt_template.parameters,
-    )
-
-    code_refined = code_refine(code.choices[0].message.content)
-    output = func_exe(code_refined)
-    return {"response": output}
+        # Identical questions in flight share one LLM call
+        coalesced_call = functools.partial(
+            _IN_FLIGHT.do,
+            (namespace, canonicalize(question)),
+            functools.partial(
+                _llm_response, question, endpoint, key, prompty_file, model,
+                temperature, cache, namespace
+            )
+        )
+        try:
+            result, shared = coalesced_call(timeout=_wait_timeout())
+        except DeadlineExceeded:
+            if expired():
+                raise
+            # The shared call ran out of another request's time, not ours
+            result, shared = coalesced_call(timeout=_wait_timeout())
+        span.set_attribute("coalesced", shared)
+        if shared:
+            return {"response": result["response"], **usage_columns()}
+        return result
 
 
 if __name__ == "__main__":
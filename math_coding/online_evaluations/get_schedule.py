@@ -1,12 +1,11 @@
 """Online Evaluation script for math_coding."""
-import os
 import yaml
 import argparse
-from azure.ai.projects import AIProjectClient
-from azure.identity import DefaultAzureCredential
 
 from dotenv import load_dotenv
 
+from lib.azure_clients.registry import get_project_client
+
 
 def prepare_and_execute(
     base_path
@@ -22,10 +21,7 @@ def prepare_and_execute(
         data = yaml.safe_load(file)
 
     # Connect to your Azure AI Studio Project
-    project_client = AIProjectClient.from_connection_string(
-        credential=DefaultAzureCredential(),
-        conn_str=f"{os.environ['CONNECTION_STRING']}"
-    )
+    project_client = get_project_client()
 
     schedule = project_client.evaluations.get_schedule(data["schedule_name"])
     print("Schedule: ", schedule)
@@ -3,8 +3,6 @@ import os
 import argparse
 import yaml
 
-from azure.ai.projects import AIProjectClient
-from azure.identity import DefaultAzureCredential
 from azure.ai.projects.models import (
     ApplicationInsightsConfiguration,
     EvaluatorConfiguration,
@@ -15,6 +13,8 @@ from azure.ai.projects.models import (
 
 from dotenv import load_dotenv
 
+from lib.azure_clients.registry import get_project_client
+
 
 def prepare_and_execute(
     base_path
@@ -73,10 +73,7 @@ def prepare_and_execute(
     )
 
     # Connect to your Azure AI Studio Project
-    project_client = AIProjectClient.from_connection_string(
-        credential=DefaultAzureCredential(),
-        conn_str=f"{os.environ['CONNECTION_STRING']}"
-    )
+    project_client = get_project_client()
     application_insights_connection_string = project_client.telemetry.get_connection_string()
 
     if not application_insights_connection_string:
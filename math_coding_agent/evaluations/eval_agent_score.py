@@ -1,12 +1,11 @@
 """Evaluation script for math_coding."""
-import os
-
 from azure.ai.evaluation import evaluate
-from azure.ai.projects import AIProjectClient
-from azure.identity import DefaultAzureCredential
 from dotenv import load_dotenv
 
+from lib.azure_clients.registry import get_project_client
 from lib.agent_eval.agent_score import AgentEvaluator
+from llmops.deadlines import deadline_target
+from llmops.incremental import incremental_target
 from math_coding_agent.flows.math_code_generation.pure_python_flow import (
     get_math_response
 )
@@ -24,15 +23,12 @@ def eval_run_eval(
     Evaluate the model using the given data and column mapping.
     """
 
-    project = AIProjectClient.from_connection_string(
-        conn_str=f"{os.environ['CONNECTION_STRING']}",
-        credential=DefaultAzureCredential()
-    )
+    project = get_project_client()
 
     agent_evaluator = AgentEvaluator()
     result = evaluate(
         data=data_path,
-        target=get_math_response,
+        target=deadline_target(incremental_target(get_math_response)),
         evaluation_name="evaluate_math_agent",
         evaluators={
             "agent_score": agent_evaluator,
@@ -2,31 +2,45 @@
 import json
 import os
 import time
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 from azure.ai.inference.prompts import PromptTemplate
-from azure.identity import DefaultAzureCredential
 from azure.ai.projects.models import CodeInterpreterTool
-from azure.ai.projects import AIProjectClient
-from azure.monitor.opentelemetry import configure_azure_monitor
-from opentelemetry import trace
-
-project_client = AIProjectClient.from_connection_string(
-    credential=DefaultAzureCredential(), conn_str=os.environ["CONNECTION_STRING"]
+from azure.core.exceptions import AzureError
+
+from lib.agent_eval.agent_score import summarize_messages
+from lib.azure_clients.registry import get_project_client
+from lib.flow_metrics.tracing import (
+    configure_tracing,
+    get_tracer,
+    selected_exporter
+)
+from lib.flow_metrics.usage import StageTimer, usage_columns
+from lib.request_deadline.deadline import (
+    DeadlineExceeded,
+    call_options,
+    check_deadline,
+    expired,
+    remaining
 )
 
-# Enable Azure Monitor tracing
-application_insights_connection_string = project_client.telemetry.get_connection_string()
+project_client = get_project_client()
 
-if not application_insights_connection_string:
-    print("Application Insights was not enabled for this project.")
-    print("Enable it via the 'Tracing' tab in your AI Foundry project page.")
-    exit()
+# Enable tracing, to Azure Monitor unless TRACE_EXPORTER selects another exporter
+trace_exporter = selected_exporter(default="azure")
+application_insights_connection_string = None
+if trace_exporter == "azure":
+    application_insights_connection_string = project_client.telemetry.get_connection_string()
 
-configure_azure_monitor(connection_string=application_insights_connection_string)
+    if not application_insights_connection_string:
+        print("Application Insights was not enabled for this project.")
+        print("Enable it via the 'Tracing' tab in your AI Foundry project page.")
+        exit()
+
+configure_tracing(trace_exporter, application_insights_connection_string)
 
 scenario = os.path.basename(__file__)
-tracer = trace.get_tracer(__name__)
+tracer = get_tracer()
 
 
 def simplify_message(msg: Dict[str, Any]) -> Dict[str, Any]:
@@ -64,76 +78,178 @@ def simplify_message(msg: Dict[str, Any]) -> Dict[str, Any]:
     return simplified
 
 
-def convert_and_serialize(data: List[Dict[str, Any]]) -> str:
+def serialize_transcript(simplified_data: List[Dict[str, Any]], max_chars: int) -> str:
     """
-    Convert a list of message dictionaries to a simplified format and serialize to JSON.
+    Serialize simplified messages to a JSON list of at most max_chars characters.
+
+    Messages are kept in order until the next one would exceed the limit, so the
+    result is always valid JSON. A max_chars of 0 or less disables the transcript.
 
     Args:
-        data: List of message dictionaries
+        simplified_data: List of simplified message dictionaries
+        max_chars: Maximum length of the serialized transcript
 
     Returns:
-        JSON string of simplified data
+        JSON string of the messages that fit, or an empty string when disabled
     """
-    simplified_data = [simplify_message(msg) for msg in data.data]
-    return json.dumps(simplified_data)
-
-
-def get_math_response(question):
-    """Get the response for the math question"""
-    prompty_file = os.environ["PROMPTY_FILE"]
-    path = f"./{prompty_file}"
-    prompt_template = PromptTemplate.from_prompty(file_path=path)
+    if max_chars <= 0:
+        return ""
+
+    parts = []
+    length = 2  # the enclosing brackets
+    for msg in simplified_data:
+        serialized = json.dumps(msg)
+        separator = 2 if parts else 0
+        if length + separator + len(serialized) > max_chars:
+            break
+        parts.append(serialized)
+        length += separator + len(serialized)
+    return "[" + ", ".join(parts) + "]"
+
+
+def convert_and_summarize(data: List[Dict[str, Any]], max_chars: int) -> Tuple[Dict[str, Any], str]:
+    """
+    Summarize a list of message dictionaries and serialize a size-capped transcript.
 
-    messages = prompt_template.create_messages(question=question)
+    Args:
+        data: List of message dictionaries
+        max_chars: Maximum length of the serialized transcript
 
-    message_input = " ".join([json.dumps(entry) for entry in messages])
+    Returns:
+        Message summary (counts by role and created_at range) and transcript
+    """
+    simplified_data = [simplify_message(msg) for msg in data.data]
+    return (
+        summarize_messages(simplified_data),
+        serialize_transcript(simplified_data, max_chars)
+    )
 
-    code_interpreter = CodeInterpreterTool()
 
-    agent = project_client.agents.create_agent(
-        model=os.environ["GPT4O_DEPLOYMENT_NAME"],
-        name="math-agent",
-        instructions=message_input,
-        tools=code_interpreter.definitions,
-        tool_resources=code_interpreter.resources,
-    )
+def _abandon_run(
+    thread_id: Optional[str], run_id: Optional[str], agent_id: Optional[str]
+) -> None:
+    """Cancel a run that outlived the request and delete its thread and agent."""
+    try:
+        if run_id is not None:
+            project_client.agents.cancel_run(thread_id=thread_id, run_id=run_id)
+        if thread_id is not None:
+            project_client.agents.delete_thread(thread_id)
+        if agent_id is not None:
+            project_client.agents.delete_agent(agent_id)
+    except Exception as e:  # pylint: disable=broad-except
+        # The request already failed, cleanup errors only go to the log
+        print(f"Cleanup of run {run_id} failed: {e}")
 
-    thread = project_client.agents.create_thread()
 
-    project_client.agents.create_message(
-        thread_id=thread.id,
-        role="user",
-        content=question,
-    )
+def get_math_response(question):
+    """
+    Get the response for the math question.
 
-    run = project_client.agents.create_and_process_run(
-        thread_id=thread.id, assistant_id=agent.id
-        )
+    Inside a ``request_deadline`` block, every agent call is bounded by the
+    deadline, and a run still going at the deadline is cancelled and
+    ``DeadlineExceeded`` is raised.
+    """
+    with tracer.start_as_current_span("get_math_response"):
+        return _get_math_response(question)
 
-    while run.status in ["queued", "in_progress", "requires_action"]:
-        # Wait for a second
-        time.sleep(1)
-        run = project_client.agents.get_run(thread_id=thread.id, run_id=run.id)
 
-        print(f"Run status: {run.status}")
+def _get_math_response(question):
+    timer = StageTimer()
+    with timer.stage("template"):
+        prompty_file = os.environ["PROMPTY_FILE"]
+        path = f"./{prompty_file}"
+        prompt_template = PromptTemplate.from_prompty(file_path=path)
 
-    if run.status == "failed":
-        # Check if you got "Rate limit is exceeded.", then you want to get more quota
-        print(f"Run failed: {run.last_error}")
+        messages = prompt_template.create_messages(question=question)
 
-    messages = project_client.agents.list_messages(thread_id=thread.id)
-    print(f"Messages: {messages}")
+    message_input = " ".join([json.dumps(entry) for entry in messages])
 
-    # Get the last message from the sender
-    last_msg = messages.get_last_text_message_by_role("assistant")
-    if last_msg:
-        print(f"Last Message: {last_msg.text.value}")
+    agent = thread = run = None
+    try:
+        code_interpreter = CodeInterpreterTool()
+
+        with tracer.start_as_current_span("flow.agent_setup"):
+            agent = project_client.agents.create_agent(
+                model=os.environ["GPT4O_DEPLOYMENT_NAME"],
+                name="math-agent",
+                instructions=message_input,
+                tools=code_interpreter.definitions,
+                tool_resources=code_interpreter.resources,
+                **call_options("agent_setup"),
+            )
+
+            thread = project_client.agents.create_thread(**call_options("agent_setup"))
+
+            project_client.agents.create_message(
+                thread_id=thread.id,
+                role="user",
+                content=question,
+                **call_options("agent_setup"),
+            )
+
+        # The agent runs the generated code itself, so the whole run is LLM time
+        with timer.stage("llm") as span:
+            # Polled here rather than in create_and_process_run, so that the
+            # loop can stop at the request deadline
+            run = project_client.agents.create_run(
+                thread_id=thread.id, assistant_id=agent.id, **call_options("llm")
+                )
+
+            polls = 0
+            while run.status in ["queued", "in_progress", "requires_action"]:
+                left = remaining()
+                if left is not None and left <= 0:
+                    _abandon_run(thread.id, run.id, agent.id)
+                    raise DeadlineExceeded("Request deadline exceeded during llm")
+                # Wait for a second, or until the deadline
+                time.sleep(1 if left is None else min(1, left))
+                run = project_client.agents.get_run(
+                    thread_id=thread.id, run_id=run.id, **call_options("llm")
+                )
+                polls += 1
+                span.add_event("poll", {"status": str(run.status)})
+
+                print(f"Run status: {run.status}")
+            span.set_attribute("polls", polls)
+            span.set_attribute("status", str(run.status))
+
+        if run.status == "failed":
+            # Check if you got "Rate limit is exceeded.", then you want to get more quota
+            print(f"Run failed: {run.last_error}")
+
+        check_deadline("agent_messages")
+        with tracer.start_as_current_span("flow.agent_messages"):
+            messages = project_client.agents.list_messages(
+                thread_id=thread.id, **call_options("agent_messages")
+            )
+            print(f"Messages: {messages}")
+
+            # Get the last message from the sender
+            last_msg = messages.get_last_text_message_by_role("assistant")
+            if last_msg:
+                print(f"Last Message: {last_msg.text.value}")
+
+            project_client.agents.delete_thread(thread.id)
+            project_client.agents.delete_agent(agent.id)
+    except AzureError as e:
+        # Agent calls time out with the SDK errors once the deadline is used up
+        if not expired():
+            raise
+        _abandon_run(
+            thread and thread.id, run and run.id, agent and agent.id
+        )
+        raise DeadlineExceeded("Request deadline exceeded during agent call") from e
 
-    project_client.agents.delete_thread(thread.id)
-    project_client.agents.delete_agent(agent.id)
+    with timer.stage("summarize"):
+        summary, transcript = convert_and_summarize(
+            messages,
+            int(os.environ.get("AGENT_TRANSCRIPT_MAX_CHARS", "10000"))
+        )
     return {
         "response": last_msg.text.value,
-        "full_output": convert_and_serialize(messages)
+        "summary": summary,
+        "full_output": transcript,
+        **usage_columns(run.usage, timer)
     }
 
 
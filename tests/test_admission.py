@@ -0,0 +1,165 @@
+"""Tests for admission control and per-caller fairness of the function apps."""
+import threading
+import time
+
+import azure.functions as func
+import pytest
+
+from lib.admission import controller as admission
+from lib.admission.controller import (
+    AdmissionController,
+    Overloaded,
+    caller_id,
+    parse_weights,
+)
+from lib.request_deadline.deadline import DeadlineExceeded, request_deadline
+
+
+def _admission_order(controller, callers):
+    """Queue ``callers`` in order behind a held slot and return their admission order."""
+    order = []
+
+    def request(caller):
+        with controller.admit(caller):
+            order.append(caller)
+
+    controller.acquire("holder")
+    threads = []
+    for depth, caller in enumerate(callers, start=1):
+        threads.append(threading.Thread(target=request, args=(caller,)))
+        threads[-1].start()
+        while controller.stats()["queue_depth"] < depth:
+            time.sleep(0.001)
+    controller.release()
+    for thread in threads:
+        thread.join()
+    return order
+
+
+def test_requests_run_up_to_the_limit_and_are_counted():
+    """Test requests within the limit run at once and the counters follow them."""
+    controller = AdmissionController(max_concurrency=2, max_queue=4, max_wait_s=1)
+
+    with controller.admit("a") as waited_a, controller.admit("b") as waited_b:
+        assert waited_a == waited_b == 0.0
+        assert controller.stats()["in_flight"] == 2
+    stats = controller.stats()
+    assert (stats["in_flight"], stats["admitted"], stats["shed"]) == (0, 2, 0)
+
+
+def test_a_quiet_caller_is_not_stuck_behind_a_noisy_one():
+    """Test weighted fair queuing serves a single request before a burst drains."""
+    controller = AdmissionController(max_concurrency=1, max_queue=10, max_wait_s=5)
+
+    order = _admission_order(controller, ["noisy"] * 4 + ["quiet"])
+
+    assert order.index("quiet") == 1
+    assert controller.stats()["max_queue_depth"] == 5
+
+
+def test_weights_give_callers_a_larger_share():
+    """Test a caller with weight 2 is admitted twice as often under contention."""
+    controller = AdmissionController(
+        max_concurrency=1, max_queue=10, max_wait_s=5, weights={"heavy": 2}
+    )
+
+    order = _admission_order(controller, ["heavy"] * 4 + ["light"] * 4)
+
+    assert order[:6].count("heavy") == 4
+
+
+def test_requests_are_shed_when_the_queue_is_full_or_too_slow():
+    """Test shedding on a full queue and on a long wait, with a Retry-After."""
+    controller = AdmissionController(max_concurrency=1, max_queue=1, max_wait_s=0.05)
+    controller.acquire("holder")
+
+    waiter = threading.Thread(target=lambda: pytest.raises(Overloaded, controller.acquire, "b"))
+    waiter.start()
+    while not controller.stats()["queue_depth"]:
+        time.sleep(0.001)
+    with pytest.raises(Overloaded) as full:
+        controller.acquire("c")
+    waiter.join()
+
+    assert full.value.retry_after_s >= 1
+    stats = controller.stats()
+    assert (stats["shed"], stats["queue_depth"]) == (2, 0)
+    assert stats["shed_rate"] == pytest.approx(2 / 3)
+    controller.release()
+    assert controller.stats()["in_flight"] == 0
+
+
+def test_a_full_queue_pushes_out_the_noisiest_request():
+    """Test a newcomer to a full queue replaces the last request of a burst."""
+    controller = AdmissionController(max_concurrency=1, max_queue=2, max_wait_s=5)
+    controller.acquire("holder")
+    outcomes = {}
+
+    def request(name, caller):
+        try:
+            with controller.admit(caller):
+                outcomes[name] = "admitted"
+        except Overloaded:
+            outcomes[name] = "shed"
+
+    threads = []
+    for depth, (name, caller) in enumerate(
+        [("noisy-1", "noisy"), ("noisy-2", "noisy"), ("quiet", "quiet")], start=1
+    ):
+        threads.append(threading.Thread(target=request, args=(name, caller)))
+        threads[-1].start()
+        while controller.stats()["queue_depth"] + controller.stats()["shed"] < depth:
+            time.sleep(0.001)
+    controller.release()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes == {"noisy-1": "admitted", "noisy-2": "shed", "quiet": "admitted"}
+
+
+def test_queue_wait_is_bounded_by_the_request_deadline():
+    """Test a request whose deadline passes in the queue gets DeadlineExceeded."""
+    controller = AdmissionController(max_concurrency=1, max_queue=1, max_wait_s=5)
+    controller.acquire("holder")
+
+    start = time.perf_counter()
+    with request_deadline(0.05), pytest.raises(DeadlineExceeded):
+        controller.acquire("late")
+
+    assert time.perf_counter() - start < 1.0
+
+
+def test_callers_are_identified_by_key_then_header():
+    """Test the function key wins over the header and is never kept in clear."""
+    assert caller_id({}) == "anonymous"
+    assert caller_id({"x-caller-id": "team-a"}) == "team-a"
+    by_header = caller_id({"x-functions-key": "secret", "x-caller-id": "team-a"})
+    by_param = caller_id({}, {"code": "secret"})
+    assert by_header == by_param
+    assert by_header.startswith("key:") and "secret" not in by_header
+    assert parse_weights("team-a=2, key:ab=0.5,") == {"team-a": 2.0, "key:ab": 0.5}
+    with pytest.raises(ValueError):
+        parse_weights("team-a")
+
+
+def test_orchestrator_sheds_with_503_and_retry_after(monkeypatch):
+    """Test a request that cannot be admitted answers 503 with Retry-After."""
+    from math_coding.deployment.function_orchestrator import process_math
+
+    monkeypatch.setenv("TRACE_EXPORTER", "none")
+    monkeypatch.setenv(admission.MAX_CONCURRENCY_ENV_VAR, "1")
+    monkeypatch.setenv(admission.MAX_QUEUE_ENV_VAR, "0")
+    controller = admission.get_admission_controller()
+    assert admission.get_admission_controller() is controller
+
+    controller.acquire("holder")
+    try:
+        response = process_math(func.HttpRequest(
+            "GET", "/api/process-math", body=b"", params={"question": "q"}
+        ))
+    finally:
+        controller.release()
+
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    assert controller.stats()["shed"] == 1
@@ -0,0 +1,112 @@
+"""Tests for the single-pass and batch AgentEvaluator."""
+import json
+
+import pytest
+
+from benchmarks.bench_agent_score import generate_thread
+from lib.agent_eval import agent_score
+from lib.agent_eval.agent_score import AgentEvaluator, summarize_messages
+
+
+def _multi_pass(evaluator, messages, total, users, assistants, max_diff):
+    return int((
+        evaluator.validate_dictionary_count(messages, total)
+        + evaluator.validate_assistant_messages_count(messages, assistants)
+        + evaluator.validate_user_messages_count(messages, users)
+        + evaluator.validate_time_difference(messages, max_diff)
+    ) / 4 * 100)
+
+
+@pytest.mark.parametrize("expected", [
+    (7, 4, 3, 100),
+    (7, 4, 3, 1),
+    (6, 3, 4, 100),
+    (1, 1, 1, 0),
+])
+def test_single_pass_matches_validate_methods(expected):
+    """Test __call__ agrees with the individual validate methods."""
+    evaluator = AgentEvaluator()
+    full_output = generate_thread(7, seed=3)
+    total, users, assistants, max_diff = expected
+
+    score = evaluator(
+        full_output=full_output,
+        total_message_count=str(total),
+        total_user_message_count=str(users),
+        total_assistant_message_count=str(assistants),
+        time_difference=str(max_diff)
+    )["agent_score"]
+
+    assert score == _multi_pass(
+        evaluator, json.loads(full_output), total, users, assistants, max_diff
+    )
+
+
+def test_summary_counts_roles_and_timestamps():
+    """Test the summary follows the assistant_id rules of the validators."""
+    messages = [
+        {"role": "user", "created_at": "10"},
+        {"role": "assistant", "assistant_id": "a", "created_at": "30"},
+        {"role": "assistant", "created_at": "20"},
+        {"role": "user", "assistant_id": "a", "created_at": "15"},
+    ]
+
+    summary = summarize_messages(messages)
+
+    assert summary == {
+        "total_message_count": 4,
+        "assistant_message_count": 1,
+        "user_message_count": 1,
+        "min_created_at": 10,
+        "max_created_at": 30,
+    }
+    with pytest.raises(KeyError):
+        summarize_messages([{"role": "user"}, {"role": "user"}])
+    assert summarize_messages([{"role": "user"}])["min_created_at"] is None
+
+
+def test_batch_matches_per_row(monkeypatch):
+    """Test evaluate_batch gives the per-row scores, with and without orjson."""
+    evaluator = AgentEvaluator()
+    rows = [
+        {
+            "full_output": generate_thread(size, seed=size),
+            "total_message_count": str(size),
+            "total_user_message_count": str((size + 1) // 2),
+            "total_assistant_message_count": str(size // 2 + offset),
+            "time_difference": str(limit),
+        }
+        for size, offset, limit in [(1, 0, 0), (5, 0, 100), (50, 1, 5)]
+    ]
+    columns = {key: [row[key] for row in rows] for key in rows[0]}
+    expected = [evaluator(**row)["agent_score"] for row in rows]
+
+    assert evaluator.evaluate_batch(columns)["agent_score"].tolist() == expected
+    monkeypatch.setattr(agent_score, "_json_loads", json.loads)
+    assert evaluator.evaluate_batch(columns)["agent_score"].tolist() == expected
+    assert expected[0] == 100 and expected[2] < 100
+
+
+def test_precomputed_summary_matches_full_output():
+    """Test a flow summary scores the same as the transcript it came from."""
+    evaluator = AgentEvaluator()
+    full_output = generate_thread(9, seed=5)
+    summary = summarize_messages(json.loads(full_output))
+    expected = {
+        "total_message_count": "9",
+        "total_user_message_count": "5",
+        "total_assistant_message_count": "4",
+        "time_difference": "10",
+    }
+
+    from_transcript = evaluator(full_output=full_output, **expected)
+    assert evaluator(summary=summary, **expected) == from_transcript
+    assert evaluator(summary=json.dumps(summary), **expected) == from_transcript
+
+    columns = {key: [value] for key, value in expected.items()}
+    columns["summary"] = [summary]
+    assert evaluator.evaluate_batch(columns)["agent_score"].tolist() == \
+        [from_transcript["agent_score"]]
+
+    with pytest.raises(ValueError, match="summary or a full_output"):
+        evaluator(**expected)
@@ -0,0 +1,50 @@
+"""Tests for the end-to-end pipeline benchmark and its mock LLM."""
+import json
+import urllib.request
+
+from benchmarks.bench_pipeline import run_benchmark
+from benchmarks.generate_math_data import expression_for, generate_rows
+from benchmarks.mock_llm import MockChatServer
+
+
+def test_generated_questions_have_matching_answers():
+    """Test every generated answer is the value of its question's expression."""
+    rows = list(generate_rows(200, seed=7))
+
+    assert rows == list(generate_rows(200, seed=7))
+    for row in rows:
+        left, symbol, right = expression_for(row["question"]).split()
+        assert str(eval(f"{left} {symbol} {right}")) == row["answer"]
+    assert expression_for("What is the capital of France?") is None
+
+
+def test_mock_server_answers_chat_completions():
+    """Test the mock returns code answering the last question of the prompt."""
+    body = {"messages": [
+        {"role": "system", "content": "QUESTION: What is 1 + 1?"},
+        {"role": "user", "content": "QUESTION: Multiply 12 by 3.\nCODE:"},
+    ]}
+    with MockChatServer(latency_ms=1) as server:
+        request = urllib.request.Request(
+            f"{server.endpoint}/chat/completions?api-version=2024-05-01-preview",
+            data=json.dumps(body).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request) as response:
+            completion = json.load(response)
+
+    content = completion["choices"][0]["message"]["content"]
+    assert json.loads(content) == {"code": "print(12 * 3)"}
+    assert completion["usage"]["completion_tokens"] > 0
+    assert server.requests == 1
+
+
+def test_pipeline_benchmark_reports_throughput():
+    """Test a small end-to-end run scores every row and splits its time."""
+    record, = run_benchmark([20])
+
+    assert record["rows"] == 20
+    assert record["f1_score"] == 1.0
+    assert record["rows_per_s"] > 0
+    assert record["peak_rss_mb"] > 0
+    assert record["target_s"] > record["scoring_s"] > 0
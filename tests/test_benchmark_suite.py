@@ -0,0 +1,37 @@
+"""Tests for the micro-benchmark suite."""
+import pytest
+
+from benchmarks.suite import CASES, compare, run_suite
+
+
+def test_run_suite_covers_cases_and_scales():
+    """Test every selected case runs at every selected scale."""
+    results = run_suite(scales=["small"], repeat=1)
+
+    records = results["results"]
+    assert [record["case"] for record in records] == list(CASES)
+    assert all(record["best_s"] > 0 for record in records)
+    assert all(record["best_s"] <= record["median_s"] for record in records)
+    assert results["environment"]["repeat"] == 1
+
+
+def test_compare_flags_regressions():
+    """Test cases slower than the threshold are reported as regressions."""
+    def run(deep_merge_s, load_s):
+        return {"results": [
+            {"case": "deep_merge", "scale": "small", "size": 10, "best_s": deep_merge_s},
+            {"case": "load_experiment", "scale": "small", "size": 3, "best_s": load_s},
+        ]}
+
+    records = compare(run(0.2, 0.105), run(0.1, 0.1), threshold=0.1)
+
+    assert [(r["case"], r["regression"]) for r in records] == [
+        ("deep_merge", True), ("load_experiment", False)
+    ]
+    assert records[0]["ratio"] == pytest.approx(2.0)
+
+
+def test_unknown_case_is_rejected():
+    """Test unknown case names fail before anything runs."""
+    with pytest.raises(ValueError, match="code_golf"):
+        run_suite(cases=["code_golf"])
@@ -0,0 +1,102 @@
+"""Tests for the shared Azure credential and project client registry."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from azure.core.credentials import AccessToken
+
+from lib.azure_clients import registry
+from lib.azure_clients.registry import CachingCredential, ClientRegistry
+
+
+class FakeCredential:
+    """Local credential issuing numbered tokens that expire after ``lifetime_s``."""
+
+    def __init__(self, lifetime_s=3600.0, delay_s=0.0):
+        """Issue tokens after ``delay_s`` seconds."""
+        self.lifetime_s = lifetime_s
+        self.delay_s = delay_s
+        self.calls = 0
+        self.fail = False
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def get_token(self, *scopes, **kwargs):
+        """Issue a new token."""
+        time.sleep(self.delay_s)
+        with self._lock:
+            self.calls += 1
+            if self.fail:
+                raise RuntimeError("token endpoint unavailable")
+            return AccessToken(f"token-{self.calls}", int(time.time() + self.lifetime_s))
+
+    def close(self):
+        """Record the credential was closed."""
+        self.closed = True
+
+
+def test_tokens_are_cached_per_scope():
+    """Test repeated requests reuse the token and other scopes get their own."""
+    fake = FakeCredential()
+    credential = CachingCredential(fake)
+
+    tokens = {credential.get_token("scope/.default").token for _ in range(5)}
+    other = credential.get_token("other/.default").token
+
+    assert tokens == {"token-1"}
+    assert other == "token-2"
+    assert fake.calls == 2
+
+
+def test_tokens_are_renewed_ahead_of_expiry_and_kept_on_failure():
+    """Test tokens close to expiry are renewed, falling back while still valid."""
+    fake = FakeCredential(lifetime_s=60)
+    credential = CachingCredential(fake, refresh_ahead_s=300)
+
+    assert credential.get_token("scope").token == "token-1"
+    assert credential.get_token("scope").token == "token-2"
+    fake.fail = True
+    assert credential.get_token("scope").token == "token-2"
+
+    expired = CachingCredential(FakeCredential(lifetime_s=-1))
+    expired.credential.fail = True
+    with pytest.raises(RuntimeError):
+        expired.get_token("scope")
+
+
+def test_concurrent_requests_make_one_token_call():
+    """Test a burst of requests for a missing token calls the credential once."""
+    fake = FakeCredential(delay_s=0.05)
+    credential = CachingCredential(fake)
+
+    with ThreadPoolExecutor(8) as pool:
+        tokens = set(pool.map(lambda _: credential.get_token("scope").token, range(8)))
+
+    assert tokens == {"token-1"}
+    assert fake.calls == 1
+
+
+def test_registry_hands_out_one_client_per_connection_string(monkeypatch):
+    """Test clients are created once per connection string with the shared credential."""
+    fake = FakeCredential()
+    created = []
+
+    def factory(conn_str, credential):
+        created.append((conn_str, credential))
+        return object()
+
+    previous = registry.set_registry(ClientRegistry(fake, client_factory=factory))
+    try:
+        monkeypatch.setenv("CONNECTION_STRING", "region;sub;rg;project")
+        default = registry.get_project_client()
+        assert registry.get_project_client("region;sub;rg;project") is default
+        assert registry.get_project_client("region;sub;rg;other") is not default
+        assert [conn_str for conn_str, _ in created] == [
+            "region;sub;rg;project", "region;sub;rg;other"
+        ]
+        assert {id(credential) for _, credential in created} == {id(registry.get_credential())}
+        registry.get_registry().close()
+        assert fake.closed
+    finally:
+        registry.set_registry(previous)
@@ -0,0 +1,112 @@
+"""Tests for the compiled experiment configuration cache."""
+import os
+
+import pytest
+import yaml
+
+from llmops import config_cache
+from llmops.config_cache import cache_key, load_compiled, store_compiled
+from llmops.experiment import Experiment, load_experiment
+
+
+@pytest.fixture
+def experiment_dir(tmp_path):
+    """Fixture providing a base and dev experiment file."""
+    base = {
+        "name": "cached_experiment",
+        "flow": "flow",
+        "entry_point": "flow:run",
+        "connections_ref": ["conn1"],
+        "connections": [{
+            "name": "conn1",
+            "connection_type": "azure",
+            "api_base": "https://base.example.com",
+            "api_version": "v1",
+            "api_key": "${CACHED_API_KEY}",
+            "api_type": "azure",
+            "deployment_name": "deploy"
+        }],
+        "env_vars": [{"BASE_VAR": "base_value"}],
+        "evaluators": []
+    }
+    (tmp_path / "experiment.yaml").write_text(yaml.dump(base))
+    (tmp_path / "experiment.dev.yaml").write_text(
+        yaml.dump({"description": "dev"})
+    )
+    return tmp_path
+
+
+def test_cache_hit_skips_yaml_parsing(experiment_dir, tmp_path, monkeypatch):
+    """Test a second load is served from the cache."""
+    monkeypatch.setenv("CACHED_API_KEY", "first")
+    cache_dir = str(tmp_path / "cache")
+
+    first = load_experiment(
+        base_path=str(experiment_dir), env="dev", cache_dir=cache_dir
+    )
+    assert first.connections[0].api_key == "first"
+
+    monkeypatch.setenv("CACHED_API_KEY", "second")
+    monkeypatch.setattr(
+        Experiment, "from_yaml",
+        classmethod(lambda *args: pytest.fail("config was parsed again"))
+    )
+    second = load_experiment(
+        base_path=str(experiment_dir), env="dev", cache_dir=cache_dir
+    )
+
+    assert second.description == "dev"
+    # Variables are resolved on every load, not cached
+    assert second.connections[0].api_key == "second"
+
+
+def test_env_file_change_invalidates(experiment_dir, tmp_path, monkeypatch):
+    """Test editing the env file produces a new cache entry."""
+    monkeypatch.setenv("CACHED_API_KEY", "key")
+    monkeypatch.setenv("EXPERIMENT_CACHE_DIR", str(tmp_path / "cache"))
+
+    load_experiment(base_path=str(experiment_dir), env="dev")
+    (experiment_dir / "experiment.dev.yaml").write_text(
+        yaml.dump({"description": "changed"})
+    )
+    experiment = load_experiment(base_path=str(experiment_dir), env="dev")
+
+    assert experiment.description == "changed"
+    assert len(os.listdir(tmp_path / "cache")) == 2
+
+
+def test_cache_key_tracks_missing_files(tmp_path):
+    """Test a file appearing changes the key."""
+    path = tmp_path / "experiment.pr.yaml"
+    missing_key = cache_key([str(path)])
+    path.write_text("name: pr")
+    assert cache_key([str(path)]) != missing_key
+
+
+def test_cache_key_tracks_compiler_source(tmp_path, monkeypatch):
+    """Test editing a module that compiles the configuration changes the key."""
+    path = tmp_path / "experiment.yaml"
+    path.write_text("name: base")
+    module = tmp_path / "experiment.py"
+    module.write_text("VERSION = 1\n")
+    monkeypatch.setattr(config_cache, "_COMPILER_MODULES", (str(module),))
+
+    keys = []
+    for source in ("VERSION = 1\n", "VERSION = 2\n"):
+        module.write_text(source)
+        config_cache.compiler_digest.cache_clear()
+        keys.append(cache_key([str(path)]))
+    config_cache.compiler_digest.cache_clear()
+
+    assert keys[0] != keys[1]
+
+
+def test_corrupt_cache_entry_is_ignored(tmp_path):
+    """Test unreadable cache files are treated as misses."""
+    cache_dir = str(tmp_path)
+    store_compiled(cache_dir, "key", {"name": "ok"})
+    assert load_compiled(cache_dir, "key") == {"name": "ok"}
+
+    (tmp_path / "key.pickle").write_bytes(b"not a pickle")
+    assert load_compiled(cache_dir, "key") is None
+    assert load_compiled(cache_dir, "other") is None
@@ -0,0 +1,113 @@
+"""Tests for the layered configuration overlay."""
+import pytest
+import yaml
+
+from llmops.config_overlay import ConfigOverlay, merge, parse_override
+from llmops.experiment import load_experiment
+
+
+def test_merge_does_not_modify_layers():
+    """Test merging builds new containers and leaves the inputs intact."""
+    base = {"a": {"b": 1}, "items": [{"name": "x", "val": 1}]}
+    override = {"a": {"c": 2}, "items": [{"name": "x", "val": 2}]}
+
+    merged = merge(base, override)
+
+    assert merged == {"a": {"b": 1, "c": 2}, "items": [{"name": "x", "val": 2}]}
+    assert base == {"a": {"b": 1}, "items": [{"name": "x", "val": 1}]}
+    assert override == {"a": {"c": 2}, "items": [{"name": "x", "val": 2}]}
+
+
+def test_layers_record_provenance():
+    """Test each value reports the last layer that set it."""
+    overlay = ConfigOverlay()
+    overlay.add_layer("base", {
+        "name": "exp",
+        "evaluators": [
+            {"name": "e1", "flow": "f1", "datasets": [{"name": "d1", "source": "s1"}]},
+            {"name": "e2", "flow": "f2"},
+        ],
+    })
+    overlay.add_layer("env", {
+        "evaluators": [
+            {"name": "e1", "datasets": [{"name": "d1", "source": "s2"}]},
+            {"name": "e3", "flow": "f3"},
+        ],
+    })
+    overlay.add_layer("cli", {"evaluators": [{"name": "e2", "flow": "f4"}]})
+
+    assert [e["name"] for e in overlay.config["evaluators"]] == ["e1", "e2", "e3"]
+    assert overlay.source_of("name") == "base"
+    assert overlay.source_of("evaluators.e1.flow") == "base"
+    assert overlay.source_of("evaluators.e1.datasets.d1.source") == "env"
+    assert overlay.source_of("evaluators.e3.flow") == "env"
+    assert overlay.source_of("evaluators.e2.flow") == "cli"
+    assert overlay.provenance["evaluators.e2.flow"] == "cli"
+
+
+def test_parse_override_addresses_named_items():
+    """Test overrides resolve named list items against the configuration."""
+    config = {
+        "evaluators": [{"name": "e1", "datasets": [{"name": "d1", "source": "a"}]}],
+        "env_vars": [{"A": 1}],
+    }
+
+    layer = parse_override("evaluators.e1.datasets.d1.source=b.jsonl", config)
+    assert layer == {
+        "evaluators": [{"name": "e1", "datasets": [{"name": "d1", "source": "b.jsonl"}]}]
+    }
+    assert merge(config, layer)["evaluators"][0]["datasets"][0]["source"] == "b.jsonl"
+    assert parse_override("env_vars=[{B: 2}]", config) == {"env_vars": [{"B": 2}]}
+
+    with pytest.raises(ValueError, match="expected path=value"):
+        parse_override("evaluators.e1", config)
+
+
+def test_load_experiment_applies_local_and_overrides(tmp_path, monkeypatch):
+    """Test load_experiment layers base, env, local file and overrides."""
+    monkeypatch.setenv("OVERLAY_KEY", "secret")
+    connection = {
+        "name": "conn1",
+        "connection_type": "azure",
+        "api_base": "https://base.example.com",
+        "api_version": "v1",
+        "api_key": "${OVERLAY_KEY}",
+        "api_type": "azure",
+        "deployment_name": "deploy"
+    }
+    base = {
+        "name": "overlay_experiment",
+        "flow": "flow",
+        "entry_point": "flow:run",
+        "connections_ref": ["conn1"],
+        "connections": [connection],
+        "env_vars": [],
+        "evaluators": [{
+            "name": "eval1",
+            "flow": "evaluations",
+            "entry_point": "eval:run",
+            "connections_ref": ["conn1"],
+            "env_vars": [],
+            "datasets": [{"name": "ds1", "source": "data/base.jsonl"}]
+        }]
+    }
+    (tmp_path / "experiment.yaml").write_text(yaml.dump(base))
+    (tmp_path / "experiment.dev.yaml").write_text(
+        yaml.dump({"description": "dev", "flow": "dev_flow"})
+    )
+    (tmp_path / "experiment.local.yaml").write_text(
+        yaml.dump({"flow": "local_flow"})
+    )
+
+    experiment = load_experiment(
+        base_path=str(tmp_path),
+        env="dev",
+        overrides=["evaluators.eval1.datasets.ds1.source=data/small.jsonl"]
+    )
+
+    assert experiment.flow == "local_flow"
+    assert experiment.evaluators[0].datasets[0].source == "data/small.jsonl"
+    assert experiment.source_of("description").endswith("experiment.dev.yaml")
+    assert experiment.source_of("flow").endswith("experiment.local.yaml")
+    assert experiment.source_of("evaluators.eval1.datasets.ds1.source") == "overrides"
+    assert experiment.source_of("name").endswith("experiment.yaml")
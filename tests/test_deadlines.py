@@ -0,0 +1,113 @@
+"""Tests for the per-row and run-level deadlines of evaluation targets."""
+import inspect
+import threading
+import time
+
+import pytest
+
+from llmops import deadlines
+from llmops.deadlines import (
+    ROW_TIMEOUT_ENV_VAR,
+    RUN_DEADLINE_ENV_VAR,
+    TIMED_OUT_COLUMN,
+    deadline_target,
+)
+from llmops.experiment import Evaluator
+
+
+@pytest.fixture(autouse=True)
+def no_deadlines(monkeypatch):
+    """Fixture clearing the deadlines before and after each test."""
+    monkeypatch.delenv(ROW_TIMEOUT_ENV_VAR, raising=False)
+    monkeypatch.delenv(RUN_DEADLINE_ENV_VAR, raising=False)
+    yield
+    deadlines.set_row_timeout(None)
+    deadlines.start_run_deadline(None)
+
+
+def slow_target(question: str, delay_s: float = 0.0):
+    """Answer after ``delay_s`` seconds."""
+    time.sleep(delay_s)
+    return {"response": question.upper()}
+
+
+def test_target_is_unchanged_without_deadlines():
+    """Test targets are not wrapped when no timeout or deadline is configured."""
+    assert deadline_target(slow_target) is slow_target
+
+
+def test_slow_rows_time_out_and_fast_rows_are_flagged(monkeypatch):
+    """Test rows over the row timeout get the timeout output and others keep theirs."""
+    monkeypatch.setenv(ROW_TIMEOUT_ENV_VAR, "0.2")
+    target = deadline_target(slow_target)
+
+    assert inspect.signature(target) == inspect.signature(slow_target)
+    assert target("fast") == {"response": "FAST", TIMED_OUT_COLUMN: False}
+    start = time.perf_counter()
+    output = target("slow", delay_s=2.0)
+    assert time.perf_counter() - start < 1.0
+    assert output[TIMED_OUT_COLUMN] is True
+    assert output["response"] == ""
+    assert target.timeouts == 1
+
+
+def test_rows_after_the_run_deadline_are_not_started():
+    """Test an expired run deadline returns timeout outputs without calling the target."""
+    calls = []
+    deadlines.start_run_deadline(0.001)
+    time.sleep(0.01)
+
+    target = deadline_target(lambda question: calls.append(question))
+
+    assert deadlines.run_expired()
+    assert target("q")[TIMED_OUT_COLUMN] is True
+    assert calls == []
+    assert target.timeouts == 1
+
+
+def test_row_budget_is_cut_short_by_the_run_deadline():
+    """Test the row budget never exceeds the time left in the run."""
+    deadlines.start_run_deadline(5.0)
+
+    assert deadlines.row_budget(60.0) <= 5.0
+    assert deadlines.row_budget(1.0) == 1.0
+
+
+def test_errors_and_context_reach_the_caller():
+    """Test target errors are raised to the caller and the call sees its thread."""
+    caller = threading.current_thread()
+
+    def failing(question):
+        assert threading.current_thread() is not caller
+        raise KeyError(question)
+
+    with pytest.raises(KeyError):
+        deadline_target(failing, timeout_s=1.0)("q")
+
+
+def test_evaluator_reads_row_timeout():
+    """Test evaluators parse the optional row_timeout_s field."""
+    data = {
+        "name": "eval_f1_score",
+        "flow": "evaluations",
+        "entry_point": "flow:run",
+        "connections_ref": [],
+        "env_vars": [],
+    }
+
+    assert Evaluator.from_dict(data, {}).row_timeout_s is None
+    assert Evaluator.from_dict({**data, "row_timeout_s": "30"}, {}).row_timeout_s == 30.0
+
+
+def test_target_sees_the_row_deadline():
+    """Test the target runs under the row deadline and its expiry is a timeout."""
+    from lib.request_deadline.deadline import check_deadline, remaining
+
+    def target(question):
+        assert 0 < remaining() <= 0.2
+        time.sleep(0.05)
+        check_deadline("llm")
+        return {"response": question}
+
+    assert deadline_target(target, timeout_s=0.2)("q")[TIMED_OUT_COLUMN] is False
+    assert deadline_target(target, timeout_s=0.04)("q")[TIMED_OUT_COLUMN] is True
@@ -0,0 +1,108 @@
+"""Tests for the evaluation function registry."""
+import sys
+import textwrap
+
+import pytest
+
+from llmops import evaluator_registry
+from llmops.evaluator_registry import DiscoveryIndex, EvaluatorRegistry
+from llmops.experiment import Evaluator, Experiment
+
+
+@pytest.fixture
+def use_case(tmp_path, monkeypatch):
+    """Fixture providing a use case package with two evaluation modules."""
+    root = tmp_path / "registry_case"
+    (root / "evaluations").mkdir(parents=True)
+    (root / "__init__.py").write_text("")
+    (root / "evaluations" / "__init__.py").write_text("")
+    (root / "evaluations" / "eval_first.py").write_text(textwrap.dedent('''
+        """First evaluation module."""
+        from os.path import join as eval_imported
+
+
+        def eval_run(*args):
+            """Run the evaluation."""
+            return "first"
+
+
+        async def eval_run_async(*args):
+            """Run the evaluation asynchronously."""
+            return "first async"
+
+
+        def helper():
+            """Not an evaluation function."""
+    '''))
+    (root / "evaluations" / "extra.py").write_text(textwrap.dedent('''
+        """Module referenced by an explicit entry point."""
+
+
+        def score(*args):
+            """Run the evaluation."""
+            return "extra"
+    '''))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    return root
+
+
+def _evaluator(name, functions=None):
+    return Evaluator(
+        name=name, flow="evaluations", entry_point="flow:run",
+        connections=[], env_vars=[], datasets=[], functions=functions or []
+    )
+
+
+def _experiment(*evaluators):
+    return Experiment(
+        name="registry_case", flow="flows", entry_point="flow:run",
+        connections=[], env_vars=[], evaluators=list(evaluators)
+    )
+
+
+def test_registry_resolves_without_touching_sys_path(use_case):
+    """Test discovered and explicit functions resolve with sys.path unchanged."""
+    experiment = _experiment(
+        _evaluator("eval_first"),
+        _evaluator("eval_other", ["registry_case.evaluations.extra:score"]),
+        _evaluator("eval_missing"),
+    )
+    sys_path = list(sys.path)
+
+    registry = EvaluatorRegistry.from_experiment("registry_case", experiment)
+
+    assert [name for name, _ in registry.functions("eval_first")] == \
+        ["eval_run", "eval_run_async"]
+    assert registry.function("eval_first", "eval_run")() == "first"
+    assert registry.function("eval_other", "score")() == "extra"
+    assert registry.functions("eval_missing") == []
+    assert sys.path == sys_path
+    with pytest.raises(KeyError):
+        registry.function("eval_first", "helper")
+
+
+def test_discovery_index_is_reused(use_case, monkeypatch):
+    """Test unchanged files are not parsed again, edited files are."""
+    index_path = str(use_case / "index.json")
+    experiment = _experiment(_evaluator("eval_first"))
+    EvaluatorRegistry.from_experiment("registry_case", experiment, index_path)
+
+    def fail(file_path):
+        pytest.fail(f"{file_path} was parsed again")
+
+    monkeypatch.setattr(evaluator_registry, "discover_functions", fail)
+    EvaluatorRegistry.from_experiment("registry_case", experiment, index_path)
+
+    module_file = use_case / "evaluations" / "eval_first.py"
+    module_file.write_text(module_file.read_text() + "\n\ndef eval_new():\n    pass\n")
+    monkeypatch.undo()
+    monkeypatch.chdir(use_case.parent)
+    index = DiscoveryIndex(index_path)
+    assert index.functions("registry_case/evaluations/eval_first.py")[-1] == "eval_new"
+
+
+def test_invalid_entry_point():
+    """Test explicit entry points must name a function."""
+    with pytest.raises(ValueError, match="expected module.path:function"):
+        EvaluatorRegistry().register("eval_bad", ["module.without.function"])
@@ -0,0 +1,83 @@
+"""Tests for the arithmetic fast path of the math_coding flow."""
+import os
+
+import pytest
+
+from benchmarks.mock_llm import MockChatServer
+from lib.fast_path.arithmetic import answer, safe_eval, to_expression
+
+FLOW_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)),
+    "math_coding", "flows", "math_code_generation"
+)
+
+
+@pytest.mark.parametrize("question,expected", [
+    ("What is the sum of 5 and 3?", "8"),
+    ("Subtract 7 from 10.", "3"),
+    ("Multiply 6 by 4.", "24"),
+    ("Divide 20 by 5.", "4"),
+    ("What is the square root of 81?", "9"),
+    ("What is the remainder when 17 is divided by 5?", "2"),
+    ("what is 2^10", "1024"),
+    ("Calculate (3 + 4) * 2.5", "17.5"),
+    ("What is 7 divided by 2?", "3.5"),
+    ("What is 10 divided by 3?", "3.3333333333333335"),
+    ("What is the square of -3?", "9"),
+    ("What is the cube of -2?", "-8"),
+    ("Subtract -2 from 5.", "7"),
+    ("What is the product of -4 and -5?", "20"),
+    ("What is the sum of 5 and -3?", "2"),
+    ("what is (-3) ** 2", "9"),
+])
+def test_answers_plain_arithmetic(question, expected):
+    """Test phrasings and plain expressions are answered like the flow prints them."""
+    assert answer(question) == expected
+
+
+@pytest.mark.parametrize("question", [
+    "Solve for x in the equation 2x + 3 = 9.",
+    "A car travels 200 miles in 4 hours. What is the average speed of the car?",
+    "What is 1 / 0?",
+    "What is 10 to the power of 1000?",
+    "What is __import__('os').getcwd()?",
+    "What is the square root of -4?",
+    "What is -3 ** 2?",
+    "What is -3 squared?",
+])
+def test_everything_else_falls_through(question):
+    """Test word problems, errors and unsafe input are left to the LLM."""
+    assert answer(question) is None
+
+
+def test_safe_eval_rejects_anything_but_arithmetic():
+    """Test names, calls and oversized exponents are refused."""
+    assert safe_eval("-(2 + 3) ** 2 // 4") == -7
+    for expression in ("abs(-1)", "x + 1", "2 ** 101", "'a' * 3"):
+        with pytest.raises(ValueError):
+            safe_eval(expression)
+    assert to_expression("What is 5 plus 3 times 2?") == "5 + 3 * 2"
+
+
+def test_flow_skips_the_llm_for_arithmetic(monkeypatch):
+    """Test the flow answers arithmetic locally and flags the row."""
+    from math_coding.flows.math_code_generation.pure_python_flow import (
+        get_math_response
+    )
+
+    monkeypatch.setenv("ARITHMETIC_FAST_PATH", "true")
+    monkeypatch.delenv("QUESTION_CACHE_SIZE", raising=False)
+    monkeypatch.setenv("PROMPTY_FILE", "math_prompt.prompty")
+    monkeypatch.setenv("AZURE_AI_CHAT_KEY", "mock")
+    monkeypatch.chdir(FLOW_DIR)
+    with MockChatServer() as server:
+        monkeypatch.setenv("AZURE_AI_CHAT_ENDPOINT", server.endpoint)
+        fast = get_math_response("Multiply 6 by 4.")
+        monkeypatch.delenv("ARITHMETIC_FAST_PATH")
+        slow = get_math_response("Multiply 6 by 4.")
+
+    assert fast["response"] == slow["response"] == "24"
+    # Off by default, so experiments measure the prompt on every row
+    assert fast["fast_path"] and not slow["fast_path"]
+    assert fast["prompt_tokens"] == 0
+    assert server.requests == 1
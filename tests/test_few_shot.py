@@ -0,0 +1,81 @@
+"""Tests for BM25 few-shot example selection."""
+import json
+import os
+
+from azure.ai.inference.prompts import PromptTemplate
+
+from lib.few_shot.selector import BM25Index, FewShotSelector, get_selector, tokenize
+
+FLOW_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)),
+    "math_coding", "flows", "math_code_generation"
+)
+
+EXAMPLES = [
+    {"question": "What is 37593 * 67?", "code": "print(37593 * 67)"},
+    {"question": "What is the sum of 128 and 47?", "code": "print(128 + 47)"},
+    {"question": "A circle has a diameter of 10. What is its area?",
+     "code": "print(3.14 * 5 ** 2)"},
+    {"question": "A triangle has base 12 and height 8. What is its area?",
+     "code": "print(12 * 8 / 2)"},
+]
+
+
+def test_tokenize_keeps_words_and_operators():
+    """Test numbers and stop words are dropped but operators are kept."""
+    assert tokenize("What is 37593 * 67?") == ["*"]
+    assert tokenize("Solve 2x + 3 = 11") == ["solve", "x", "+", "="]
+
+
+def test_bm25_ranks_shared_rare_terms_first():
+    """Test documents sharing rarer terms with the query rank higher."""
+    index = BM25Index([example["question"] for example in EXAMPLES])
+
+    assert index.rank("A circle has radius 7, what is the area?")[:2] == [2, 3]
+    assert index.scores("unrelated words") == [0.0] * 4
+
+
+def test_select_respects_k_budget_and_falls_back_to_bank_order():
+    """Test selection size, token budget and the fallback for unknown questions."""
+    selector = FewShotSelector(EXAMPLES, k=2, token_budget=None)
+    assert [e["question"] for e in selector.select("Area of a circle?")] == [
+        EXAMPLES[2]["question"], EXAMPLES[3]["question"]
+    ]
+    assert selector.select("Name a prime")[0]["question"] == EXAMPLES[0]["question"]
+    assert json.loads(selector.select("Area of a circle?")[0]["code"]) == {
+        "code": EXAMPLES[2]["code"]
+    }
+
+    # The circle example costs 20 tokens, the triangle example 21
+    budgeted = FewShotSelector(EXAMPLES, k=4, token_budget=30)
+    selected = budgeted.select("Area of a circle?")
+    assert [e["question"] for e in selected] == [EXAMPLES[2]["question"]]
+
+
+def test_get_selector_is_cached_until_the_bank_changes(tmp_path, monkeypatch):
+    """Test the index is built once per bank file version."""
+    bank = tmp_path / "bank.jsonl"
+    bank.write_text("".join(json.dumps(e) + "\n" for e in EXAMPLES))
+    monkeypatch.setenv("FEW_SHOT_FILE", str(bank))
+    monkeypatch.setenv("FEW_SHOT_K", "3")
+
+    selector = get_selector()
+    assert get_selector() is selector
+    assert selector.k == 3
+
+    bank.write_text(json.dumps(EXAMPLES[0]) + "\n")
+    assert len(get_selector().examples) == 1
+
+
+def test_prompty_renders_selected_examples():
+    """Test the math_coding prompty files show only the selected examples."""
+    selector = get_selector(os.path.join(FLOW_DIR, "few_shot_examples.jsonl"), k=2)
+    question = "A circle has a radius of 7, what is the area?"
+    examples = selector.select(question)
+
+    for name in ("math_prompt.prompty", "another_template.prompty"):
+        template = PromptTemplate.from_prompty(os.path.join(FLOW_DIR, name))
+        content = template.create_messages(question=question, examples=examples)[-1]["content"]
+        assert content.count("QUESTION:") == 3
+        assert examples[0]["code"] in content
+        assert content.rstrip().endswith(f"QUESTION: {question}\nCODE:")
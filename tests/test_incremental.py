@@ -0,0 +1,130 @@
+"""Tests for incremental evaluation."""
+import json
+import textwrap
+
+import pytest
+
+from lib.answer_len.answer_length import AnswerLengthEvaluator
+from lib.f1_score.f1_score import F1ScoreEvaluator
+from llmops import local_eval
+from llmops.incremental import ResultCache, fingerprint_target, incremental_target
+from llmops.local_eval import evaluate
+
+
+def _write_rows(path, answers):
+    path.write_text("".join(
+        json.dumps({"question": f"q{i}", "answer": answer}) + "\n"
+        for i, answer in enumerate(answers)
+    ))
+
+
+@pytest.fixture
+def calls():
+    """Fixture providing a target that records the questions it answers."""
+    questions = []
+
+    def target(question):
+        questions.append(question)
+        return {"response": f"answer {question}"}
+
+    return questions, target
+
+
+def test_unchanged_rows_are_not_recomputed(tmp_path, calls, monkeypatch):
+    """Test only edited rows call the target and the evaluators again."""
+    questions, target = calls
+    data = tmp_path / "data.jsonl"
+    _write_rows(data, ["answer q0", "answer q1", "other"])
+    cache = ResultCache(str(tmp_path / "cache.db"))
+    evaluators = {"f1": F1ScoreEvaluator(), "length": AnswerLengthEvaluator()}
+    config = {"default": {"column_mapping": {
+        "ground_truth": "${data.answer}", "response": "${target.response}"
+    }}}
+
+    first = evaluate(str(data), evaluators, target, config, cache=cache)
+    assert questions == ["q0", "q1", "q2"]
+
+    scored = []
+    score_columns = local_eval.score_columns
+    monkeypatch.setattr(
+        local_eval, "score_columns",
+        lambda evaluator, columns, count: scored.append(count)
+        or score_columns(evaluator, columns, count)
+    )
+    second = evaluate(str(data), evaluators, target, config, cache=cache)
+    assert questions == ["q0", "q1", "q2"]
+    assert scored == []
+    assert second["metrics"] == first["metrics"]
+    assert second["rows"] == first["rows"]
+
+    # Editing the ground truth of one row re-scores it without a target call
+    _write_rows(data, ["answer q0", "answer q1", "answer q2"])
+    third = evaluate(str(data), evaluators, target, config, cache=cache)
+    assert questions == ["q0", "q1", "q2"]
+    assert scored == [1, 1]
+    assert third["metrics"]["f1.f1_score"] == 1.0
+
+
+def test_changed_evaluator_mapping_only_rescores(tmp_path, calls):
+    """Test a changed evaluator fingerprint keeps the cached target outputs."""
+    questions, target = calls
+    data = tmp_path / "data.jsonl"
+    _write_rows(data, ["a", "b"])
+    cache = ResultCache(str(tmp_path / "cache.db"))
+
+    evaluate(str(data), {"length": AnswerLengthEvaluator()}, target, cache=cache)
+    result = evaluate(
+        str(data), {"length": AnswerLengthEvaluator()}, target,
+        {"length": {"column_mapping": {"response": "${data.answer}"}}},
+        cache=cache
+    )
+
+    assert questions == ["q0", "q1"]
+    assert result["metrics"]["length.answer_length"] == 1.0
+
+
+def test_incremental_target_wrapper(tmp_path, calls, monkeypatch):
+    """Test the target wrapper reuses outputs and is a no-op without a cache."""
+    questions, target = calls
+    monkeypatch.delenv("EVAL_CACHE_PATH", raising=False)
+    assert incremental_target(target) is target
+
+    monkeypatch.setenv("EVAL_CACHE_PATH", str(tmp_path / "cache.db"))
+    cached = incremental_target(target)
+    assert cached(question="q0") == {"response": "answer q0"}
+    assert incremental_target(target)("q0") == {"response": "answer q0"}
+    assert questions == ["q0"]
+
+    monkeypatch.setenv("PROMPTY_FILE", "other.prompty")
+    incremental_target(target)("q0")
+    assert questions == ["q0", "q0"]
+
+
+def test_target_fingerprint_covers_local_imports_and_settings(tmp_path, monkeypatch):
+    """Test editing an imported helper module or a flow setting changes the fingerprint."""
+    package = tmp_path / "fp_flow"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "helper.py").write_text("SUFFIX = '!'\n")
+    (package / "flow.py").write_text(textwrap.dedent('''
+        """Flow answering with a suffix from a helper module."""
+        import json
+
+        from .helper import SUFFIX
+
+
+        def run(question):
+            """Answer a question."""
+            return json.dumps(question + SUFFIX)
+    '''))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delenv("ARITHMETIC_FAST_PATH", raising=False)
+    from fp_flow.flow import run
+
+    first = fingerprint_target(run)
+    assert fingerprint_target(run) == first
+    (package / "helper.py").write_text("SUFFIX = '?'\n")
+    second = fingerprint_target(run)
+    assert second != first
+    monkeypatch.setenv("ARITHMETIC_FAST_PATH", "true")
+    assert fingerprint_target(run) != second
@@ -0,0 +1,124 @@
+"""Tests for the local evaluation runner and batch evaluators."""
+import json
+
+import numpy as np
+import pytest
+
+from lib.answer_len.answer_length import AnswerLengthEvaluator
+from lib.f1_score.f1_score import F1ScoreEvaluator
+from llmops.local_eval import build_columns, evaluate, score_columns
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    """Fixture providing a small question/answer dataset."""
+    path = tmp_path / "data.jsonl"
+    rows = [
+        {"question": "What is 5 + 3?", "answer": "8"},
+        {"question": "What is 10 - 7?", "answer": "3"},
+        {"question": "Name a color", "answer": "the red apple"},
+    ]
+    path.write_text("".join(json.dumps(r) + "\n" for r in rows))
+    return str(path)
+
+
+def fake_target(question):
+    """Answer every question with a fixed string."""
+    return {"response": "8" if "5 + 3" in question else "red apple"}
+
+
+class RowOnlyEvaluator:
+    """Evaluator without a batch implementation."""
+
+    def __call__(self, *, response, **kwargs):
+        """Score one row."""
+        return {"is_eight": int(response == "8")}
+
+
+def test_answer_length_batch_matches_rows():
+    """Test the vectorized answer length equals the per-row result."""
+    evaluator = AnswerLengthEvaluator()
+    responses = ["8", "", "hello world", 42, None]
+
+    batch = evaluator.evaluate_batch({"response": responses})["answer_length"]
+
+    assert isinstance(batch, np.ndarray)
+    assert batch.tolist() == [
+        evaluator(response=r)["answer_length"] for r in responses
+    ]
+
+
+def test_f1_batch_matches_rows():
+    """Test the batch F1 score equals the per-row result."""
+    evaluator = F1ScoreEvaluator()
+    responses = ["The answer is 8", "8", "red apple", "", "An apple, red!"]
+    truths = ["8", "8", "the red apple", "8", "red apple"]
+
+    batch = evaluator.evaluate_batch(
+        {"response": responses, "ground_truth": truths}
+    )["f1_score"]
+
+    expected = [
+        evaluator(response=r, ground_truth=t)["f1_score"]
+        for r, t in zip(responses, truths)
+    ]
+    assert batch.tolist() == pytest.approx(expected)
+    assert expected[1] == 1.0 and expected[3] == 0.0
+
+
+def test_build_columns_uses_mapping_and_defaults():
+    """Test explicit mappings and same-name defaults."""
+    rows = [{"answer": "8", "response": "data"}]
+    outputs = [{"response": "target"}]
+
+    columns = build_columns(
+        rows, outputs, ["response", "ground_truth"],
+        {"ground_truth": "${data.answer}"}
+    )
+
+    assert columns == {"response": ["target"], "ground_truth": ["8"]}
+    with pytest.raises(ValueError, match="Invalid column mapping"):
+        build_columns(rows, outputs, ["response"], {"response": "answer"})
+
+
+def test_score_columns_prefers_batch(mocker):
+    """Test evaluate_batch is used instead of per-row calls when present."""
+    evaluator = AnswerLengthEvaluator()
+    call = mocker.patch.object(AnswerLengthEvaluator, "__call__")
+
+    scores = score_columns(evaluator, {"response": ["ab", "abc"]}, 2)
+
+    call.assert_not_called()
+    assert scores["answer_length"].tolist() == [2, 3]
+
+
+def test_evaluate_with_target(data_path, tmp_path):
+    """Test a full local evaluation with batch and per-row evaluators."""
+    output_path = tmp_path / "result.json"
+
+    result = evaluate(
+        data=data_path,
+        target=fake_target,
+        evaluators={
+            "f1_score": F1ScoreEvaluator(),
+            "answer_length": AnswerLengthEvaluator(),
+            "row_only": RowOnlyEvaluator(),
+        },
+        evaluator_config={
+            "default": {"column_mapping": {
+                "ground_truth": "${data.answer}",
+                "response": "${target.response}",
+            }}
+        },
+        output_path=str(output_path)
+    )
+
+    first = result["rows"][0]
+    assert first["inputs.question"] == "What is 5 + 3?"
+    assert first["outputs.response"] == "8"
+    assert first["outputs.f1_score.f1_score"] == 1.0
+    assert first["outputs.row_only.is_eight"] == 1
+    assert result["metrics"]["answer_length.answer_length"] == \
+        pytest.approx((1 + 9 + 9) / 3)
+    assert result["metrics"]["f1_score.f1_score"] == pytest.approx(2 / 3)
+    assert json.loads(output_path.read_text())["metrics"] == result["metrics"]
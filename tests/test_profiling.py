@@ -0,0 +1,52 @@
+"""Tests for profiling evaluation runs."""
+import pstats
+
+import pytest
+
+from llmops.eval_experiments import prepare_and_execute
+from llmops.profiling import profiled
+
+
+def _busy(n):
+    return sum(i * i for i in range(n))
+
+
+@pytest.mark.parametrize("mode", ["cpu", "wall"])
+def test_cprofile_modes_write_profile_and_summary(tmp_path, mode):
+    """Test cpu and wall modes write a loadable profile and a top-N summary."""
+    with profiled(mode, "eval_f1/math", str(tmp_path), top_n=5):
+        _busy(20000)
+
+    stats = pstats.Stats(str(tmp_path / f"eval_f1_math.{mode}.prof"))
+    assert any(func[2] == "_busy" for func in stats.stats)
+    summary = (tmp_path / f"eval_f1_math.{mode}.txt").read_text()
+    assert summary.startswith(f"eval_f1/math: {mode} profile")
+    assert "_busy" in summary
+
+
+def test_memory_mode_reports_allocations(tmp_path):
+    """Test the memory mode writes a snapshot and the top allocation sites."""
+    with profiled("memory", "eval_len", str(tmp_path), top_n=3):
+        blocks = [bytearray(1024) for _ in range(1000)]
+
+    summary = (tmp_path / "eval_len.memory.txt").read_text()
+    assert "peak" in summary.splitlines()[0]
+    assert "test_profiling.py" in summary
+    assert (tmp_path / "eval_len.memory.tracemalloc").exists()
+    assert len(blocks) == 1000
+
+
+def test_profiled_is_a_no_op_without_mode(tmp_path):
+    """Test no profile is written when profiling is off."""
+    with profiled(None, "eval_len", str(tmp_path / "profiles")):
+        _busy(10)
+    assert not (tmp_path / "profiles").exists()
+
+
+def test_unknown_profile_mode_is_rejected(tmp_path):
+    """Test unknown modes fail before any evaluation runs."""
+    with pytest.raises(ValueError, match="Unknown profile mode 'gpu'"):
+        with profiled("gpu", "eval_len", str(tmp_path)):
+            pass
+    with pytest.raises(ValueError, match="Unknown profile mode 'gpu'"):
+        prepare_and_execute(base_path=str(tmp_path), profile="gpu")
@@ -0,0 +1,117 @@
+"""Tests for the question cache of trivially different questions."""
+import os
+import time
+
+import pytest
+
+from benchmarks.mock_llm import MockChatServer
+from lib.question_cache import near_duplicate
+from lib.question_cache.near_duplicate import NearDuplicateCache, canonicalize
+from lib.request_deadline.deadline import DeadlineExceeded, request_deadline
+
+FLOW_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)),
+    "math_coding", "flows", "math_code_generation"
+)
+
+
+def test_canonicalize_ignores_case_spacing_and_number_format():
+    """Test trivial variations canonicalize to the same text and numbers."""
+    assert canonicalize("What is 5+3?") == canonicalize("  what is 5 + 3")
+    assert canonicalize("Add 1,000.50 and 2.0") == ("add # and #", ("1000.5", "2"))
+
+
+def test_only_trivial_variations_hit():
+    """Test punctuation and formatting hit while changed words or numbers miss."""
+    cache = NearDuplicateCache(max_entries=8)
+    question = "What is the sum of 128 and 47?"
+    cache.put(question, "print(128 + 47)", "175")
+
+    assert cache.get("what is the SUM of 128 and 47.0").response == "175"
+    assert cache.get("What is the sum of 128 and 48?") is None
+    assert cache.get("What's the sum of 128 and 47?") is None
+    assert cache.get(question, namespace="other prompty") is None
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_added_or_changed_words_miss():
+    """Test negations and changed bounds never get the cached answer."""
+    cache = NearDuplicateCache(max_entries=8)
+    cache.put(
+        "How many of the integers between 0 and 99 inclusive are divisible by 8?",
+        "print(len([n for n in range(100) if n % 8 == 0]))", "13"
+    )
+
+    assert cache.get(
+        "How many of the integers between 0 and 99 inclusive are not divisible by 8?"
+    ) is None
+    assert cache.get(
+        "How many of the integers between 0 and 99 exclusive are divisible by 8?"
+    ) is None
+    assert cache.get(
+        "how many of the integers between 0 and 99, inclusive, are divisible by 8"
+    ).response == "13"
+
+
+def test_cache_evicts_least_recently_used():
+    """Test the cache stays bounded and keeps recently read entries."""
+    cache = NearDuplicateCache(max_entries=2)
+    cache.put("what is 1 + 1", "print(1 + 1)", "2")
+    cache.put("what is 2 + 2", "print(2 + 2)", "4")
+    cache.get("what is 1 + 1")
+    cache.put("what is 3 + 3", "print(3 + 3)", "6")
+
+    assert len(cache) == 2
+    assert cache.get("what is 2 + 2") is None
+    assert cache.get("What is 1+1?").response == "2"
+    cache.discard("what is 1 + 1")
+    assert len(cache) == 1
+
+
+def test_flow_answers_reformatted_questions_without_the_llm(monkeypatch):
+    """Test the flow serves a reformatted question from the cache and can re-verify it."""
+    from math_coding.flows.math_code_generation.pure_python_flow import (
+        get_math_response
+    )
+
+    monkeypatch.setattr(near_duplicate, "_CACHE", None)
+    monkeypatch.setenv("QUESTION_CACHE_SIZE", "16")
+    monkeypatch.setenv("QUESTION_CACHE_VERIFY", "true")
+    monkeypatch.setenv("ARITHMETIC_FAST_PATH", "false")
+    monkeypatch.setenv("PROMPTY_FILE", "math_prompt.prompty")
+    monkeypatch.setenv("AZURE_AI_CHAT_KEY", "mock")
+    monkeypatch.chdir(FLOW_DIR)
+    with MockChatServer() as server:
+        monkeypatch.setenv("AZURE_AI_CHAT_ENDPOINT", server.endpoint)
+        first = get_math_response("What is the sum of 5 and 3?")
+        second = get_math_response("what is the  sum of 5 and 3")
+        third = get_math_response("What is the sum of 5 and 4?")
+
+    assert (first["response"], second["response"], third["response"]) == ("8", "8", "9")
+    assert second["prompt_tokens"] == 0
+    assert server.requests == 2
+
+
+def test_verifying_a_cached_answer_stops_at_the_deadline(monkeypatch):
+    """Test re-running cached code is bounded by the request deadline."""
+    from math_coding.flows.math_code_generation.pure_python_flow import (
+        get_math_response
+    )
+
+    monkeypatch.setattr(near_duplicate, "_CACHE", None)
+    monkeypatch.setenv("QUESTION_CACHE_SIZE", "16")
+    monkeypatch.setenv("QUESTION_CACHE_VERIFY", "true")
+    monkeypatch.setenv("ARITHMETIC_FAST_PATH", "false")
+    monkeypatch.setenv("PROMPTY_FILE", "math_prompt.prompty")
+    monkeypatch.setenv("AZURE_AI_CHAT_KEY", "mock")
+    monkeypatch.setenv("AZURE_AI_CHAT_ENDPOINT", "http://127.0.0.1:9")
+    question = "What is the sum of 5 and 3?"
+    near_duplicate.get_question_cache().put(
+        question, "import time\ntime.sleep(2)\nprint(8)", "8",
+        namespace=("math_prompt.prompty", None, None)
+    )
+
+    start = time.perf_counter()
+    with request_deadline(0.2), pytest.raises(DeadlineExceeded):
+        get_math_response(question)
+    assert time.perf_counter() - start < 1.5
@@ -0,0 +1,186 @@
+"""Tests for propagating a request deadline through the function app."""
+import importlib
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import azure.functions as func
+import pytest
+from azure.core.exceptions import ServiceResponseTimeoutError
+
+from benchmarks.mock_llm import MockChatServer
+from lib.request_deadline.deadline import (
+    TIMEOUT_ENV_VAR,
+    TIMEOUT_HEADER,
+    DeadlineExceeded,
+    call_options,
+    remaining,
+    request_deadline,
+    run_within_deadline,
+    timeout_from_headers,
+)
+
+FLOW_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)),
+    "math_coding", "flows", "math_code_generation"
+)
+AGENT_FLOW_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)),
+    "math_coding_agent", "flows", "math_code_generation"
+)
+
+
+def test_timeout_comes_from_the_header_capped_by_the_config(monkeypatch):
+    """Test the header sets the timeout, REQUEST_TIMEOUT_S the default and cap."""
+    monkeypatch.delenv(TIMEOUT_ENV_VAR, raising=False)
+    assert timeout_from_headers({}) is None
+    assert timeout_from_headers({TIMEOUT_HEADER: "1500"}) == 1.5
+
+    monkeypatch.setenv(TIMEOUT_ENV_VAR, "30")
+    assert timeout_from_headers({}) == 30.0
+    assert timeout_from_headers({TIMEOUT_HEADER: "60000"}) == 30.0
+    with pytest.raises(ValueError):
+        timeout_from_headers({TIMEOUT_HEADER: "-5"})
+
+
+def test_nested_deadlines_only_shorten_and_are_reset():
+    """Test an inner block cannot extend the deadline of the request."""
+    assert remaining() is None
+    with request_deadline(0.5) as outer:
+        with request_deadline(10.0) as inner:
+            assert inner == outer
+        with request_deadline(None) as inner:
+            assert inner == outer
+        with request_deadline(0.1) as inner:
+            assert inner < outer
+        assert 0 < remaining() <= 0.5
+    assert remaining() is None
+    assert call_options("llm") == {}
+
+
+def test_calls_stop_at_the_deadline():
+    """Test calls get the remaining time and fail fast once it is gone."""
+    with request_deadline(5.0):
+        options = call_options("llm")
+        assert 0 < options["timeout"] <= 5.0
+        assert run_within_deadline(sum, [1, 2], stage="exec") == 3
+
+    with request_deadline(0.1):
+        start = time.perf_counter()
+        with pytest.raises(DeadlineExceeded):
+            run_within_deadline(time.sleep, 5.0, stage="exec")
+        assert time.perf_counter() - start < 1.0
+        with pytest.raises(DeadlineExceeded):
+            call_options("llm")
+
+
+def test_flow_stops_waiting_for_a_slow_llm(monkeypatch):
+    """Test the LLM call of the flow is cut off at the request deadline."""
+    from math_coding.flows.math_code_generation.pure_python_flow import (
+        get_math_response
+    )
+
+    monkeypatch.setenv("ARITHMETIC_FAST_PATH", "false")
+    monkeypatch.delenv("QUESTION_CACHE_SIZE", raising=False)
+    monkeypatch.setenv("PROMPTY_FILE", "math_prompt.prompty")
+    monkeypatch.setenv("AZURE_AI_CHAT_KEY", "mock")
+    monkeypatch.chdir(FLOW_DIR)
+    with MockChatServer(latency_ms=2000) as server:
+        monkeypatch.setenv("AZURE_AI_CHAT_ENDPOINT", server.endpoint)
+        start = time.perf_counter()
+        with request_deadline(0.3), pytest.raises(DeadlineExceeded):
+            get_math_response("What is the sum of 5 and 3?")
+        assert time.perf_counter() - start < 1.5
+
+
+def test_orchestrator_returns_504_once_the_deadline_is_gone(monkeypatch):
+    """Test an exhausted deadline answers 504 and a bad header answers 400."""
+    from math_coding.deployment.function_orchestrator import process_math
+
+    monkeypatch.setenv("TRACE_EXPORTER", "none")
+
+    def request(timeout_ms):
+        return func.HttpRequest(
+            "GET", "/api/process-math", body=b"",
+            headers={TIMEOUT_HEADER: timeout_ms}, params={"question": "q"}
+        )
+
+    response = process_math(request("0.001"))
+    assert response.status_code == 504
+    assert json.loads(response.get_body()) == {"error": "Request timed out"}
+    assert process_math(request("soon")).status_code == 400
+
+
+class _SlowAgents:
+    """Agent operations whose run polls hang until the SDK timeout."""
+
+    def __init__(self):
+        self.cleanup = []
+
+    def create_agent(self, **kwargs):
+        return SimpleNamespace(id="agent-1")
+
+    def create_thread(self, **kwargs):
+        return SimpleNamespace(id="thread-1")
+
+    def create_message(self, **kwargs):
+        return None
+
+    def create_run(self, **kwargs):
+        return SimpleNamespace(id="run-1", status="queued")
+
+    def get_run(self, thread_id, run_id, timeout, **kwargs):
+        time.sleep(timeout + 0.01)
+        raise ServiceResponseTimeoutError("read timed out")
+
+    def cancel_run(self, thread_id, run_id):
+        self.cleanup.append(("cancel_run", run_id))
+
+    def delete_thread(self, thread_id):
+        self.cleanup.append(("delete_thread", thread_id))
+
+    def delete_agent(self, agent_id):
+        self.cleanup.append(("delete_agent", agent_id))
+
+
+def test_agent_orchestrator_returns_504_when_an_agent_call_times_out(monkeypatch):
+    """Test an SDK timeout at the deadline answers 504 and cancels the agent run."""
+    from lib.azure_clients import registry
+
+    agents = _SlowAgents()
+    monkeypatch.setenv("TRACE_EXPORTER", "none")
+    monkeypatch.setenv("PROMPTY_FILE", "math_prompt.prompty")
+    monkeypatch.setenv("GPT4O_DEPLOYMENT_NAME", "gpt-4o")
+    monkeypatch.setattr(
+        registry, "get_project_client", lambda: SimpleNamespace(agents=agents)
+    )
+    monkeypatch.chdir(AGENT_FLOW_DIR)
+    flow = importlib.import_module(
+        "math_coding_agent.flows.math_code_generation.pure_python_flow"
+    )
+    monkeypatch.setattr(flow, "project_client", SimpleNamespace(agents=agents))
+    monkeypatch.setattr(
+        flow, "CodeInterpreterTool",
+        lambda: SimpleNamespace(definitions=[], resources=None)
+    )
+    # Deployed next to the orchestrator by the function deployment workflow
+    monkeypatch.setitem(
+        sys.modules, "math_coding_agent.deployment.pure_python_flow", flow
+    )
+    from math_coding_agent.deployment.function_orchestrator import (
+        process_math_agent
+    )
+
+    response = process_math_agent(func.HttpRequest(
+        "GET", "/api/process-math-agent", body=b"",
+        headers={TIMEOUT_HEADER: "1200"}, params={"question": "What is 5 + 3?"}
+    ))
+
+    assert response.status_code == 504
+    assert agents.cleanup == [
+        ("cancel_run", "run-1"),
+        ("delete_thread", "thread-1"),
+        ("delete_agent", "agent-1"),
+    ]
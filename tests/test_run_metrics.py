@@ -0,0 +1,143 @@
+"""Tests for the per-row usage columns and their run-level aggregates."""
+import json
+import textwrap
+from types import SimpleNamespace
+
+from lib.answer_len.answer_length import AnswerLengthEvaluator
+from lib.flow_metrics.usage import AttemptCounter, StageTimer, usage_columns
+from llmops.local_eval import evaluate
+from llmops.run_metrics import usage_metrics
+from llmops.sharding import merge_results
+
+
+def test_usage_columns_from_timer_and_attempts():
+    """Test stage timings accumulate and attempts become retries."""
+    timer = StageTimer()
+    for _ in range(2):
+        with timer.stage("exec"):
+            pass
+    attempts = AttemptCounter()
+    for _ in range(3):
+        attempts(object())
+
+    columns = usage_columns(
+        SimpleNamespace(prompt_tokens=12, completion_tokens=30),
+        timer, attempts.retries
+    )
+
+    assert columns["prompt_tokens"] == 12
+    assert columns["completion_tokens"] == 30
+    assert columns["exec_latency_ms"] >= 0.0
+    assert columns["llm_latency_ms"] == 0.0
+    assert columns["retries"] == 2
+    assert usage_columns()["retries"] == 0
+
+
+def test_usage_metrics_percentiles_and_totals():
+    """Test p50/p95 are reported per column and totals for token counts."""
+    rows = [
+        {"outputs.prompt_tokens": 10, "outputs.llm_latency_ms": float(i)}
+        for i in range(1, 101)
+    ]
+    rows.append({"outputs.response": "no usage"})
+
+    metrics = usage_metrics(rows)
+
+    assert metrics["usage.prompt_tokens.total"] == 1000.0
+    assert metrics["usage.llm_latency_ms.p50"] == 50.5
+    assert metrics["usage.llm_latency_ms.p95"] == 95.05
+    assert "usage.llm_latency_ms.total" not in metrics
+    assert "usage.retries.p50" not in metrics
+    assert "usage.fast_path.rate" not in metrics
+
+
+def test_usage_metrics_fast_path_rate():
+    """Test boolean columns are reported as the share of true rows."""
+    rows = [{"outputs.fast_path": flag} for flag in (True, True, False, False)]
+    rows.append({"outputs.fast_path": "not a flag"})
+
+    metrics = usage_metrics(rows)
+
+    assert metrics == {"usage.fast_path.rate": 0.5}
+
+
+def test_merge_results_recomputes_percentiles():
+    """Test merged shards report percentiles of all rows, not their mean."""
+    shards = [
+        {"rows": [{"outputs.llm_latency_ms": v} for v in values]}
+        for values in ([1.0, 1.0, 1.0], [100.0])
+    ]
+    for shard in shards:
+        shard["metrics"] = usage_metrics(shard["rows"])
+
+    merged = merge_results(shards)
+
+    assert merged["metrics"]["usage.llm_latency_ms.p50"] == 1.0
+
+
+def test_local_evaluate_reports_usage(tmp_path):
+    """Test usage columns returned by the target are aggregated."""
+    data = tmp_path / "data.jsonl"
+    data.write_text("".join(
+        json.dumps({"question": f"q{i}"}) + "\n" for i in range(4)
+    ))
+
+    def target(question):
+        return {"response": question, **usage_columns(
+            SimpleNamespace(prompt_tokens=5, completion_tokens=2)
+        )}
+
+    result = evaluate(str(data), {"length": AnswerLengthEvaluator()}, target)
+
+    assert result["rows"][0]["outputs.prompt_tokens"] == 5
+    assert result["metrics"]["usage.prompt_tokens.total"] == 20.0
+    assert result["metrics"]["usage.completion_tokens.p95"] == 2.0
+
+
+def test_plain_run_writes_usage_metrics(tmp_path, monkeypatch):
+    """Test a run without workers writes the usage aggregates to the report dir."""
+    from llmops.eval_experiments import prepare_and_execute
+
+    root = tmp_path / "usage_case"
+    (root / "evaluations").mkdir(parents=True)
+    (root / "data").mkdir()
+    (root / "__init__.py").write_text("")
+    (root / "evaluations" / "__init__.py").write_text("")
+    (root / "evaluations" / "eval_usage.py").write_text(textwrap.dedent('''
+        """Evaluation returning rows with usage columns, like evaluate()."""
+
+
+        def eval_usage(name, data_path, column_mapping, output_path):
+            """Return two rows with their token counts."""
+            return {
+                "rows": [{"outputs.prompt_tokens": 10}, {"outputs.prompt_tokens": 30}],
+                "metrics": {"f1_score": 0.5},
+            }
+    '''))
+    (root / "data" / "rows.jsonl").write_text(json.dumps({"question": "q"}) + "\n")
+    (root / "experiment.yaml").write_text(textwrap.dedent('''
+        name: usage_case
+        flow: flows
+        entry_point: flow:run
+        connections_ref: []
+        connections: []
+        env_vars: []
+        evaluators:
+        - name: eval_usage
+          flow: evaluations
+          entry_point: flow:run
+          connections_ref: []
+          env_vars: []
+          datasets:
+            - name: rows
+              source: data/rows.jsonl
+    '''))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    prepare_and_execute(base_path="usage_case", env_name="dev", report_dir="reports")
+
+    path = tmp_path / "reports" / "usage_case_eval_usage_rows_eval_usage_metrics.json"
+    metrics = json.loads(path.read_text())["metrics"]
+    assert metrics["f1_score"] == 0.5
+    assert metrics["usage.prompt_tokens.total"] == 40.0
@@ -0,0 +1,106 @@
+"""Tests for dataset sharding and shard result merging."""
+import json
+
+import pytest
+
+from llmops.sharding import (
+    merge_report_dir,
+    merge_result_files,
+    merge_results,
+    shard_for_row,
+    validate_shard,
+    write_shard
+)
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    """Fixture providing a JSONL dataset with 50 rows."""
+    data_path = tmp_path / "data.jsonl"
+    rows = [{"question": f"What is {i} + {i}?", "answer": str(2 * i)}
+            for i in range(50)]
+    data_path.write_text(
+        "\n".join(json.dumps(row) for row in rows) + "\n", encoding="utf-8"
+    )
+    return data_path, rows
+
+
+def _shard_result(values):
+    rows = [{"inputs.question": f"q{v}", "outputs.f1_score.f1_score": v}
+            for v in values]
+    return {
+        "rows": rows,
+        "metrics": {"f1_score.f1_score": sum(values) / len(values)}
+    }
+
+
+def test_validate_shard_rejects_out_of_range():
+    """Test validation of shard specifications."""
+    validate_shard(4, 3)
+    with pytest.raises(ValueError, match="num_shards"):
+        validate_shard(0, 0)
+    with pytest.raises(ValueError, match="shard_index"):
+        validate_shard(4, 4)
+
+
+def test_shard_assignment_is_deterministic():
+    """Test rows always hash to the same shard."""
+    line = '{"question": "What is 1 + 1?", "answer": "2"}'
+    assert shard_for_row(line, 8) == shard_for_row(line + "\n", 8)
+    assert 0 <= shard_for_row(line, 8) < 8
+
+
+def test_shards_partition_dataset(dataset, tmp_path):
+    """Test every row lands in exactly one shard."""
+    data_path, rows = dataset
+    seen = []
+    for index in range(3):
+        shard_path = write_shard(
+            str(data_path), str(tmp_path / "shards"), 3, index
+        )
+        assert "shard" + str(index) + "of3" in shard_path
+        with open(shard_path, encoding="utf-8") as f:
+            seen.extend(json.loads(line) for line in f)
+
+    assert sorted(seen, key=lambda r: r["question"]) == \
+        sorted(rows, key=lambda r: r["question"])
+
+
+def test_merge_recomputes_row_mean():
+    """Test merged metrics equal the mean over all rows."""
+    merged = merge_results([_shard_result([1.0]), _shard_result([0.0, 0.5])])
+    assert len(merged["rows"]) == 3
+    assert merged["metrics"]["f1_score.f1_score"] == pytest.approx(0.5)
+
+
+def test_merge_weights_metrics_without_rows():
+    """Test metrics without row columns are weighted by row count."""
+    first = {"rows": [{}, {}, {}], "metrics": {"rate": 1.0}}
+    second = {"rows": [{}], "metrics": {"rate": 0.0}}
+    merged = merge_results([first, second])
+    assert merged["metrics"]["rate"] == pytest.approx(0.75)
+
+
+def test_merge_result_files_detects_missing_shard(tmp_path):
+    """Test merging fails when a shard result is missing."""
+    path = tmp_path / "exp_eval_ds_shard0of2_f1.json"
+    path.write_text(json.dumps(_shard_result([1.0])), encoding="utf-8")
+
+    with pytest.raises(ValueError, match=r"Missing shard results.*\[1\]"):
+        merge_result_files([str(path)])
+
+
+def test_merge_report_dir_groups_shards(tmp_path):
+    """Test shard outputs are grouped and written as merged files."""
+    for index, values in enumerate([[1.0, 1.0], [0.0, 1.0]]):
+        path = tmp_path / f"exp_eval_ds_shard{index}of2_f1.json"
+        path.write_text(json.dumps(_shard_result(values)), encoding="utf-8")
+
+    merged = merge_report_dir(str(tmp_path))
+
+    merged_path = str(tmp_path / "exp_eval_ds_merged_f1.json")
+    assert list(merged) == [merged_path]
+    assert merged[merged_path]["metrics"]["f1_score.f1_score"] == \
+        pytest.approx(0.75)
+    with open(merged_path, encoding="utf-8") as f:
+        assert len(json.load(f)["rows"]) == 4
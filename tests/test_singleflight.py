@@ -0,0 +1,99 @@
+"""Tests for coalescing identical in-flight requests."""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks.mock_llm import MockChatServer
+from lib.question_cache.singleflight import SingleFlight
+
+FLOW_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)),
+    "math_coding", "flows", "math_code_generation"
+)
+
+
+def _run_concurrently(flight, key, function, callers, timeout=None):
+    started = threading.Barrier(callers)
+
+    def call():
+        started.wait()
+        try:
+            return flight.do(key, function, timeout)
+        except Exception as e:  # noqa: BLE001 - the test inspects every outcome
+            return e
+
+    with ThreadPoolExecutor(callers) as pool:
+        return list(pool.map(lambda _: call(), range(callers)))
+
+
+def test_concurrent_callers_share_one_call():
+    """Test one caller computes and the others receive its result."""
+    flight = SingleFlight()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return "8"
+
+    outcomes = _run_concurrently(flight, "q", compute, callers=8)
+
+    assert len(calls) == 1
+    assert [result for result, _ in outcomes] == ["8"] * 8
+    assert sorted(shared for _, shared in outcomes) == [False] + [True] * 7
+    assert flight.in_flight() == 0
+    assert flight.do("q", lambda: "again") == ("again", False)
+
+
+def test_errors_reach_every_caller_and_are_not_kept():
+    """Test a failed call raises for all its callers and the next caller retries."""
+    flight = SingleFlight()
+
+    def fail():
+        time.sleep(0.1)
+        raise RuntimeError("llm unavailable")
+
+    outcomes = _run_concurrently(flight, "q", fail, callers=4)
+
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    assert flight.do("q", lambda: "ok") == ("ok", False)
+
+
+def test_waiting_caller_times_out_without_stopping_the_call():
+    """Test a waiter times out while the running call still completes."""
+    flight = SingleFlight()
+    release = threading.Event()
+
+    with ThreadPoolExecutor(1) as pool:
+        leader = pool.submit(flight.do, "q", lambda: release.wait() and "done")
+        while not flight.in_flight():
+            time.sleep(0.001)
+        with pytest.raises(TimeoutError):
+            flight.do("q", lambda: "not run", timeout=0.05)
+        release.set()
+        assert leader.result() == ("done", False)
+
+
+def test_flow_coalesces_a_burst_of_identical_questions(monkeypatch):
+    """Test a burst of the same question makes a single LLM request."""
+    from math_coding.flows.math_code_generation.pure_python_flow import (
+        get_math_response
+    )
+
+    monkeypatch.setenv("ARITHMETIC_FAST_PATH", "false")
+    monkeypatch.delenv("QUESTION_CACHE_SIZE", raising=False)
+    monkeypatch.setenv("PROMPTY_FILE", "math_prompt.prompty")
+    monkeypatch.setenv("AZURE_AI_CHAT_KEY", "mock")
+    monkeypatch.chdir(FLOW_DIR)
+    with MockChatServer(latency_ms=200) as server, ThreadPoolExecutor(6) as pool:
+        monkeypatch.setenv("AZURE_AI_CHAT_ENDPOINT", server.endpoint)
+        outputs = list(pool.map(
+            get_math_response, ["What is the sum of 5 and 3?"] * 6
+        ))
+
+    assert {output["response"] for output in outputs} == {"8"}
+    assert server.requests == 1
+    assert sum(output["prompt_tokens"] > 0 for output in outputs) == 1
@@ -0,0 +1,188 @@
+"""Tests for experiment sweeps."""
+import json
+import textwrap
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from llmops.experiment import DatasetMapping, Evaluator, Experiment, SweepConfig
+from llmops.sweep import RateLimiter, run_sweep
+
+
+def _experiment(data_source, sweep):
+    dataset = DatasetMapping(
+        name="math",
+        source=data_source,
+        mappings={
+            "ground_truth": "${data.answer}",
+            "response": "${target.response}",
+        }
+    )
+    return Experiment(
+        name="sweep_case",
+        flow="flows",
+        entry_point="flow:run",
+        connections=[],
+        env_vars=[],
+        evaluators=[
+            Evaluator(
+                name=name, flow="evaluations", entry_point="flow:run",
+                connections=[], env_vars=[], datasets=[dataset]
+            )
+            for name in ("eval_f1_score", "eval_len_score")
+        ],
+        sweep=sweep
+    )
+
+
+def test_variants_expand_the_matrix():
+    """Test the sweep expands every combination of the configured axes."""
+    sweep = SweepConfig.from_dict({
+        "prompty": ["a.prompty", "b.prompty"],
+        "temperature": [0.0, 0.5, 1.0],
+        "evaluators": {"f1": "lib.f1_score.f1_score:F1ScoreEvaluator"},
+    })
+
+    variants = sweep.variants()
+
+    assert len(variants) == 6
+    assert variants[0] == {"prompty_file": "a.prompty", "temperature": 0.0}
+    with pytest.raises(ValueError, match="requires evaluators"):
+        SweepConfig.from_dict({"prompty": ["a.prompty"]})
+
+
+def test_run_sweep_shares_dataset_and_pool(tmp_path):
+    """Test all variants run concurrently and are compared in one table."""
+    data_path = tmp_path / "math.jsonl"
+    data_path.write_text("".join(
+        json.dumps({"question": f"{i} + 1", "answer": str(i + 1)}) + "\n"
+        for i in range(4)
+    ))
+    sweep = SweepConfig(
+        prompty=["good.prompty", "bad.prompty"],
+        temperature=[0.0, 0.7],
+        evaluators={
+            "eval_f1_score": "lib.f1_score.f1_score:F1ScoreEvaluator",
+            "eval_len_score": "lib.answer_len.answer_length:AnswerLengthEvaluator",
+        },
+        max_concurrency=16
+    )
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def target(question, prompty_file=None, temperature=None):
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+        if prompty_file == "bad.prompty" and temperature:
+            raise RuntimeError("rate limited")
+        left = int(question.split(" + ")[0])
+        answer = left + 1 if prompty_file == "good.prompty" else left
+        return {"response": str(answer)}
+
+    result = run_sweep(
+        _experiment(str(data_path), sweep), "", str(tmp_path), target=target
+    )
+
+    records = {record["variant"]: record for record in result["variants"]}
+    good = records["prompty_file=good.prompty, temperature=0.0"]
+    bad = records["prompty_file=bad.prompty, temperature=0.0"]
+    failed = records["prompty_file=bad.prompty, temperature=0.7"]
+    assert good["metrics"]["math.eval_f1_score.f1_score"] == 1.0
+    assert bad["metrics"]["math.eval_f1_score.f1_score"] == 0.0
+    assert failed["errors"] == 4 and failed["metrics"] == {}
+    # 16 calls shared one pool instead of running variant by variant
+    assert max(peak) > 4
+    assert "| variant | math.eval_f1_score.f1_score |" in result["table"]
+    assert (tmp_path / "sweep_case_sweep.md").exists()
+
+
+def test_run_sweep_rejects_unsupported_arguments(tmp_path):
+    """Test swept arguments must be accepted by the target."""
+    sweep = SweepConfig(
+        model=["gpt-4o"],
+        evaluators={"eval_f1_score": "lib.f1_score.f1_score:F1ScoreEvaluator"}
+    )
+
+    def target(question):
+        return {"response": question}
+
+    with pytest.raises(ValueError, match="does not accept sweep arguments: model"):
+        run_sweep(_experiment("missing.jsonl", sweep), "", target=target)
+
+
+def test_evaluators_score_only_their_own_datasets(tmp_path):
+    """Test each sweep evaluator uses its datasets and mappings, loaded once per source."""
+    for name, answers in (("f1.jsonl", ["1", "2"]), ("len.jsonl", ["a", "b", "c"])):
+        (tmp_path / name).write_text("".join(
+            json.dumps({"question": answer, "answer": answer}) + "\n"
+            for answer in answers
+        ))
+    experiment = _experiment(str(tmp_path / "f1.jsonl"), SweepConfig(
+        evaluators={
+            "eval_f1_score": "lib.f1_score.f1_score:F1ScoreEvaluator",
+            "eval_len_score": "lib.answer_len.answer_length:AnswerLengthEvaluator",
+        }
+    ))
+    # Both datasets share a name, and the length one scores the ground truth
+    experiment.evaluators[1].datasets = [DatasetMapping(
+        name="math",
+        source=str(tmp_path / "len.jsonl"),
+        mappings={"response": "${data.answer}"}
+    )]
+    questions = []
+
+    def target(question):
+        questions.append(question)
+        return {"response": question * 2}
+
+    metrics = run_sweep(experiment, "", target=target)["variants"][0]["metrics"]
+
+    assert sorted(questions) == ["1", "2", "a", "b", "c"]
+    assert metrics == {
+        "math.eval_f1_score.f1_score": 0.0,
+        "math.eval_len_score.answer_length": 1.0,
+    }
+    experiment.sweep.evaluators["f1_score"] = "lib.f1_score.f1_score:F1ScoreEvaluator"
+    with pytest.raises(ValueError, match="f1_score are not evaluators"):
+        run_sweep(experiment, "", target=target)
+
+
+def test_rate_limiter_spaces_requests():
+    """Test the limiter spaces consecutive requests by its interval."""
+    limiter = RateLimiter(requests_per_minute=1200)
+    start = time.monotonic()
+    for _ in range(4):
+        limiter.acquire()
+    assert time.monotonic() - start >= 0.14
+
+
+def test_concurrent_func_exe_calls_keep_their_own_stdout():
+    """Test concurrent snippets capture print, sys.stdout.write and module output."""
+    from math_coding.flows.math_code_generation.pure_python_flow import func_exe
+
+    writes = textwrap.dedent('''
+        import sys
+        import time
+        sys.stdout.write("a1 ")
+        time.sleep(0.1)
+        sys.stdout.write("a2")
+    ''')
+    prints = textwrap.dedent('''
+        import pprint
+        import time
+        print("b1")
+        time.sleep(0.1)
+        pprint.pprint({"b": 2})
+    ''')
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(func_exe, [writes, prints] * 2))
+
+    assert results == ["a1 a2", "b1\n{'b': 2}"] * 2
@@ -0,0 +1,154 @@
+"""Tests for flow tracing spans and exporters."""
+import json
+import textwrap
+
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+
+from lib.flow_metrics import tracing, usage
+from lib.flow_metrics.tracing import (
+    JsonlSpanExporter,
+    configure_tracing,
+    selected_exporter
+)
+from lib.flow_metrics.usage import StageTimer
+
+
+@pytest.fixture
+def jsonl_provider(tmp_path, monkeypatch):
+    """Fixture routing flow spans to a JSONL file through a local provider."""
+    path = tmp_path / "traces.jsonl"
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(JsonlSpanExporter(str(path))))
+    monkeypatch.setattr(
+        usage, "get_tracer", lambda: provider.get_tracer("genaiops.flow")
+    )
+    yield provider, path
+    provider.shutdown()
+
+
+def _records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_stage_spans_are_exported_as_jsonl(jsonl_provider):
+    """Test each timed stage becomes a span nested under its parent."""
+    provider, path = jsonl_provider
+    timer = StageTimer()
+    tracer = provider.get_tracer("test")
+
+    with tracer.start_as_current_span("get_math_response"):
+        with timer.stage("llm", model="gpt-4o") as span:
+            span.set_attribute("retries", 1)
+        with timer.stage("exec"):
+            pass
+
+    records = {record["name"]: record for record in _records(path)}
+    root = records["get_math_response"]
+    assert set(records) == {"flow.llm", "flow.exec", "get_math_response"}
+    assert records["flow.llm"]["parent_id"] == root["span_id"]
+    assert records["flow.llm"]["trace_id"] == root["trace_id"]
+    assert records["flow.llm"]["attributes"] == {"model": "gpt-4o", "retries": 1}
+    assert records["flow.exec"]["duration_ms"] >= 0
+    assert root["parent_id"] is None
+    assert set(timer.durations_ms) == {"llm", "exec"}
+
+
+def test_selected_exporter(monkeypatch):
+    """Test TRACE_EXPORTER overrides the default and is validated."""
+    monkeypatch.delenv("TRACE_EXPORTER", raising=False)
+    assert selected_exporter() == "none"
+    assert selected_exporter(default="azure") == "azure"
+
+    monkeypatch.setenv("TRACE_EXPORTER", " JSONL ")
+    assert selected_exporter(default="azure") == "jsonl"
+
+    monkeypatch.setenv("TRACE_EXPORTER", "zipkin")
+    with pytest.raises(ValueError, match="Unknown trace exporter 'zipkin'"):
+        selected_exporter()
+
+
+def test_configure_tracing_installs_one_provider(tmp_path, monkeypatch):
+    """Test the first exporter wins and later calls are no-ops."""
+    installed = []
+    monkeypatch.setattr(tracing, "_CONFIGURED_EXPORTER", None)
+    monkeypatch.setattr(tracing.trace, "set_tracer_provider", installed.append)
+    path = tmp_path / "out" / "traces.jsonl"
+
+    assert configure_tracing("jsonl", jsonl_path=str(path)) == "jsonl"
+    assert configure_tracing("console") == "jsonl"
+
+    assert len(installed) == 1
+    provider = installed[0]
+    with provider.get_tracer("test").start_as_current_span("offline"):
+        pass
+    provider.force_flush()
+    assert [record["name"] for record in _records(path)] == ["offline"]
+    provider.shutdown()
+
+
+def test_prepare_and_execute_exports_buffered_spans(tmp_path, monkeypatch):
+    """Test spans still batched when a run ends are written to traces.jsonl."""
+    from llmops.eval_experiments import prepare_and_execute
+
+    root = tmp_path / "traced_case"
+    (root / "evaluations").mkdir(parents=True)
+    (root / "data").mkdir()
+    (root / "__init__.py").write_text("")
+    (root / "evaluations" / "__init__.py").write_text("")
+    (root / "evaluations" / "eval_traced.py").write_text(textwrap.dedent('''
+        """Evaluation that records a flow span like the flows do."""
+        from lib.flow_metrics.tracing import (
+            configure_tracing,
+            get_tracer,
+            selected_exporter
+        )
+
+
+        def eval_traced(name, data_path, column_mapping, output_path):
+            """Record one span and return no scores."""
+            configure_tracing(selected_exporter())
+            with get_tracer().start_as_current_span("flow.traced"):
+                pass
+            return {"rows": [], "metrics": {}}
+    '''))
+    (root / "data" / "rows.jsonl").write_text(json.dumps({"question": "q"}) + "\n")
+    (root / "experiment.yaml").write_text(textwrap.dedent('''
+        name: traced_case
+        flow: flows
+        entry_point: flow:run
+        connections_ref: []
+        connections: []
+        env_vars: []
+        evaluators:
+        - name: eval_traced
+          flow: evaluations
+          entry_point: flow:run
+          connections_ref: []
+          env_vars: []
+          datasets:
+            - name: rows
+              source: data/rows.jsonl
+    '''))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    for name in (tracing.EXPORTER_ENV_VAR, tracing.JSONL_PATH_ENV_VAR):
+        # Set by prepare_and_execute, removed again after the test
+        monkeypatch.delenv(name, raising=False)
+    # A provider local to the test, as OpenTelemetry allows one per process
+    installed = []
+    monkeypatch.setattr(tracing, "_CONFIGURED_EXPORTER", None)
+    monkeypatch.setattr(tracing.trace, "set_tracer_provider", installed.append)
+    monkeypatch.setattr(tracing.trace, "get_tracer_provider", lambda: installed[0])
+
+    prepare_and_execute(
+        base_path="traced_case",
+        env_name="dev",
+        report_dir="reports",
+        trace_exporter="jsonl"
+    )
+
+    records = _records(tmp_path / "reports" / "traces.jsonl")
+    installed[0].shutdown()
+    assert [record["name"] for record in records] == ["flow.traced"]
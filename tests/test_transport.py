@@ -0,0 +1,52 @@
+"""Tests for the shared HTTP transport of the chat client."""
+import logging
+
+from azure.ai.inference import ChatCompletionsClient
+from azure.core.credentials import AzureKeyCredential
+
+from benchmarks.bench_transport import MESSAGES, run_benchmark
+from benchmarks.mock_llm import MockChatServer
+from lib.azure_clients.transport import TransportSettings, shared_transport
+
+
+def test_settings_from_env(monkeypatch):
+    """Test the HTTP_* variables override the defaults."""
+    monkeypatch.setenv("HTTP_POOL_SIZE", "64")
+    monkeypatch.setenv("HTTP_KEEP_ALIVE", "false")
+    monkeypatch.setenv("HTTP_READ_TIMEOUT_S", "30")
+
+    assert TransportSettings.from_env() == TransportSettings(
+        pool_size=64, keep_alive=False, connect_timeout_s=10.0, read_timeout_s=30.0
+    )
+
+
+def test_shared_transport_reuses_connections(monkeypatch):
+    """Test new clients on the shared transport reuse one open connection."""
+    logging.getLogger("azure").setLevel(logging.WARNING)
+    monkeypatch.delenv("HTTP_POOL_SIZE", raising=False)
+    monkeypatch.delenv("HTTP_KEEP_ALIVE", raising=False)
+    transport = shared_transport()
+    assert shared_transport() is transport
+    assert shared_transport(TransportSettings(pool_size=2)) is not transport
+
+    with MockChatServer() as server:
+        for _ in range(3):
+            client = ChatCompletionsClient(
+                endpoint=server.endpoint,
+                credential=AzureKeyCredential("mock"),
+                transport=shared_transport(),
+            )
+            client.complete(messages=MESSAGES, model="mock")
+
+    assert server.requests == 3
+    assert server.connections == 1
+
+
+def test_transport_benchmark_over_tls():
+    """Test the benchmark opens a connection per call only without sharing."""
+    per_call, shared = run_benchmark(concurrency=2, requests_per_worker=3, latency_ms=0)
+
+    assert per_call["tls"] and shared["tls"]
+    assert per_call["connections"] == 6
+    assert shared["connections"] <= 2
+    assert shared["requests_per_s"] > 0
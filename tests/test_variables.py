@@ -0,0 +1,79 @@
+"""Tests for experiment variable resolution."""
+import pytest
+
+from llmops import variables
+from llmops.experiment import Connection, Evaluator, Experiment
+from llmops.variables import MissingVariablesError, VariableResolver
+
+
+def _connection(api_base, api_key="key"):
+    return Connection(
+        name="conn",
+        connection_type="azure",
+        api_base=api_base,
+        api_version="v1",
+        api_key=api_key,
+        api_type="azure",
+        deployment_name="deploy"
+    )
+
+
+def test_multiple_placeholders_and_defaults():
+    """Test every placeholder in a value is substituted, with defaults."""
+    resolver = VariableResolver({"HOST": "example.com", "EMPTY": "", "PORT": 8080})
+
+    assert resolver.resolve("https://${HOST}:${PORT}/${PATH:-v1}", "x") == \
+        "https://example.com:8080/v1"
+    assert resolver.resolve("${EMPTY:-fallback}", "x") == "fallback"
+    assert resolver.resolve("${PORT}", "x") == 8080
+    assert resolver.resolve("${data.answer}", "x") == "${data.answer}"
+    assert resolver.missing == []
+
+
+def test_experiment_reports_every_missing_variable(monkeypatch):
+    """Test one error lists the missing variables of the whole tree."""
+    monkeypatch.delenv("MISSING_KEY", raising=False)
+    monkeypatch.delenv("MISSING_EVAL_VAR", raising=False)
+    experiment = Experiment(
+        name="test",
+        flow="flow",
+        entry_point="entry.py",
+        connections=[_connection("https://example.com", "${MISSING_KEY}")],
+        env_vars=[{"MODEL": "gpt"}],
+        evaluators=[Evaluator(
+            name="eval1",
+            flow="flow",
+            entry_point="entry.py",
+            connections=[],
+            env_vars=[{"A": "${MISSING_EVAL_VAR}"}, {"B": "${MODEL}"}],
+            datasets=[]
+        )]
+    )
+
+    with pytest.raises(MissingVariablesError) as exc_info:
+        experiment.resolve_variables()
+
+    assert exc_info.value.missing == [
+        ("MISSING_KEY", "connections.conn.api_key"),
+        ("MISSING_EVAL_VAR", "evaluators.eval1.env_vars.A"),
+    ]
+    assert "env var MISSING_KEY not found" in str(exc_info.value)
+    # Evaluators see the experiment env vars
+    assert experiment.evaluators[0].resolved_env_vars["B"] == "gpt"
+
+
+def test_dotenv_is_loaded_once(monkeypatch):
+    """Test repeated resolution does not read the .env file again."""
+    calls = []
+    monkeypatch.setattr(variables, "load_dotenv", lambda: calls.append(1))
+    variables._load_dotenv_once.cache_clear()
+
+    for _ in range(3):
+        _connection("https://example.com").resolve_variables(None)
+        Evaluator(
+            name="e", flow="f", entry_point="e.py", connections=[],
+            env_vars=[], datasets=[]
+        ).resolve_variables()
+
+    assert calls == [1]
+    variables._load_dotenv_once.cache_clear()
@@ -0,0 +1,191 @@
+"""Tests for the evaluation work queue."""
+import json
+import textwrap
+
+import pytest
+
+from llmops.eval_experiments import prepare_and_execute
+from llmops.work_queue import DONE, FAILED, PENDING, Task, WorkQueue
+
+
+def _task(chunk):
+    return Task(
+        task_id=f"eval/eval_run/ds/{chunk}",
+        evaluator="eval",
+        function="eval_run",
+        dataset="ds",
+        chunk=chunk,
+        payload=json.dumps({"row": chunk}) + "\n"
+    )
+
+
+@pytest.fixture
+def queue(tmp_path):
+    """Fixture providing an empty work queue."""
+    return WorkQueue(str(tmp_path / "queue.db"), lease_seconds=60, max_attempts=2)
+
+
+def test_enqueue_is_idempotent(queue):
+    """Test enqueueing the same tasks twice adds them once."""
+    assert queue.enqueue([_task(0), _task(1)]) == 2
+    assert queue.enqueue([_task(0), _task(1), _task(2)]) == 1
+    assert queue.stats() == {PENDING: 3}
+
+
+def test_enqueue_keeps_done_tasks_and_retries_failed_ones(queue):
+    """Test re-enqueueing resets failed tasks but keeps the results of done ones."""
+    queue.enqueue([_task(0), _task(1)])
+    done = queue.claim("worker-a")
+    queue.ack(done.task_id, "worker-a", {"metrics": {}})
+    failed = queue.claim("worker-a")
+    queue.nack(failed.task_id, "worker-a", "boom")
+    queue.nack(queue.claim("worker-a").task_id, "worker-a", "boom")
+    assert queue.stats() == {DONE: 1, FAILED: 1}
+
+    assert queue.enqueue([_task(0), _task(1)]) == 1
+    assert queue.stats() == {DONE: 1, PENDING: 1}
+    assert queue.claim("worker-b").attempts == 1
+
+
+def test_supersede_fails_unfinished_tasks_of_other_runs(queue):
+    """Test a new run fails the pending tasks of earlier runs only."""
+    old = Task("run-1/eval/eval_run/ds/0", "eval", "eval_run", "ds", 0, "")
+    new = Task("run-2/eval/eval_run/ds/0", "eval", "eval_run", "ds", 0, "")
+    queue.enqueue([old, new])
+
+    assert queue.supersede("run-2") == 1
+    assert queue.results([old.task_id])[old.task_id]["status"] == FAILED
+    assert queue.claim("worker-a").task_id == new.task_id
+    assert queue.latest_run() == "run-2"
+
+
+def test_claim_and_ack(queue):
+    """Test a claimed task is leased once and stored when acknowledged."""
+    queue.enqueue([_task(0)])
+
+    task = queue.claim("worker-a")
+    assert task.task_id == "eval/eval_run/ds/0"
+    assert task.attempts == 1
+    assert queue.claim("worker-b") is None
+    assert not queue.is_drained()
+
+    assert not queue.ack(task.task_id, "worker-b", {"metrics": {"score": 0}})
+    assert queue.ack(task.task_id, "worker-a", {"metrics": {"score": 1}})
+    assert queue.is_drained()
+    record = queue.results([task.task_id])[task.task_id]
+    assert record["status"] == DONE
+    assert record["result"] == {"metrics": {"score": 1}}
+
+
+def test_nack_retries_then_fails(queue):
+    """Test failed tasks are retried up to max_attempts."""
+    queue.enqueue([_task(0)])
+
+    task = queue.claim("worker-a")
+    queue.nack(task.task_id, "worker-a", "boom")
+    assert queue.stats() == {PENDING: 1}
+
+    task = queue.claim("worker-b")
+    assert task.attempts == 2
+    queue.nack(task.task_id, "worker-b", "boom again")
+    assert queue.stats() == {FAILED: 1}
+    assert queue.results([task.task_id])[task.task_id]["error"] == "boom again"
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    """Test a task whose worker stopped renewing its lease is handed out again."""
+    queue = WorkQueue(str(tmp_path / "queue.db"), lease_seconds=0, max_attempts=3)
+    queue.enqueue([_task(0)])
+
+    first = queue.claim("worker-a")
+    second = queue.claim("worker-b")
+    assert second.task_id == first.task_id
+    assert not queue.heartbeat(first.task_id, "worker-a")
+
+
+@pytest.fixture
+def use_case(tmp_path, monkeypatch):
+    """Fixture providing a minimal use case with a local evaluation function."""
+    root = tmp_path / "queue_case"
+    (root / "evaluations").mkdir(parents=True)
+    (root / "data").mkdir()
+    (root / "__init__.py").write_text("")
+    (root / "evaluations" / "__init__.py").write_text("")
+    (root / "evaluations" / "eval_echo.py").write_text(textwrap.dedent('''
+        """Evaluation that scores the answer of each row."""
+        import json
+
+
+        def eval_echo(name, data_path, column_mapping, output_path):
+            """Score each row by its answer."""
+            with open(data_path, encoding="utf-8") as f:
+                rows = [json.loads(line) for line in f if line.strip()]
+            scores = [float(row["answer"]) for row in rows]
+            return {
+                "rows": [{"outputs.echo.score": score} for score in scores],
+                "metrics": {"echo.score": sum(scores) / len(scores)},
+            }
+    '''))
+    (root / "data" / "rows.jsonl").write_text("".join(
+        json.dumps({"question": f"q{i}", "answer": str(i)}) + "\n"
+        for i in range(6)
+    ))
+    (root / "experiment.yaml").write_text(textwrap.dedent('''
+        name: queue_case
+        flow: flows
+        entry_point: flow:run
+        connections_ref: []
+        connections: []
+        env_vars: []
+        evaluators:
+        - name: eval_echo
+          flow: evaluations
+          entry_point: flow:run
+          connections_ref: []
+          env_vars: []
+          datasets:
+            - name: rows
+              source: data/rows.jsonl
+    '''))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    return tmp_path
+
+
+def test_prepare_and_execute_with_workers(use_case):
+    """Test queued execution merges the results of all rows."""
+    results = prepare_and_execute(
+        base_path="queue_case",
+        env_name="dev",
+        report_dir="reports",
+        workers=2,
+        rows_per_task=2
+    )
+
+    assert len(results) == 1
+    assert len(results[0]["rows"]) == 6
+    assert results[0]["metrics"]["echo.score"] == pytest.approx(2.5)
+    assert (use_case / "reports" /
+            "queue_case_eval_echo_rows_eval_echo_queued.json").exists()
+
+
+def test_reruns_use_new_code_unless_resumed(use_case):
+    """Test a new run re-executes every task while a resumed run keeps results."""
+    kwargs = {
+        "base_path": "queue_case",
+        "env_name": "dev",
+        "report_dir": "reports",
+        "workers": 1,
+        "rows_per_task": 3
+    }
+    assert prepare_and_execute(**kwargs)[0]["metrics"]["echo.score"] == pytest.approx(2.5)
+
+    eval_file = use_case / "queue_case" / "evaluations" / "eval_echo.py"
+    eval_file.write_text(eval_file.read_text().replace(
+        'float(row["answer"])', 'float(row["answer"]) + 1'
+    ))
+
+    resumed = prepare_and_execute(resume=True, **kwargs)
+    assert resumed[0]["metrics"]["echo.score"] == pytest.approx(2.5)
+    rerun = prepare_and_execute(**kwargs)
+    assert rerun[0]["metrics"]["echo.score"] == pytest.approx(3.5)